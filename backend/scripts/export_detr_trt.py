@@ -0,0 +1,84 @@
+"""
+Export the DETR model to ONNX and build a TensorRT engine from it
+
+The engine is used by TensorRTObjectDetectionService. Build it on the GPU
+it will run on, since TensorRT engines are not portable between GPU models.
+
+The ONNX export needs packages that requirements.txt does not list:
+    pip install onnx onnxscript
+
+Usage:
+    python scripts/export_detr_trt.py [--model facebook/detr-resnet-50] [--engine detr.engine]
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+
+# Add backend directory to Python path
+backend_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if backend_path not in sys.path:
+    sys.path.insert(0, backend_path)
+
+import torch
+from transformers import DetrForObjectDetection
+
+from src.services.object_detection_trt import INPUT_NAME, OUTPUT_NAMES
+
+def export_onnx(model_name: str, onnx_path: str) -> None:
+    """Export DETR to ONNX with dynamic batch and image size axes"""
+    model = DetrForObjectDetection.from_pretrained(model_name, use_pretrained_backbone=False)
+    model.eval()
+    # The processor resizes to an 800px shortest edge, so trace at a typical size
+    dummy = torch.randn(1, 3, 800, 1066)
+    
+    # no_grad rather than inference_mode: inference tensors can break export tracing
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (dummy,),
+            onnx_path,
+            input_names=[INPUT_NAME],
+            output_names=list(OUTPUT_NAMES),
+            opset_version=17,
+            dynamic_axes={
+                INPUT_NAME: {0: "N", 2: "H", 3: "W"},
+                OUTPUT_NAMES[0]: {0: "N"},
+                OUTPUT_NAMES[1]: {0: "N"},
+            },
+        )
+    print(f"✅ Exported ONNX model: {onnx_path}")
+
+def build_engine(onnx_path: str, engine_path: str) -> None:
+    """Build an FP16 TensorRT engine with trtexec"""
+    trtexec = shutil.which("trtexec")
+    if trtexec is None:
+        sys.exit("❌ trtexec not found on PATH; install TensorRT to build the engine")
+    
+    subprocess.run(
+        [
+            trtexec,
+            f"--onnx={onnx_path}",
+            "--fp16",
+            f"--minShapes={INPUT_NAME}:1x3x320x320",
+            f"--optShapes={INPUT_NAME}:1x3x800x1066",
+            f"--maxShapes={INPUT_NAME}:1x3x1333x1333",
+            f"--saveEngine={engine_path}",
+        ],
+        check=True,
+    )
+    print(f"✅ Built TensorRT engine: {engine_path}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Export DETR to a TensorRT engine")
+    parser.add_argument("--model", default="facebook/detr-resnet-50")
+    parser.add_argument("--onnx", default="detr.onnx")
+    parser.add_argument("--engine", default=os.getenv("DETR_TRT_ENGINE", "detr.engine"))
+    args = parser.parse_args()
+    
+    export_onnx(args.model, args.onnx)
+    build_engine(args.onnx, args.engine)
+
+if __name__ == "__main__":
+    main()
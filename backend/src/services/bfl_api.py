@@ -3,6 +3,7 @@ import os
 import time
 import requests
 from dotenv import load_dotenv
+from google.api_core.retry import Retry
 
 load_dotenv()
 
@@ -10,6 +11,37 @@ BFL_API_KEY = os.getenv("BFL_API_KEY")
 if not BFL_API_KEY:
     raise ValueError("BFL_API_KEY not found in .env file.")
 
+
+def _is_rate_limited(exc: Exception) -> bool:
+    """True if the request was rejected with HTTP 429"""
+    return (
+        isinstance(exc, requests.HTTPError)
+        and exc.response is not None
+        and exc.response.status_code == 429
+    )
+
+
+def _is_transient(exc: Exception) -> bool:
+    """True for network errors, rate limiting and 5xx responses"""
+    if isinstance(exc, (requests.ConnectionError, requests.Timeout)):
+        return True
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        return exc.response.status_code == 429 or exc.response.status_code >= 500
+    return False
+
+
+# Exponential backoff with jitter. Submitting a job is only retried when BFL
+# rejected it outright, so an ambiguous failure never starts (and bills) a second job.
+_SUBMIT_RETRY = Retry(predicate=_is_rate_limited, initial=1.0, maximum=30.0, multiplier=2.0, timeout=120.0)
+_FETCH_RETRY = Retry(predicate=_is_transient, initial=1.0, maximum=30.0, multiplier=2.0, timeout=120.0)
+
+
+def _request(method: str, url: str, **kwargs) -> requests.Response:
+    """Send a request and raise for HTTP error statuses"""
+    response = requests.request(method, url, **kwargs)
+    response.raise_for_status()
+    return response
+
 def generate_art_image(
     prompt: str,
     aspect_ratio: str,
@@ -43,8 +75,7 @@ def generate_art_image(
         "output_format": "png"
     }
 
-    initial_response = requests.post(start_url, json=payload, headers=headers)
-    initial_response.raise_for_status()
+    initial_response = _SUBMIT_RETRY(_request)("POST", start_url, json=payload, headers=headers)
     
     polling_url = initial_response.json().get("polling_url")
     if not polling_url:
@@ -54,8 +85,7 @@ def generate_art_image(
     # Polling logic remains the same
     for i in range(30):
         print(f"--- Polling attempt {i+1}...")
-        poll_response = requests.get(polling_url, headers={"x-key": BFL_API_KEY})
-        poll_response.raise_for_status()
+        poll_response = _FETCH_RETRY(_request)("GET", polling_url, headers={"x-key": BFL_API_KEY})
         poll_data = poll_response.json()
         status = poll_data.get("status")
 
@@ -64,8 +94,7 @@ def generate_art_image(
             if not final_url:
                 raise ValueError("Generation complete, but no final URL found.")
             print("--- Status is Ready! Downloading image...")
-            image_response = requests.get(final_url)
-            image_response.raise_for_status()
+            image_response = _FETCH_RETRY(_request)("GET", final_url)
             print("--- Image downloaded successfully.")
             return image_response.content
         else:
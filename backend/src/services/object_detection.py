@@ -5,64 +5,92 @@ This module provides object detection functionality to identify suitable regions
 in mockup templates where artwork should be placed using pre-trained models.
 """
 
+import functools
+import heapq
 import logging
+import operator
+import os
 from typing import List, Dict, Tuple, Optional, Any
 import torch
 from transformers import DetrImageProcessor, DetrForObjectDetection
 from PIL import Image
 import numpy as np
 
+from .object_detection_types import (
+    BoundingBox,
+    ObjectDetectionConfig,
+    ObjectDetectionError,
+    NoSuitableRegionsError,
+    MockObjectDetectionService,
+    create_mock_detection_service
+)
+
 logger = logging.getLogger(__name__)
 
-class ObjectDetectionConfig:
-    """Configuration class for object detection parameters."""
+
+@functools.lru_cache(maxsize=4)
+def _load_detr(model_name: str, device: torch.device) -> Tuple[DetrImageProcessor, DetrForObjectDetection]:
+    """
+    Load a DETR processor and model once per process and device.
     
-    def __init__(
-        self,
-        confidence_threshold: float = 0.7,
-        model_name: str = "facebook/detr-resnet-50",
-        target_classes: Optional[List[str]] = None,
-        max_detections: int = 10
-    ):
-        self.confidence_threshold = confidence_threshold
-        self.model_name = model_name
-        self.target_classes = target_classes or [
-            "picture frame", "tv", "laptop", "cell phone", "book",
-            "bottle", "cup", "bowl", "chair", "couch", "bed"
-        ]
-        self.max_detections = max_detections
+    Every ObjectDetectionService shares the cached pair, so creating a service
+    per job does not reload the model weights.
+    """
+    processor = DetrImageProcessor.from_pretrained(model_name)
+    # The checkpoint already contains the backbone weights, so skip fetching the ImageNet backbone first
+    model = DetrForObjectDetection.from_pretrained(model_name, use_pretrained_backbone=False)
+    model.to(device)
+    model.eval()
+    
+    # Compiling pays off on GPU but can be slower than eager mode on CPU
+    if device.type == "cuda" and os.getenv("DETR_COMPILE", "1") == "1":
+        model = torch.compile(model, mode="reduce-overhead", fullgraph=False)
+        _warm_up(processor, model, device)
+    
+    return processor, model
 
-class BoundingBox:
-    """Represents a detected object's bounding box with metadata."""
+def _warm_up(processor: DetrImageProcessor, model: DetrForObjectDetection, device: torch.device) -> None:
+    """Run one dummy inference so the first real request doesn't pay the compile cost."""
+    inputs = processor(images=Image.new('RGB', (800, 600)), return_tensors="pt")
+    inputs = {k: v.to(device) for k, v in inputs.items()}
+    with torch.inference_mode():
+        model(**inputs)
+
+def _select_detections(
+    scores: torch.Tensor,
+    labels: torch.Tensor,
+    boxes: torch.Tensor,
+    allowed_label_ids: Optional[torch.Tensor],
+    max_detections: int
+) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor, torch.Tensor]:
+    """
+    Filter, rank and convert one image's detections using tensor ops only.
     
-    def __init__(self, x: float, y: float, width: float, height: float, 
-                 confidence: float, label: str):
-        self.x = x
-        self.y = y
-        self.width = width
-        self.height = height
-        self.confidence = confidence
-        self.label = label
+    Args:
+        scores: Detection scores, shape (N,)
+        labels: Detection label IDs, shape (N,)
+        boxes: Boxes as (center_x, center_y, width, height), shape (N, 4)
+        allowed_label_ids: Label IDs to keep, or None to keep every label
+        max_detections: Maximum number of detections to keep
+        
+    Returns:
+        Scores, labels, top-left corners and sizes of the kept detections,
+        highest confidence first
+    """
+    if allowed_label_ids is not None:
+        keep = (labels.unsqueeze(1) == allowed_label_ids.unsqueeze(0)).any(dim=1)
+        scores, labels, boxes = scores[keep], labels[keep], boxes[keep]
     
-    def to_dict(self) -> Dict[str, Any]:
-        """Convert bounding box to dictionary format."""
-        return {
-            'x': self.x,
-            'y': self.y,
-            'width': self.width,
-            'height': self.height,
-            'confidence': self.confidence,
-            'label': self.label
-        }
+    top = scores.topk(min(scores.shape[0], max_detections)).indices
+    scores, labels, boxes = scores[top], labels[top], boxes[top]
     
-    def get_corners(self) -> Tuple[Tuple[float, float], ...]:
-        """Get the four corners of the bounding box."""
-        return (
-            (self.x, self.y),
-            (self.x + self.width, self.y),
-            (self.x + self.width, self.y + self.height),
-            (self.x, self.y + self.height)
-        )
+    # Convert box coordinates (center_x, center_y, width, height) to (x, y, width, height)
+    return scores, labels, boxes[:, :2] - boxes[:, 2:] / 2, boxes[:, 2:]
+
+@functools.lru_cache(maxsize=1)
+def _compiled_select_detections():
+    """Compile _select_detections once per process, on first use."""
+    return torch.compile(_select_detections, dynamic=True)
 
 class ObjectDetectionService:
     """Service for detecting objects in mockup template images."""
@@ -72,16 +100,13 @@ class ObjectDetectionService:
         self._processor = None
         self._model = None
         self._device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-        
+    
     def _load_model(self):
         """Lazy load the DETR model and processor."""
         if self._processor is None or self._model is None:
             logger.info(f"Loading object detection model: {self.config.model_name}")
             try:
-                self._processor = DetrImageProcessor.from_pretrained(self.config.model_name)
-                self._model = DetrForObjectDetection.from_pretrained(self.config.model_name)
-                self._model.to(self._device)
-                self._model.eval()
+                self._processor, self._model = _load_detr(self.config.model_name, self._device)
                 logger.info(f"Model loaded successfully on device: {self._device}")
             except Exception as e:
                 logger.error(f"Failed to load object detection model: {e}")
@@ -93,74 +118,109 @@ class ObjectDetectionService:
         
         Args:
             image: PIL Image to analyze
-            
+        
         Returns:
             List of BoundingBox objects representing detected regions
-            
+        
         Raises:
             Exception: If object detection fails
         """
+        return self.detect_objects_batch([image])[0]
+    
+    def detect_objects_batch(self, images: List[Image.Image]) -> List[List[BoundingBox]]:
+        """
+        Detect objects in several images with a single forward pass.
+        
+        The processor pads the images to a common size and emits a pixel mask,
+        so the model sees each image as it would on its own.
+        
+        Args:
+            images: PIL Images to analyze
+        
+        Returns:
+            One list of BoundingBox objects per input image, in input order
+        
+        Raises:
+            Exception: If object detection fails
+        """
+        if not images:
+            return []
+        
         try:
             self._load_model()
             
-            # Preprocess the image
-            inputs = self._processor(images=image, return_tensors="pt")
+            # Preprocess the whole batch and move it to the device once
+            inputs = self._processor(images=images, return_tensors="pt")
             inputs = {k: v.to(self._device) for k, v in inputs.items()}
             
             # Run inference
-            with torch.no_grad():
+            with torch.inference_mode():
                 outputs = self._model(**inputs)
             
             # Process results
-            target_sizes = torch.tensor([image.size[::-1]])  # (height, width)
-            results = self._processor.post_process_object_detection(
+            target_sizes = torch.tensor([image.size[::-1] for image in images])  # (height, width)
+            batch_results = self._processor.post_process_object_detection(
                 outputs, 
                 target_sizes=target_sizes, 
                 threshold=self.config.confidence_threshold
-            )[0]
-            
-            # Convert to BoundingBox objects
-            detected_boxes = []
-            for score, label_id, box in zip(
-                results["scores"], 
-                results["labels"], 
-                results["boxes"]
-            ):
-                if len(detected_boxes) >= self.config.max_detections:
-                    break
-                    
-                # Convert label ID to label name
-                label = self._model.config.id2label[label_id.item()]
-                
-                # Filter for target classes (if specified)
-                if self.config.target_classes and not any(
-                    target in label.lower() for target in 
-                    [tc.lower() for tc in self.config.target_classes]
-                ):
-                    continue
-                
-                # Convert box coordinates (center_x, center_y, width, height) to (x, y, width, height)
-                center_x, center_y, width, height = box.tolist()
-                x = center_x - width / 2
-                y = center_y - height / 2
-                
-                bbox = BoundingBox(
-                    x=x,
-                    y=y,
-                    width=width,
-                    height=height,
-                    confidence=score.item(),
-                    label=label
-                )
-                detected_boxes.append(bbox)
-            
-            logger.info(f"Detected {len(detected_boxes)} suitable objects")
-            return detected_boxes
+            )
             
+            allowed_label_ids = self._allowed_label_ids()
+            detections = [self._to_bounding_boxes(results, allowed_label_ids) for results in batch_results]
+            logger.info(f"Detected {sum(len(boxes) for boxes in detections)} suitable objects in {len(images)} image(s)")
+            return detections
+        
         except Exception as e:
             logger.error(f"Object detection failed: {e}")
             raise
     
+    def _allowed_label_ids(self) -> Optional[List[int]]:
+        """Return the model label IDs matching the target classes, or None to keep every label."""
+        targets = self.config._target_set
+        if not targets:
+            return None
+        allowed = []
+        for label_id, label in self._model.config.id2label.items():
+            label = label.lower()
+            # Exact class names hit the set directly; otherwise fall back to substring matching
+            if label in targets or any(target in label for target in targets):
+                allowed.append(label_id)
+        return allowed
+    
+    def _to_bounding_boxes(
+        self,
+        results: Dict[str, torch.Tensor],
+        allowed_label_ids: Optional[List[int]]
+    ) -> List[BoundingBox]:
+        """
+        Convert one image's post-processed detections to filtered BoundingBox objects.
+        
+        Class filtering, the detection limit and the box conversion all run on
+        the tensors' device, so only the kept detections are copied to the host.
+        
+        Args:
+            results: Post-processed scores, labels and boxes for one image
+            allowed_label_ids: Label IDs to keep, or None to keep every label
+            
+        Returns:
+            Up to max_detections BoundingBox objects, highest confidence first
+        """
+        labels = results["labels"]
+        if allowed_label_ids is not None:
+            allowed_label_ids = labels.new_tensor(allowed_label_ids)
+        select = _compiled_select_detections() if self.config.compile_postprocess else _select_detections
+        scores, labels, corners, sizes = select(
+            results["scores"], labels, results["boxes"], allowed_label_ids, self.config.max_detections
+        )
+        
+        id2label = self._model.config.id2label
+        return [
+            BoundingBox(x=x, y=y, width=width, height=height, confidence=score, label=id2label[label_id])
+            for score, label_id, (x, y), (width, height) in zip(
+                scores.tolist(), labels.tolist(), corners.tolist(), sizes.tolist()
+            )
+        ]
+    
     def find_suitable_regions(self, image: Image.Image) -> List[BoundingBox]:
         """
         Find regions in the image that are suitable for artwork placement.
@@ -169,10 +229,10 @@ class ObjectDetectionService:
         
         Args:
             image: PIL Image of the mockup template
-            
+        
         Returns:
             List of BoundingBox objects representing suitable regions
-            
+        
         Raises:
             NoSuitableRegionsError: If no suitable regions are found
             ObjectDetectionError: If detection fails
@@ -183,9 +243,6 @@ class ObjectDetectionService:
             if not detected_objects:
                 raise NoSuitableRegionsError("No suitable regions detected in the mockup template")
             
-            # Sort by confidence score (highest first)
-            detected_objects.sort(key=lambda x: x.confidence, reverse=True)
-            
             # Filter for regions that are large enough to be useful
             min_area = (image.width * image.height) * 0.01  # At least 1% of image area
             suitable_regions = [
@@ -198,63 +255,15 @@ class ObjectDetectionService:
                     f"Detected {len(detected_objects)} objects but none are large enough for artwork placement"
                 )
             
+            # Keep the most confident regions (highest first); only the survivors are ranked
+            suitable_regions = heapq.nlargest(
+                self.config.max_detections, suitable_regions, key=operator.attrgetter('confidence')
+            )
+            
             logger.info(f"Found {len(suitable_regions)} suitable regions for artwork placement")
             return suitable_regions
-            
+        
         except NoSuitableRegionsError:
             raise
         except Exception as e:
             raise ObjectDetectionError(f"Failed to find suitable regions: {e}")
-
-class ObjectDetectionError(Exception):
-    """Base exception for object detection errors."""
-    pass
-
-class NoSuitableRegionsError(ObjectDetectionError):
-    """Raised when no suitable regions are found for artwork placement."""
-    pass
-
-def create_mock_detection_service() -> 'MockObjectDetectionService':
-    """
-    Create a mock object detection service for testing purposes.
-    
-    Returns:
-        MockObjectDetectionService instance
-    """
-    return MockObjectDetectionService()
-
-class MockObjectDetectionService:
-    """Mock implementation of ObjectDetectionService for testing."""
-    
-    def __init__(self):
-        self.config = ObjectDetectionConfig()
-    
-    def detect_objects(self, image: Image.Image) -> List[BoundingBox]:
-        """Mock object detection that returns predictable results."""
-        # Return mock detections based on image size
-        width, height = image.size
-        
-        mock_detections = [
-            BoundingBox(
-                x=width * 0.2,
-                y=height * 0.2,
-                width=width * 0.3,
-                height=height * 0.4,
-                confidence=0.85,
-                label="picture frame"
-            ),
-            BoundingBox(
-                x=width * 0.6,
-                y=height * 0.1,
-                width=width * 0.25,
-                height=height * 0.3,
-                confidence=0.75,
-                label="laptop"
-            )
-        ]
-        
-        return mock_detections
-    
-    def find_suitable_regions(self, image: Image.Image) -> List[BoundingBox]:
-        """Mock implementation of find_suitable_regions."""
-        return self.detect_objects(image)
\ No newline at end of file
@@ -0,0 +1,140 @@
+"""
+TensorRT Object Detection Service
+
+Runs a prebuilt TensorRT engine of the DETR model (see scripts/export_detr_trt.py)
+in place of the PyTorch model. Pre- and post-processing still go through the
+Hugging Face processor, so detections match ObjectDetectionService.
+"""
+
+import logging
+import os
+from typing import List, Optional
+import torch
+from PIL import Image
+from transformers import DetrConfig, DetrImageProcessor
+from transformers.models.detr.modeling_detr import DetrObjectDetectionOutput
+
+from .object_detection import BoundingBox, ObjectDetectionConfig, ObjectDetectionService
+
+try:
+    import tensorrt as trt
+    TRT_AVAILABLE = True
+except ImportError:
+    trt = None
+    TRT_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Default engine location, overridable per service
+DETR_TRT_ENGINE_PATH = os.getenv("DETR_TRT_ENGINE", "detr.engine")
+
+INPUT_NAME = "pixel_values"
+OUTPUT_NAMES = ("logits", "pred_boxes")
+
+class _TensorRTDetrModel:
+    """
+    Callable stand-in for DetrForObjectDetection backed by a TensorRT engine.
+    
+    Input and output buffers are CUDA tensors, so the engine reads and writes
+    device memory directly and no host round trip happens between the
+    processor and post-processing.
+    """
+    
+    def __init__(self, engine_path: str, config: DetrConfig, device: torch.device):
+        self.config = config
+        self._device = device
+        runtime = trt.Runtime(trt.Logger(trt.Logger.WARNING))
+        with open(engine_path, "rb") as f:
+            self._engine = runtime.deserialize_cuda_engine(f.read())
+        if self._engine is None:
+            raise RuntimeError(f"Failed to deserialize TensorRT engine: {engine_path}")
+        self._context = self._engine.create_execution_context()
+    
+    def __call__(self, pixel_values: torch.Tensor, **kwargs) -> DetrObjectDetectionOutput:
+        # The engine is exported without a pixel mask, which is only safe for unpadded single images
+        pixel_values = pixel_values.to(self._device, torch.float32).contiguous()
+        self._context.set_input_shape(INPUT_NAME, tuple(pixel_values.shape))
+        self._context.set_tensor_address(INPUT_NAME, pixel_values.data_ptr())
+        
+        outputs = {}
+        for name in OUTPUT_NAMES:
+            output = torch.empty(tuple(self._context.get_tensor_shape(name)), dtype=torch.float32, device=self._device)
+            self._context.set_tensor_address(name, output.data_ptr())
+            outputs[name] = output
+        
+        stream = torch.cuda.current_stream(self._device)
+        if not self._context.execute_async_v3(stream.cuda_stream):
+            raise RuntimeError("TensorRT engine execution failed")
+        stream.synchronize()
+        
+        return DetrObjectDetectionOutput(logits=outputs["logits"], pred_boxes=outputs["pred_boxes"])
+
+class TensorRTObjectDetectionService(ObjectDetectionService):
+    """ObjectDetectionService that runs inference through a TensorRT engine."""
+    
+    def __init__(self, config: Optional[ObjectDetectionConfig] = None, engine_path: Optional[str] = None):
+        super().__init__(config)
+        self.engine_path = engine_path or DETR_TRT_ENGINE_PATH
+    
+    def _load_model(self):
+        """Lazy load the processor and deserialize the TensorRT engine."""
+        if self._processor is None or self._model is None:
+            logger.info(f"Loading TensorRT engine: {self.engine_path}")
+            try:
+                self._processor = DetrImageProcessor.from_pretrained(self.config.model_name)
+                # Only the label map is needed from the checkpoint, not the weights
+                model_config = DetrConfig.from_pretrained(self.config.model_name)
+                self._model = _TensorRTDetrModel(self.engine_path, model_config, self._device)
+                logger.info(f"TensorRT engine loaded successfully on device: {self._device}")
+            except Exception as e:
+                logger.error(f"Failed to load TensorRT engine: {e}")
+                raise
+    
+    def detect_objects_batch(self, images: List[Image.Image]) -> List[List[BoundingBox]]:
+        """
+        Detect objects image by image.
+        
+        The engine takes no pixel mask, so padded batches would let the padding
+        leak into detections; run each image at its own size instead.
+        """
+        return [
+            detections
+            for image in images
+            for detections in super().detect_objects_batch([image])
+        ]
+
+def tensorrt_available(engine_path: Optional[str] = None) -> bool:
+    """
+    Check whether a TensorRT engine can be used on this machine.
+    
+    Args:
+        engine_path: Engine file to look for, defaults to DETR_TRT_ENGINE
+    
+    Returns:
+        True if TensorRT is installed, a GPU is present and the engine file exists
+    """
+    return (
+        TRT_AVAILABLE
+        and torch.cuda.is_available()
+        and os.path.isfile(engine_path or DETR_TRT_ENGINE_PATH)
+    )
+
+def create_detection_service(
+    config: Optional[ObjectDetectionConfig] = None,
+    engine_path: Optional[str] = None
+) -> ObjectDetectionService:
+    """
+    Create the fastest available object detection service.
+    
+    Args:
+        config: Detection configuration shared by both implementations
+        engine_path: Prebuilt TensorRT engine, defaults to DETR_TRT_ENGINE
+    
+    Returns:
+        TensorRTObjectDetectionService when an engine can be used, otherwise
+        the PyTorch ObjectDetectionService
+    """
+    if tensorrt_available(engine_path):
+        return TensorRTObjectDetectionService(config, engine_path)
+    logger.info("TensorRT engine not available, using PyTorch object detection")
+    return ObjectDetectionService(config)
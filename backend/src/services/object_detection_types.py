@@ -0,0 +1,129 @@
+"""
+Object Detection Types for Intelligent Mockup Generation
+
+Configuration, bounding boxes, exceptions and the mock detection service. Kept
+free of torch/transformers so callers that only need these types (workflows,
+perspective transforms, tests using the mock) don't load the DETR stack.
+"""
+
+from typing import List, Dict, Tuple, Optional, Any
+from PIL import Image
+
+class ObjectDetectionConfig:
+    """Configuration class for object detection parameters."""
+    
+    def __init__(
+        self,
+        confidence_threshold: float = 0.7,
+        model_name: str = "facebook/detr-resnet-50",
+        target_classes: Optional[List[str]] = None,
+        max_detections: int = 10,
+        compile_postprocess: bool = False
+    ):
+        self.confidence_threshold = confidence_threshold
+        self.model_name = model_name
+        self.target_classes = target_classes or [
+            "picture frame", "tv", "laptop", "cell phone", "book",
+            "bottle", "cup", "bowl", "chair", "couch", "bed"
+        ]
+        self.max_detections = max_detections
+        # Off by default: compiling the post-processing only pays off for some model/device mixes
+        self.compile_postprocess = compile_postprocess
+    
+    @property
+    def target_classes(self) -> List[str]:
+        """Object classes detections are filtered to."""
+        return self._target_classes
+    
+    @target_classes.setter
+    def target_classes(self, target_classes: List[str]) -> None:
+        self._target_classes = target_classes
+        # Lower-cased once here so label filtering doesn't redo it per detection batch
+        self._target_set = frozenset(tc.lower() for tc in target_classes)
+
+class BoundingBox:
+    """Represents a detected object's bounding box with metadata."""
+    
+    __slots__ = ('x', 'y', 'width', 'height', 'confidence', 'label')
+    
+    def __init__(self, x: float, y: float, width: float, height: float, 
+                 confidence: float, label: str):
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.confidence = confidence
+        self.label = label
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert bounding box to dictionary format."""
+        return {
+            'x': self.x,
+            'y': self.y,
+            'width': self.width,
+            'height': self.height,
+            'confidence': self.confidence,
+            'label': self.label
+        }
+    
+    def get_corners(self) -> Tuple[Tuple[float, float], ...]:
+        """Get the four corners of the bounding box."""
+        return (
+            (self.x, self.y),
+            (self.x + self.width, self.y),
+            (self.x + self.width, self.y + self.height),
+            (self.x, self.y + self.height)
+        )
+
+class ObjectDetectionError(Exception):
+    """Base exception for object detection errors."""
+    pass
+
+class NoSuitableRegionsError(ObjectDetectionError):
+    """Raised when no suitable regions are found for artwork placement."""
+    pass
+
+def create_mock_detection_service() -> 'MockObjectDetectionService':
+    """
+    Create a mock object detection service for testing purposes.
+    
+    Returns:
+        MockObjectDetectionService instance
+    """
+    return MockObjectDetectionService()
+
+class MockObjectDetectionService:
+    """Mock implementation of ObjectDetectionService for testing."""
+    
+    def __init__(self):
+        self.config = ObjectDetectionConfig()
+    
+    def detect_objects(self, image: Image.Image) -> List[BoundingBox]:
+        """Mock object detection that returns predictable results."""
+        # Return mock detections based on image size
+        width, height = image.size
+        
+        mock_detections = [
+            BoundingBox(
+                x=width * 0.2,
+                y=height * 0.2,
+                width=width * 0.3,
+                height=height * 0.4,
+                confidence=0.85,
+                label="picture frame"
+            ),
+            BoundingBox(
+                x=width * 0.6,
+                y=height * 0.1,
+                width=width * 0.25,
+                height=height * 0.3,
+                confidence=0.75,
+                label="laptop"
+            )
+        ]
+        
+        return mock_detections
+    
+    def find_suitable_regions(self, image: Image.Image) -> List[BoundingBox]:
+        """Mock implementation of find_suitable_regions."""
+        return self.detect_objects(image)
\ No newline at end of file
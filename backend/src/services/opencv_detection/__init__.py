@@ -6,7 +6,7 @@ replacing the previous DETR (AI-based) implementation with more reliable OpenCV
 """
 
 from .config import OpenCVObjectDetectionConfig
-from .base import BaseDetector, BoundingBox
+from .base import BaseDetector, BoundingBox, BoundingBoxArray, ImageContext
 from .opencv_detection_service import (
     OpenCVObjectDetectionService,
     ObjectDetectionError,
@@ -17,6 +17,8 @@ __all__ = [
     'OpenCVObjectDetectionConfig',
     'BaseDetector',
     'BoundingBox',
+    'BoundingBoxArray',
+    'ImageContext',
     'OpenCVObjectDetectionService',
     'ObjectDetectionError',
     'NoSuitableRegionsError'
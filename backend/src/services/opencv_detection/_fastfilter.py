@@ -0,0 +1,37 @@
+"""
+Region filter kernel used by BaseDetector.filter_regions
+
+The filter evaluates every constraint over the structure-of-arrays boxes with
+NumPy array expressions.
+"""
+
+import numpy as np
+
+
+def filter_mask(xs, ys, widths, heights, confidences, image_height, image_width,
+                min_area_ratio, max_area_ratio, min_aspect, max_aspect, confidence_threshold):
+    """
+    Return a boolean mask of the boxes that satisfy every filter constraint.
+    
+    Every constraint is folded into one boolean mask in place, so there is a
+    single pass per constraint and no chain of intermediate masks.
+    """
+    image_area = image_height * image_width
+    areas = widths * heights
+    aspect_ratios = np.zeros(xs.shape[0])
+    np.divide(widths, heights, out=aspect_ratios, where=heights > 0)
+    
+    keep = confidences >= confidence_threshold
+    keep &= areas >= image_area * min_area_ratio
+    keep &= areas <= image_area * max_area_ratio
+    keep &= aspect_ratios >= min_aspect
+    keep &= aspect_ratios <= max_aspect
+    keep &= xs >= 0
+    keep &= ys >= 0
+    # Reuse the area buffer for the right and bottom edges
+    np.add(xs, widths, out=areas)
+    keep &= areas <= image_width
+    np.add(ys, heights, out=areas)
+    keep &= areas <= image_height
+    return keep
+
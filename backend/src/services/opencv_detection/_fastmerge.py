@@ -0,0 +1,72 @@
+"""
+Region merge kernel used by BaseDetector.merge_overlapping_regions
+
+Decides, for regions visited in confidence order, which merged region each one
+joins. Each region is compared against all merged regions at once with NumPy
+array expressions. Building the arrays costs more than it saves for the
+handful of regions a detector usually produces, so callers compare
+BoundingBoxes directly below VECTORIZED_MERGE_MIN_REGIONS.
+"""
+
+import numpy as np
+
+# Region count from which the array scan is cheaper than comparing
+# BoundingBoxes one pair at a time
+VECTORIZED_MERGE_MIN_REGIONS = 200
+
+
+def merge_groups(x1, y1, widths, heights, order, iou_threshold):
+    """
+    Assign each region, in visiting order, the index of the merged region it joins.
+    
+    A region joins the first merged region it overlaps by more than
+    iou_threshold, growing it to the union of both; otherwise it starts a new
+    merged region numbered after the existing ones.
+    """
+    n = order.shape[0]
+    x2 = x1 + widths
+    y2 = y1 + heights
+    groups = np.empty(n, np.int64)
+    merged_x1 = np.empty(n)
+    merged_y1 = np.empty(n)
+    merged_x2 = np.empty(n)
+    merged_y2 = np.empty(n)
+    merged_widths = np.empty(n)
+    merged_heights = np.empty(n)
+    merged_areas = np.empty(n)
+    count = 0
+    for k, i in enumerate(order.tolist()):
+        rx1, ry1, rx2, ry2 = float(x1[i]), float(y1[i]), float(x2[i]), float(y2[i])
+        area = float(widths[i] * heights[i])
+        
+        if count:
+            # IoU of this region against every merged region at once
+            inter_w = np.maximum(0.0, np.minimum(rx2, merged_x2[:count]) - np.maximum(rx1, merged_x1[:count]))
+            inter_h = np.maximum(0.0, np.minimum(ry2, merged_y2[:count]) - np.maximum(ry1, merged_y1[:count]))
+            intersection = inter_w * inter_h
+            union = area + merged_areas[:count] - intersection
+            iou = np.zeros(count)
+            np.divide(intersection, union, out=iou, where=union > 0)
+            
+            overlapping = np.flatnonzero(iou > iou_threshold)
+            if overlapping.size:
+                # Grow the merged region to the union of both, with the same
+                # arithmetic BaseDetector uses to build the merged BoundingBox
+                group = overlapping[0]
+                x_min = min(rx1, merged_x1[group])
+                y_min = min(ry1, merged_y1[group])
+                x_max = max(rx2, merged_x1[group] + merged_widths[group])
+                y_max = max(ry2, merged_y1[group] + merged_heights[group])
+                merged_x1[group], merged_y1[group], merged_x2[group], merged_y2[group] = x_min, y_min, x_max, y_max
+                merged_widths[group], merged_heights[group] = x_max - x_min, y_max - y_min
+                merged_areas[group] = merged_widths[group] * merged_heights[group]
+                groups[k] = group
+                continue
+        
+        merged_x1[count], merged_y1[count], merged_x2[count], merged_y2[count] = rx1, ry1, rx2, ry2
+        merged_widths[count], merged_heights[count] = widths[i], heights[i]
+        merged_areas[count] = (rx2 - rx1) * (ry2 - ry1)
+        groups[k] = count
+        count += 1
+    return groups
+
@@ -0,0 +1,49 @@
+"""
+Rectangle kernels used by ContourBasedDetector
+
+Scores how close a quadrilateral is to a rectangle and drops duplicate
+rectangles by bounding box IoU. Both are evaluated with NumPy array
+expressions.
+"""
+
+import numpy as np
+
+
+def rectangle_score(pts):
+    """Score a (4, 2) array of corners by its corner angles and opposite side lengths."""
+    v1 = pts - np.roll(pts, 1, axis=0)
+    v2 = np.roll(pts, -1, axis=0) - pts
+    norms = np.linalg.norm(v1, axis=1) * np.linalg.norm(v2, axis=1)
+    cosine = np.einsum('ij,ij->i', v1, v2) / (norms + 1e-10)
+    angles = np.degrees(np.arccos(np.clip(cosine, -1, 1)))
+    avg_angle_score = float(np.mean(1.0 - np.abs(90 - angles) / 90))
+    
+    sides = np.linalg.norm(v2, axis=1)
+    length_ratio1 = min(sides[0], sides[2]) / (max(sides[0], sides[2]) + 1e-10)
+    length_ratio2 = min(sides[1], sides[3]) / (max(sides[1], sides[3]) + 1e-10)
+    length_score = (length_ratio1 + length_ratio2) / 2
+    
+    return avg_angle_score * 0.7 + length_score * 0.3
+
+
+def unique_boxes(xs, ys, widths, heights, order, iou_threshold):
+    """Return the indices, in visiting order, of boxes not overlapping an earlier kept box."""
+    x2 = xs + widths
+    y2 = ys + heights
+    areas = widths * heights
+    keep = []
+    for i in order.tolist():
+        if keep:
+            # IoU of this box against every kept box at once
+            kept = np.array(keep)
+            inter_w = np.maximum(0.0, np.minimum(x2[i], x2[kept]) - np.maximum(xs[i], xs[kept]))
+            inter_h = np.maximum(0.0, np.minimum(y2[i], y2[kept]) - np.maximum(ys[i], ys[kept]))
+            intersection = inter_w * inter_h
+            union = areas[i] + areas[kept] - intersection
+            iou = np.zeros(len(keep))
+            np.divide(intersection, union, out=iou, where=union > 0)
+            if np.any(iou > iou_threshold):
+                continue
+        keep.append(i)
+    return np.array(keep, dtype=np.int64)
+
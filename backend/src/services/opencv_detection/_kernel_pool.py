@@ -0,0 +1,79 @@
+"""
+Shared worker pool for OpenCV kernels used by the detectors
+
+OpenCV releases the GIL inside its C++ kernels, so calls such as matchTemplate
+run in parallel on plain threads. Detectors hand those calls to this pool and
+keep the Python code that consumes the results on the calling thread. On a
+single core the kernels run inline, since worker threads would only add
+hand-off overhead.
+
+The pool is sized to one detector's share of the cores (see
+set_max_workers), since several detectors can be matching at once and each
+kernel may fan out further on OpenCV's own threads.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+import cv2
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+# Worker cap; None until the detection service's thread policy sets it
+_max_workers: Optional[int] = None
+
+
+def _worker_count() -> int:
+    """Number of kernels run at once: the cap, or every CPU if none is set."""
+    return _max_workers or cv2.getNumberOfCPUs()
+
+
+def set_max_workers(workers: int) -> None:
+    """
+    Cap the number of kernels that run at once.
+    
+    The next kernels go to a new pool. The previous pool is dropped rather
+    than shut down, since another thread may have just taken it to map its
+    kernels; its workers exit once it is garbage collected and its queued
+    kernels have run.
+    
+    Args:
+        workers: Maximum number of worker threads, at least 1
+    """
+    global _pool, _max_workers
+    with _pool_lock:
+        _max_workers = max(1, workers)
+        _pool = None
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    """Create the process-wide kernel pool on first use."""
+    global _pool
+    pool = _pool
+    if pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(
+                    max_workers=_worker_count(),
+                    thread_name_prefix="opencv-kernel"
+                )
+            pool = _pool
+    return pool
+
+
+def map_kernels(func: Callable[..., Any], args_list: Sequence[Tuple]) -> List[Any]:
+    """
+    Run func(*args) for every argument tuple and return the results in order.
+
+    Args:
+        func: Kernel to run, should spend its time in GIL-releasing OpenCV calls
+        args_list: One argument tuple per kernel call
+
+    Returns:
+        Results in the same order as args_list
+    """
+    if len(args_list) < 2 or _worker_count() < 2:
+        return [func(*args) for args in args_list]
+    return list(_get_pool().map(lambda args: func(*args), args_list))
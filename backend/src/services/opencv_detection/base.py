@@ -4,16 +4,29 @@ Base classes and interfaces for OpenCV object detection
 
 from abc import ABC, abstractmethod
 from typing import List, Dict, Any, Tuple, Optional
+import cv2
 import numpy as np
 from dataclasses import dataclass
 import logging
+import threading
+
+from ._fastfilter import filter_mask
+from ._fastmerge import VECTORIZED_MERGE_MIN_REGIONS, merge_groups
 
 logger = logging.getLogger(__name__)
 
 
 @dataclass
 class BoundingBox:
-    """Represents a detected object's bounding box with metadata."""
+    """
+    Represents a detected object's bounding box with metadata.
+    
+    Slotted, since detectors create one per contour proposal and the filter
+    and merge passes read these attributes in their per-region loops. The
+    slots are declared by hand because dataclass(slots=True) needs Python 3.10.
+    """
+    
+    __slots__ = ('x', 'y', 'width', 'height', 'confidence', 'label')
     
     x: float
     y: float
@@ -80,6 +93,181 @@ class BoundingBox:
         return intersection_area / union_area if union_area > 0 else 0
 
 
+@dataclass
+class BoundingBoxArray:
+    """
+    Structure-of-arrays view of a list of bounding boxes.
+    
+    Lets geometry for a whole batch of regions (areas, corners, pairwise IoU)
+    be computed with single NumPy expressions instead of per-box method calls.
+    """
+    
+    xs: np.ndarray
+    ys: np.ndarray
+    widths: np.ndarray
+    heights: np.ndarray
+    confidences: np.ndarray
+    labels: List[str]
+    
+    @classmethod
+    def from_list(cls, boxes: List[BoundingBox]) -> 'BoundingBoxArray':
+        """Build the arrays from a list of bounding boxes."""
+        values = np.array(
+            [(box.x, box.y, box.width, box.height, box.confidence) for box in boxes],
+            dtype=np.float64
+        ).reshape(len(boxes), 5)
+        return cls(
+            xs=values[:, 0],
+            ys=values[:, 1],
+            widths=values[:, 2],
+            heights=values[:, 3],
+            confidences=values[:, 4],
+            labels=[box.label for box in boxes]
+        )
+    
+    def __len__(self) -> int:
+        return len(self.labels)
+    
+    def to_list(self) -> List[BoundingBox]:
+        """Convert back to a list of bounding boxes."""
+        return [
+            BoundingBox(x=x, y=y, width=w, height=h, confidence=c, label=label)
+            for x, y, w, h, c, label in zip(
+                self.xs.tolist(), self.ys.tolist(), self.widths.tolist(),
+                self.heights.tolist(), self.confidences.tolist(), self.labels
+            )
+        ]
+    
+    def corners(self) -> np.ndarray:
+        """Corners of every box, shape (N, 4, 2), in the same order as BoundingBox.get_corners."""
+        x2 = self.xs + self.widths
+        y2 = self.ys + self.heights
+        return np.stack(
+            [self.xs, self.ys, x2, self.ys, x2, y2, self.xs, y2], axis=-1
+        ).reshape(len(self), 4, 2)
+    
+    def pixel_corners(self) -> np.ndarray:
+        """
+        Corners of every box rounded to the nearest pixel, shape (N, 4, 2), int32.
+        
+        This is the point layout cv2.polylines and cv2.fillPoly expect, so all
+        regions can be drawn in one call.
+        """
+        corners = self.corners()
+        np.rint(corners, out=corners)
+        return corners.astype(np.int32)
+    
+    def centers(self) -> np.ndarray:
+        """Center of every box, shape (N, 2)."""
+        return np.stack([self.xs + self.widths / 2, self.ys + self.heights / 2], axis=-1)
+    
+    def areas(self) -> np.ndarray:
+        """Area of every box."""
+        return self.widths * self.heights
+    
+    def aspect_ratios(self) -> np.ndarray:
+        """Width/height of every box, 0 where the height is not positive."""
+        ratios = np.zeros(len(self))
+        np.divide(self.widths, self.heights, out=ratios, where=self.heights > 0)
+        return ratios
+    
+    def pairwise_iou(self, other: Optional['BoundingBoxArray'] = None) -> np.ndarray:
+        """
+        IoU of every box in this array against every box in another.
+        
+        Args:
+            other: Boxes to compare against; defaults to this array
+            
+        Returns:
+            Matrix of shape (len(self), len(other))
+        """
+        if other is None:
+            other = self
+        
+        inter_w = np.maximum(0.0, np.minimum((self.xs + self.widths)[:, None], (other.xs + other.widths)[None, :])
+                             - np.maximum(self.xs[:, None], other.xs[None, :]))
+        inter_h = np.maximum(0.0, np.minimum((self.ys + self.heights)[:, None], (other.ys + other.heights)[None, :])
+                             - np.maximum(self.ys[:, None], other.ys[None, :]))
+        intersection = inter_w * inter_h
+        union = self.areas()[:, None] + other.areas()[None, :] - intersection
+        
+        iou = np.zeros_like(intersection)
+        np.divide(intersection, union, out=iou, where=union > 0)
+        return iou
+
+
+class ImageContext:
+    """
+    Color space conversions of one BGR image, shared by all detectors in a pass.
+    
+    Each conversion is computed the first time a detector asks for it and
+    reused afterwards, so the image is converted to grayscale, LAB or HSV at
+    most once per detection pass. Safe to share between detector threads.
+    
+    When a scratch pool is given, conversions and buffer() arrays are taken
+    from it and handed back by release() at the end of the pass.
+    """
+    
+    def __init__(self, bgr: np.ndarray, pool: Optional[Any] = None):
+        self.bgr = bgr
+        self._pool = pool
+        self._buffers: List[np.ndarray] = []
+        self._converted: Dict[int, np.ndarray] = {}
+        # Reentrant, since a conversion takes its output buffer under the lock
+        self._lock = threading.RLock()
+    
+    def buffer(self, shape: Tuple[int, ...], dtype: Any = np.uint8) -> np.ndarray:
+        """
+        Uninitialized array that lives until release().
+        
+        Args:
+            shape: Array shape
+            dtype: Array dtype
+            
+        Returns:
+            Array from the scratch pool, or a new one if there is no pool
+        """
+        if self._pool is None:
+            return np.empty(shape, dtype)
+        buffer = self._pool.get(shape, dtype)
+        with self._lock:
+            self._buffers.append(buffer)
+        return buffer
+    
+    def release(self) -> None:
+        """Hand every buffer taken during the pass back to the scratch pool."""
+        with self._lock:
+            buffers, self._buffers = self._buffers, []
+            self._converted.clear()
+        if self._pool is not None:
+            self._pool.release(buffers)
+    
+    def _convert(self, code: int, channels: int) -> np.ndarray:
+        with self._lock:
+            if code not in self._converted:
+                shape = self.bgr.shape[:2] if channels == 1 else self.bgr.shape[:2] + (channels,)
+                dst = self.buffer(shape) if self._pool is not None else None
+                self._converted[code] = cv2.cvtColor(self.bgr, code, dst=dst)
+            return self._converted[code]
+    
+    @property
+    def gray(self) -> np.ndarray:
+        """Grayscale image; the image itself if it is already single channel."""
+        if self.bgr.ndim == 2:
+            return self.bgr
+        return self._convert(cv2.COLOR_BGR2GRAY, 1)
+    
+    @property
+    def lab(self) -> np.ndarray:
+        """LAB image."""
+        return self._convert(cv2.COLOR_BGR2LAB, 3)
+    
+    @property
+    def hsv(self) -> np.ndarray:
+        """HSV image."""
+        return self._convert(cv2.COLOR_BGR2HSV, 3)
+
+
 class BaseDetector(ABC):
     """Abstract base class for all detection algorithms."""
     
@@ -94,12 +282,13 @@ class BaseDetector(ABC):
         self.name = self.__class__.__name__
         
     @abstractmethod
-    def detect(self, image: np.ndarray) -> List[BoundingBox]:
+    def detect(self, image: np.ndarray, context: Optional[ImageContext] = None) -> List[BoundingBox]:
         """
         Detect suitable regions in the image.
         
         Args:
             image: OpenCV image (numpy array) in BGR format
+            context: Shared conversions of image; created on demand if not given
             
         Returns:
             List of BoundingBox objects representing detected regions
@@ -131,48 +320,44 @@ class BaseDetector(ABC):
         Returns:
             Filtered list of regions
         """
+        if not regions:
+            return []
+        
         height, width = image_shape[:2]
-        image_area = height * width
+        min_aspect, max_aspect = self.config.aspect_ratio_range
         
-        filtered = []
-        for region in regions:
-            # Check if region is within image bounds
-            if (region.x < 0 or region.y < 0 or 
-                region.x + region.width > width or 
-                region.y + region.height > height):
-                logger.debug(f"Skipping out-of-bounds region: {region.label}")
-                continue
-            
-            # Check minimum area
-            region_area = region.get_area()
-            if region_area < image_area * self.config.min_area_ratio:
-                logger.debug(f"Skipping too small region: {region.label} "
-                           f"(area: {region_area/image_area:.2%} of image)")
-                continue
-            
-            # Check maximum area
-            if region_area > image_area * self.config.max_area_ratio:
-                logger.debug(f"Skipping too large region: {region.label} "
-                           f"(area: {region_area/image_area:.2%} of image)")
-                continue
-            
-            # Check aspect ratio
-            aspect_ratio = region.get_aspect_ratio()
-            if (aspect_ratio < self.config.aspect_ratio_range[0] or 
-                aspect_ratio > self.config.aspect_ratio_range[1]):
-                logger.debug(f"Skipping region with bad aspect ratio: {region.label} "
-                           f"(ratio: {aspect_ratio:.2f})")
-                continue
-            
-            # Check confidence threshold
-            if region.confidence < self.config.confidence_threshold:
-                logger.debug(f"Skipping low confidence region: {region.label} "
-                           f"(confidence: {region.confidence:.2f})")
-                continue
-            
-            filtered.append(region)
+        boxes = BoundingBoxArray.from_list(regions)
+        keep = filter_mask(
+            boxes.xs, boxes.ys, boxes.widths, boxes.heights, boxes.confidences,
+            height, width, self.config.min_area_ratio, self.config.max_area_ratio,
+            min_aspect, max_aspect, self.config.confidence_threshold
+        )
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            self._log_rejected_regions(regions, boxes, keep, height, width)
         
-        return filtered
+        return [regions[i] for i in np.flatnonzero(keep)]
+    
+    def _log_rejected_regions(self, regions: List[BoundingBox], boxes: 'BoundingBoxArray',
+                              keep: np.ndarray, height: int, width: int) -> None:
+        """Log why each rejected region failed the filter."""
+        image_area = height * width
+        areas = boxes.areas()
+        aspect_ratios = boxes.aspect_ratios()
+        min_aspect, max_aspect = self.config.aspect_ratio_range
+        checks = (
+            ("out-of-bounds region", (boxes.xs >= 0) & (boxes.ys >= 0) &
+             (boxes.xs + boxes.widths <= width) & (boxes.ys + boxes.heights <= height)),
+            ("too small region", areas >= image_area * self.config.min_area_ratio),
+            ("too large region", areas <= image_area * self.config.max_area_ratio),
+            ("region with bad aspect ratio", (aspect_ratios >= min_aspect) & (aspect_ratios <= max_aspect)),
+            ("low confidence region", boxes.confidences >= self.config.confidence_threshold),
+        )
+        for i in np.flatnonzero(~keep):
+            reason = next(reason for reason, passed in checks if not passed[i])
+            logger.debug(f"Skipping {reason}: {regions[i].label} "
+                       f"(area: {areas[i]/image_area:.2%} of image, ratio: {aspect_ratios[i]:.2f}, "
+                       f"confidence: {regions[i].confidence:.2f})")
     
     def merge_overlapping_regions(self, regions: List[BoundingBox], 
                                  iou_threshold: float = 0.5) -> List[BoundingBox]:
@@ -189,37 +374,51 @@ class BaseDetector(ABC):
         if not regions:
             return []
         
-        # Sort by confidence (highest first)
-        sorted_regions = sorted(regions, key=lambda r: r.confidence, reverse=True)
-        merged = []
+        if len(regions) < VECTORIZED_MERGE_MIN_REGIONS:
+            # Sort by confidence (highest first), keeping input order for ties;
+            # each region's merged region is found by the scan below
+            order = sorted(range(len(regions)), key=lambda i: regions[i].confidence, reverse=True)
+            groups = None
+        else:
+            boxes = BoundingBoxArray.from_list(regions)
+            visit_order = np.argsort(-boxes.confidences, kind='stable')
+            # Index of the merged region each region joins, in visiting order
+            groups = merge_groups(boxes.xs, boxes.ys, boxes.widths, boxes.heights,
+                                  visit_order, iou_threshold).tolist()
+            order = visit_order.tolist()
         
-        for region in sorted_regions:
-            # Check if this region overlaps significantly with any merged region
-            should_merge = False
-            for i, merged_region in enumerate(merged):
-                if region.intersection_over_union(merged_region) > iou_threshold:
-                    # Merge by taking the union of the two regions
-                    x_min = min(region.x, merged_region.x)
-                    y_min = min(region.y, merged_region.y)
-                    x_max = max(region.x + region.width, 
-                               merged_region.x + merged_region.width)
-                    y_max = max(region.y + region.height, 
-                               merged_region.y + merged_region.height)
-                    
-                    # Create merged region with higher confidence
-                    merged[i] = BoundingBox(
-                        x=x_min,
-                        y=y_min,
-                        width=x_max - x_min,
-                        height=y_max - y_min,
-                        confidence=max(region.confidence, merged_region.confidence),
-                        label=f"{merged_region.label}+{region.label}"
-                    )
-                    should_merge = True
-                    break
+        merged = []
+        for k, i in enumerate(order):
+            region = regions[i]
+            if groups is not None:
+                j = groups[k]
+            else:
+                # First merged region this one overlaps, or a new one
+                j = next((m for m, merged_region in enumerate(merged)
+                          if region.intersection_over_union(merged_region) > iou_threshold), len(merged))
             
-            if not should_merge:
+            if j == len(merged):
                 merged.append(region)
+                continue
+            
+            # Merge by taking the union of the two
+            merged_region = merged[j]
+            x_min = min(region.x, merged_region.x)
+            y_min = min(region.y, merged_region.y)
+            x_max = max(region.x + region.width, 
+                       merged_region.x + merged_region.width)
+            y_max = max(region.y + region.height, 
+                       merged_region.y + merged_region.height)
+            
+            # Create merged region with higher confidence
+            merged[j] = BoundingBox(
+                x=x_min,
+                y=y_min,
+                width=x_max - x_min,
+                height=y_max - y_min,
+                confidence=max(region.confidence, merged_region.confidence),
+                label=f"{merged_region.label}+{region.label}"
+            )
         
         return merged
 
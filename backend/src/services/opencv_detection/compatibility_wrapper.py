@@ -6,11 +6,12 @@ ObjectDetectionService while allowing configuration-based switching to OpenCV.
 """
 
 import logging
+import threading
 from typing import List, Optional, Dict, Any
 from PIL import Image
 
-# Import original DETR-based service classes
-from ..object_detection import (
+# Import original DETR-based service types (the DETR service itself is imported on demand)
+from ..object_detection_types import (
     ObjectDetectionConfig as DETRConfig,
     BoundingBox as DETRBoundingBox,
     ObjectDetectionError as DETRObjectDetectionError,
@@ -28,6 +29,21 @@ from .base import BoundingBox as OpenCVBoundingBox
 
 logger = logging.getLogger(__name__)
 
+# OpenCV services shared by every wrapper the factory creates, keyed by config,
+# so detectors, template pyramids and scratch buffers are built once per process
+_shared_opencv_services: Dict[str, OpenCVObjectDetectionService] = {}
+_shared_opencv_services_lock = threading.Lock()
+
+
+def _get_shared_opencv_service(config: OpenCVObjectDetectionConfig) -> OpenCVObjectDetectionService:
+    """Return the process-wide OpenCV service for this configuration, creating it on first use."""
+    key = repr(config)
+    with _shared_opencv_services_lock:
+        service = _shared_opencv_services.get(key)
+        if service is None:
+            service = _shared_opencv_services[key] = OpenCVObjectDetectionService(config)
+        return service
+
 
 class ObjectDetectionCompatibilityWrapper:
     """
@@ -35,13 +51,16 @@ class ObjectDetectionCompatibilityWrapper:
     but can use either DETR or OpenCV backend based on configuration.
     """
     
-    def __init__(self, config: Optional[DETRConfig] = None, use_opencv: bool = False):
+    def __init__(self, config: Optional[DETRConfig] = None, use_opencv: bool = False,
+                 share_service: bool = False):
         """
         Initialize the compatibility wrapper.
         
         Args:
             config: ObjectDetectionConfig instance (DETR format)
             use_opencv: If True, use OpenCV backend; otherwise use DETR
+            share_service: If True, use the process-wide OpenCV service for this
+                configuration instead of building a new one
         """
         self.use_opencv = use_opencv
         self.detr_config = config or DETRConfig()
@@ -49,7 +68,10 @@ class ObjectDetectionCompatibilityWrapper:
         if use_opencv:
             # Convert DETR config to OpenCV config
             self.opencv_config = self._convert_config(self.detr_config)
-            self._service = OpenCVObjectDetectionService(self.opencv_config)
+            if share_service:
+                self._service = _get_shared_opencv_service(self.opencv_config)
+            else:
+                self._service = OpenCVObjectDetectionService(self.opencv_config)
             logger.info("Using OpenCV-based object detection service")
         else:
             # Import and use original DETR service
@@ -177,6 +199,9 @@ def create_object_detection_service(
     """
     Factory function to create an object detection service.
     
+    OpenCV-backed wrappers share one service per configuration, so repeated
+    calls (one per activity run) reuse its detectors and buffers.
+    
     Args:
         config: ObjectDetectionConfig instance
         use_opencv: If True, use OpenCV; if False, use DETR; if None, check feature flag
@@ -190,4 +215,4 @@ def create_object_detection_service(
         from ..feature_flags import should_use_opencv_detection
         use_opencv = should_use_opencv_detection(job_id)
         
-    return ObjectDetectionCompatibilityWrapper(config, use_opencv)
\ No newline at end of file
+    return ObjectDetectionCompatibilityWrapper(config, use_opencv, share_service=True)
\ No newline at end of file
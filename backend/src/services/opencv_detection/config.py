@@ -43,6 +43,7 @@ class OpenCVObjectDetectionConfig:
     max_image_dimension: int = 4096  # Maximum image dimension to process
     parallel_processing: bool = True  # Alias for enable_parallel_detection
     detector_timeout: float = 5.0  # Timeout for individual detectors
+    detection_downscale: int = 1  # Edge/contour detectors work on an image shrunk by this factor (1 = full size)
     
     # Scoring weights for region ranking
     size_weight: float = 0.3  # Weight for region size in scoring
@@ -52,6 +53,8 @@ class OpenCVObjectDetectionConfig:
     # Additional parameters for service
     enabled_detectors: List[str] = field(default_factory=lambda: ['edge', 'contour', 'color', 'template', 'fallback'])
     merge_iou_threshold: float = 0.3  # IoU threshold for merging overlapping regions
+    merge_method: str = 'iou'  # 'iou' (confidence-weighted merge) or 'group_rectangles' (OpenCV grouping)
+    merge_group_eps: float = 0.2  # Relative corner tolerance for the 'group_rectangles' merge
     min_region_area_ratio: float = 0.01  # Minimum region area as ratio of image area
     scoring_weights: dict = field(default_factory=lambda: {
         'confidence': 0.3,
@@ -87,6 +90,15 @@ class OpenCVObjectDetectionConfig:
             if abs(weights_sum - 1.0) > 0.001:
                 raise ValueError(f"Scoring weights must sum to 1.0, got {weights_sum}")
         
+        if self.detection_downscale < 1:
+            raise ValueError("Detection downscale must be at least 1")
+        
+        if self.merge_method not in ('iou', 'group_rectangles'):
+            raise ValueError(f"Invalid merge method: {self.merge_method}. Must be 'iou' or 'group_rectangles'")
+        
+        if self.merge_group_eps <= 0:
+            raise ValueError("Merge group eps must be positive")
+        
         # Validate enabled detectors
         valid_detectors = {'edge', 'contour', 'color', 'template', 'fallback'}
         for detector in self.enabled_detectors:
@@ -114,7 +126,8 @@ class OpenCVObjectDetectionConfig:
             confidence_threshold=0.4,
             template_scales=[0.75, 1.0, 1.25],
             enable_parallel_detection=False,
-            detection_timeout=2.0
+            detection_timeout=2.0,
+            detection_downscale=2
         )
     
     @classmethod
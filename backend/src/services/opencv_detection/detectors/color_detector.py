@@ -7,8 +7,9 @@ import numpy as np
 from typing import List, Tuple, Optional
 import logging
 
-from ..base import BaseDetector, BoundingBox
+from ..base import BaseDetector, BoundingBox, ImageContext
 from ..config import OpenCVObjectDetectionConfig
+from ..utils import local_mean_and_variance
 
 logger = logging.getLogger(__name__)
 
@@ -21,12 +22,13 @@ class ColorBasedDetector(BaseDetector):
     surfaces, screens, or other placement areas in mockup templates.
     """
     
-    def detect(self, image: np.ndarray) -> List[BoundingBox]:
+    def detect(self, image: np.ndarray, context: Optional[ImageContext] = None) -> List[BoundingBox]:
         """
         Detect uniform color regions suitable for artwork placement.
         
         Args:
             image: OpenCV image (BGR format)
+            context: Shared conversions of image; created on demand if not given
             
         Returns:
             List of detected BoundingBox regions
@@ -35,8 +37,9 @@ class ColorBasedDetector(BaseDetector):
             logger.debug(f"{self.name}: Starting color-based detection")
             
             # Convert to different color spaces for analysis
-            lab = cv2.cvtColor(image, cv2.COLOR_BGR2LAB)
-            hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+            context = context or ImageContext(image)
+            lab = context.lab
+            hsv = context.hsv
             
             # Find uniform color regions
             color_masks = self._find_uniform_color_regions(image, lab, hsv)
@@ -109,16 +112,8 @@ class ColorBasedDetector(BaseDetector):
         # Calculate local color variance
         kernel_size = 15
         
-        # Calculate mean and variance for each channel
-        l_channel = lab[:, :, 0].astype(np.float32)
-        
-        # Local mean
-        kernel = np.ones((kernel_size, kernel_size), np.float32) / (kernel_size * kernel_size)
-        local_mean = cv2.filter2D(l_channel, -1, kernel)
-        
-        # Local variance
-        local_mean_sq = cv2.filter2D(l_channel ** 2, -1, kernel)
-        local_variance = local_mean_sq - local_mean ** 2
+        # Local variance of the lightness channel
+        _, local_variance = local_mean_and_variance(lab[:, :, 0], kernel_size)
         
         # Threshold variance to find uniform regions
         variance_threshold = self.config.color_threshold
@@ -209,18 +204,14 @@ class ColorBasedDetector(BaseDetector):
         
         # Calculate hue variance in local windows
         kernel_size = 11
-        kernel = np.ones((kernel_size, kernel_size), np.float32) / (kernel_size * kernel_size)
         
         # Convert hue to continuous representation for variance calculation
         hue_sin = np.sin(h * np.pi / 90).astype(np.float32)
         hue_cos = np.cos(h * np.pi / 90).astype(np.float32)
         
         # Local variance of hue
-        local_sin_mean = cv2.filter2D(hue_sin, -1, kernel)
-        local_cos_mean = cv2.filter2D(hue_cos, -1, kernel)
-        
-        local_sin_var = cv2.filter2D(hue_sin ** 2, -1, kernel) - local_sin_mean ** 2
-        local_cos_var = cv2.filter2D(hue_cos ** 2, -1, kernel) - local_cos_mean ** 2
+        _, local_sin_var = local_mean_and_variance(hue_sin, kernel_size)
+        _, local_cos_var = local_mean_and_variance(hue_cos, kernel_size)
         
         hue_variance = local_sin_var + local_cos_var
         
@@ -7,8 +7,10 @@ import numpy as np
 from typing import List, Tuple, Optional
 import logging
 
-from ..base import BaseDetector, BoundingBox
+from .._fastrect import rectangle_score, unique_boxes
+from ..base import BaseDetector, BoundingBox, ImageContext
 from ..config import OpenCVObjectDetectionConfig
+from ..utils import downscale_image, upscale_box
 
 logger = logging.getLogger(__name__)
 
@@ -21,12 +23,13 @@ class ContourBasedDetector(BaseDetector):
     rectangular shapes that could be suitable for artwork placement.
     """
     
-    def detect(self, image: np.ndarray) -> List[BoundingBox]:
+    def detect(self, image: np.ndarray, context: Optional[ImageContext] = None) -> List[BoundingBox]:
         """
         Detect rectangular regions using contour analysis.
         
         Args:
             image: OpenCV image (BGR format)
+            context: Shared conversions of image; created on demand if not given
             
         Returns:
             List of detected BoundingBox regions
@@ -34,8 +37,8 @@ class ContourBasedDetector(BaseDetector):
         try:
             logger.debug(f"{self.name}: Starting contour-based detection")
             
-            # Convert to grayscale
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if len(image.shape) == 3 else image
+            # Convert to grayscale, shrunk if configured
+            gray, scale = downscale_image((context or ImageContext(image)).gray, self.config.detection_downscale)
             
             # Apply multiple thresholding techniques
             binary_images = self._create_binary_images(gray)
@@ -43,12 +46,12 @@ class ContourBasedDetector(BaseDetector):
             # Find rectangles in each binary image
             all_rectangles = []
             for binary in binary_images:
-                rectangles = self._find_rectangles(binary)
+                rectangles = self._find_rectangles(binary, scale)
                 all_rectangles.extend(rectangles)
             
-            # Remove duplicates and convert to bounding boxes
+            # Remove duplicates and convert to full-size bounding boxes
             unique_rectangles = self._remove_duplicate_rectangles(all_rectangles)
-            bounding_boxes = self._rectangles_to_bounding_boxes(unique_rectangles, image.shape)
+            bounding_boxes = self._rectangles_to_bounding_boxes(unique_rectangles, image.shape, scale)
             
             # Filter regions
             filtered_boxes = self.filter_regions(bounding_boxes, image.shape)
@@ -108,12 +111,13 @@ class ContourBasedDetector(BaseDetector):
         
         return binary_images
     
-    def _find_rectangles(self, binary: np.ndarray) -> List[Tuple[np.ndarray, float]]:
+    def _find_rectangles(self, binary: np.ndarray, scale: float = 1.0) -> List[Tuple[np.ndarray, float]]:
         """
         Find rectangular contours in a binary image.
         
         Args:
             binary: Binary image
+            scale: Size of the binary image relative to the original image
             
         Returns:
             List of (contour, confidence) tuples
@@ -127,10 +131,13 @@ class ContourBasedDetector(BaseDetector):
             cv2.CHAIN_APPROX_SIMPLE
         )
         
+        # Minimum area in binary image pixels
+        min_area = self.config.min_contour_area * scale * scale
+        
         for i, contour in enumerate(contours):
             # Skip if area is too small
             area = cv2.contourArea(contour)
-            if area < self.config.min_contour_area:
+            if area < min_area:
                 continue
             
             # Approximate contour to polygon
@@ -168,45 +175,8 @@ class ContourBasedDetector(BaseDetector):
         if len(approx) != 4:
             return 0.0
         
-        # Get the four corners
-        pts = approx.reshape(4, 2)
-        
-        # Calculate angles at each corner
-        angles = []
-        for i in range(4):
-            p1 = pts[i]
-            p2 = pts[(i + 1) % 4]
-            p3 = pts[(i - 1) % 4]
-            
-            v1 = p1 - p3
-            v2 = p2 - p1
-            
-            # Calculate angle using dot product
-            cosine = np.dot(v1, v2) / (np.linalg.norm(v1) * np.linalg.norm(v2) + 1e-10)
-            angle = np.arccos(np.clip(cosine, -1, 1))
-            angles.append(np.degrees(angle))
-        
-        # Perfect rectangle has 90-degree angles
-        angle_scores = [1.0 - abs(90 - angle) / 90 for angle in angles]
-        avg_angle_score = np.mean(angle_scores)
-        
-        # Check if opposite sides are parallel and equal
-        side_lengths = []
-        for i in range(4):
-            p1 = pts[i]
-            p2 = pts[(i + 1) % 4]
-            length = np.linalg.norm(p2 - p1)
-            side_lengths.append(length)
-        
-        # Check if opposite sides are similar in length
-        length_ratio1 = min(side_lengths[0], side_lengths[2]) / (max(side_lengths[0], side_lengths[2]) + 1e-10)
-        length_ratio2 = min(side_lengths[1], side_lengths[3]) / (max(side_lengths[1], side_lengths[3]) + 1e-10)
-        length_score = (length_ratio1 + length_ratio2) / 2
-        
-        # Combine scores
-        total_score = avg_angle_score * 0.7 + length_score * 0.3
-        
-        return total_score
+        # Angle and opposite-side checks over all four corners at once
+        return float(rectangle_score(approx.reshape(4, 2).astype(np.float64)))
     
     def _remove_duplicate_rectangles(self, rectangles: List[Tuple[np.ndarray, float]]) -> List[Tuple[np.ndarray, float]]:
         """
@@ -221,52 +191,26 @@ class ContourBasedDetector(BaseDetector):
         if not rectangles:
             return []
         
-        # Convert to bounding boxes for comparison
-        rect_data = []
-        for contour, conf in rectangles:
-            x, y, w, h = cv2.boundingRect(contour)
-            rect_data.append((x, y, w, h, contour, conf))
-        
-        # Sort by confidence (highest first)
-        rect_data.sort(key=lambda r: r[5], reverse=True)
+        # Bounding boxes of all rectangles as one (N, 4) array for the kernel
+        boxes = np.array([cv2.boundingRect(contour) for contour, _ in rectangles], dtype=np.float64)
+        confidences = np.array([conf for _, conf in rectangles])
         
-        # Remove duplicates
-        unique = []
-        for i, (x1, y1, w1, h1, cont1, conf1) in enumerate(rect_data):
-            is_duplicate = False
-            
-            for x2, y2, w2, h2, cont2, conf2 in unique:
-                # Check IoU
-                x_left = max(x1, x2)
-                y_top = max(y1, y2)
-                x_right = min(x1 + w1, x2 + w2)
-                y_bottom = min(y1 + h1, y2 + h2)
-                
-                if x_right > x_left and y_bottom > y_top:
-                    intersection = (x_right - x_left) * (y_bottom - y_top)
-                    area1 = w1 * h1
-                    area2 = w2 * h2
-                    union = area1 + area2 - intersection
-                    iou = intersection / union if union > 0 else 0
-                    
-                    if iou > 0.5:  # Duplicate threshold
-                        is_duplicate = True
-                        break
-            
-            if not is_duplicate:
-                unique.append((x1, y1, w1, h1, cont1, conf1))
+        # Visit highest confidence first, keeping input order for ties
+        order = np.argsort(-confidences, kind='stable')
+        keep = unique_boxes(boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3], order, 0.5)
         
-        # Return contours and confidences
-        return [(cont, conf) for _, _, _, _, cont, conf in unique]
+        return [rectangles[i] for i in keep.tolist()]
     
     def _rectangles_to_bounding_boxes(self, rectangles: List[Tuple[np.ndarray, float]], 
-                                     image_shape: Tuple[int, ...]) -> List[BoundingBox]:
+                                     image_shape: Tuple[int, ...],
+                                     scale: float = 1.0) -> List[BoundingBox]:
         """
         Convert rectangles to BoundingBox objects.
         
         Args:
             rectangles: List of (contour, confidence) tuples
             image_shape: Shape of the original image
+            scale: Size of the image the rectangles were found in relative to the original
             
         Returns:
             List of BoundingBox objects
@@ -275,6 +219,8 @@ class ContourBasedDetector(BaseDetector):
         
         for contour, base_confidence in rectangles:
             x, y, w, h = cv2.boundingRect(contour)
+            if scale != 1.0:
+                x, y, w, h = upscale_box((x, y, w, h), scale, image_shape)
             
             # Adjust confidence based on aspect ratio
             aspect_ratio = w / h if h > 0 else 0
@@ -7,9 +7,9 @@ import numpy as np
 from typing import List, Tuple, Optional
 import logging
 
-from ..base import BaseDetector, BoundingBox
+from ..base import BaseDetector, BoundingBox, ImageContext
 from ..config import OpenCVObjectDetectionConfig
-from ..utils import apply_clahe
+from ..utils import apply_clahe, downscale_image, upscale_box
 
 logger = logging.getLogger(__name__)
 
@@ -23,12 +23,13 @@ class EdgeBasedDetector(BaseDetector):
     artwork placement.
     """
     
-    def detect(self, image: np.ndarray) -> List[BoundingBox]:
+    def detect(self, image: np.ndarray, context: Optional[ImageContext] = None) -> List[BoundingBox]:
         """
         Detect suitable regions using edge detection.
         
         Args:
             image: OpenCV image (BGR format)
+            context: Shared conversions of image; created on demand if not given
             
         Returns:
             List of detected BoundingBox regions
@@ -36,17 +37,19 @@ class EdgeBasedDetector(BaseDetector):
         try:
             logger.debug(f"{self.name}: Starting edge-based detection")
             
-            # Preprocess image
-            preprocessed = self._preprocess_for_edge_detection(image)
+            # Preprocess the shared grayscale conversion, shrunk if configured
+            context = context or ImageContext(image)
+            gray, scale = downscale_image(context.gray, self.config.detection_downscale)
+            preprocessed = self._preprocess_for_edge_detection(gray)
             
             # Apply Canny edge detection
-            edges = self._apply_canny_edge_detection(preprocessed)
+            edges = self._apply_canny_edge_detection(preprocessed, context)
             
             # Find contours from edges
-            contours = self._find_contours_from_edges(edges)
+            contours = self._find_contours_from_edges(edges, scale)
             
-            # Convert contours to bounding boxes
-            bounding_boxes = self._contours_to_bounding_boxes(contours, image.shape)
+            # Convert contours to full-size bounding boxes
+            bounding_boxes = self._contours_to_bounding_boxes(contours, image.shape, scale)
             
             # Filter regions
             filtered_boxes = self.filter_regions(bounding_boxes, image.shape)
@@ -72,7 +75,7 @@ class EdgeBasedDetector(BaseDetector):
         if len(image.shape) == 3:
             gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
         else:
-            gray = image.copy()
+            gray = image
         
         # Apply Gaussian blur to reduce noise
         blurred = cv2.GaussianBlur(gray, self.config.gaussian_blur_kernel, 0)
@@ -82,12 +85,14 @@ class EdgeBasedDetector(BaseDetector):
         
         return enhanced
     
-    def _apply_canny_edge_detection(self, image: np.ndarray) -> np.ndarray:
+    def _apply_canny_edge_detection(self, image: np.ndarray,
+                                    context: Optional[ImageContext] = None) -> np.ndarray:
         """
         Apply Canny edge detection with configured thresholds.
         
         Args:
             image: Preprocessed grayscale image
+            context: Context of the detection pass; its scratch buffers hold the edge maps
             
         Returns:
             Binary edge map
@@ -96,22 +101,25 @@ class EdgeBasedDetector(BaseDetector):
             image,
             threshold1=self.config.canny_low_threshold,
             threshold2=self.config.canny_high_threshold,
+            edges=context.buffer(image.shape) if context is not None else None,
             apertureSize=3,
             L2gradient=True
         )
         
         # Apply morphological operations to connect nearby edges
         kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
-        edges = cv2.morphologyEx(edges, cv2.MORPH_CLOSE, kernel)
+        closed = context.buffer(image.shape) if context is not None else None
+        edges = cv2.morphologyEx(edges, cv2.MORPH_CLOSE, kernel, dst=closed)
         
         return edges
     
-    def _find_contours_from_edges(self, edges: np.ndarray) -> List[np.ndarray]:
+    def _find_contours_from_edges(self, edges: np.ndarray, scale: float = 1.0) -> List[np.ndarray]:
         """
         Find contours from edge map.
         
         Args:
             edges: Binary edge map
+            scale: Size of the edge map relative to the original image
             
         Returns:
             List of contours
@@ -123,8 +131,8 @@ class EdgeBasedDetector(BaseDetector):
             cv2.CHAIN_APPROX_SIMPLE  # Compress horizontal, vertical, diagonal segments
         )
         
-        # Filter contours by area
-        min_area = self.config.min_contour_area
+        # Filter contours by area, measured in edge map pixels
+        min_area = self.config.min_contour_area * scale * scale
         filtered_contours = []
         
         for contour in contours:
@@ -136,13 +144,15 @@ class EdgeBasedDetector(BaseDetector):
         return filtered_contours
     
     def _contours_to_bounding_boxes(self, contours: List[np.ndarray], 
-                                   image_shape: Tuple[int, ...]) -> List[BoundingBox]:
+                                   image_shape: Tuple[int, ...],
+                                   scale: float = 1.0) -> List[BoundingBox]:
         """
         Convert contours to bounding boxes with confidence scores.
         
         Args:
             contours: List of contours
             image_shape: Shape of the original image
+            scale: Size of the image the contours were found in relative to the original
             
         Returns:
             List of BoundingBox objects
@@ -161,6 +171,10 @@ class EdgeBasedDetector(BaseDetector):
             if confidence < self.config.confidence_threshold:
                 continue
             
+            # Back to original image coordinates
+            if scale != 1.0:
+                x, y, w, h = upscale_box((x, y, w, h), scale, image_shape)
+            
             # Check if this could be a frame or border
             is_frame = self._check_if_frame_like(x, y, w, h, width, height)
             
@@ -2,16 +2,40 @@
 Fallback detector for when other detection methods fail
 """
 
+import functools
 import cv2
 import numpy as np
-from typing import List, Tuple
+from typing import List, Tuple, Optional
 import logging
 
-from ..base import BaseDetector, BoundingBox
+from ..base import BaseDetector, BoundingBox, ImageContext
 from ..config import OpenCVObjectDetectionConfig
 
 logger = logging.getLogger(__name__)
 
+# Image sizes whose fallback layout is kept; pipelines mostly reuse a few mockup sizes
+LAYOUT_CACHE_SIZE = 32
+
+
+@functools.lru_cache(maxsize=LAYOUT_CACHE_SIZE)
+def _fallback_layout(width: int, height: int) -> Tuple[Tuple[float, float, float, float, float, str], ...]:
+    """
+    Candidate fallback regions for an image size, duplicates removed.
+    
+    The layout depends only on the image size, so it is computed once per
+    size. Regions are cached as (x, y, width, height, confidence, label)
+    tuples rather than BoundingBox objects, which callers may modify.
+    """
+    regions = [FallbackDetector._get_center_region(width, height)]
+    regions.extend(FallbackDetector._get_golden_ratio_regions(width, height))
+    regions.extend(FallbackDetector._get_rule_of_thirds_regions(width, height))
+    regions.extend(FallbackDetector._get_safe_area_regions(width, height))
+    regions.extend(FallbackDetector._get_aspect_ratio_regions(width, height))
+    return tuple(
+        (r.x, r.y, r.width, r.height, r.confidence, r.label)
+        for r in FallbackDetector._remove_duplicate_regions(regions)
+    )
+
 
 class FallbackDetector(BaseDetector):
     """
@@ -22,12 +46,13 @@ class FallbackDetector(BaseDetector):
     image composition rules.
     """
     
-    def detect(self, image: np.ndarray) -> List[BoundingBox]:
+    def detect(self, image: np.ndarray, context: Optional[ImageContext] = None) -> List[BoundingBox]:
         """
         Detect fallback regions based on image composition rules.
         
         Args:
             image: OpenCV image (BGR format)
+            context: Shared conversions of image; created on demand if not given
             
         Returns:
             List of detected BoundingBox regions
@@ -36,30 +61,10 @@ class FallbackDetector(BaseDetector):
             logger.debug(f"{self.name}: Starting fallback detection")
             
             height, width = image.shape[:2]
-            regions = []
-            
-            # 1. Center region (rule of thirds center)
-            center_region = self._get_center_region(width, height)
-            regions.append(center_region)
-            
-            # 2. Golden ratio regions
-            golden_regions = self._get_golden_ratio_regions(width, height)
-            regions.extend(golden_regions)
-            
-            # 3. Rule of thirds intersections
-            thirds_regions = self._get_rule_of_thirds_regions(width, height)
-            regions.extend(thirds_regions)
-            
-            # 4. Safe area regions (avoiding edges)
-            safe_regions = self._get_safe_area_regions(width, height)
-            regions.extend(safe_regions)
-            
-            # 5. Aspect ratio based regions
-            aspect_regions = self._get_aspect_ratio_regions(width, height)
-            regions.extend(aspect_regions)
             
-            # Remove duplicates and filter
-            unique_regions = self._remove_duplicate_regions(regions)
+            # Center, golden ratio, rule of thirds, safe area and aspect ratio
+            # regions, built fresh from the layout cached for this size
+            unique_regions = [BoundingBox(*values) for values in _fallback_layout(width, height)]
             filtered_regions = self.filter_regions(unique_regions, image.shape)
             
             # Sort by confidence (highest first)
@@ -77,7 +82,8 @@ class FallbackDetector(BaseDetector):
             # Last resort - return center region
             return [self._get_center_region(image.shape[1], image.shape[0])]
     
-    def _get_center_region(self, width: int, height: int) -> BoundingBox:
+    @staticmethod
+    def _get_center_region(width: int, height: int) -> BoundingBox:
         """Get a centered region."""
         # Use 40% of the smaller dimension
         size = int(min(width, height) * 0.4)
@@ -93,7 +99,8 @@ class FallbackDetector(BaseDetector):
             label="fallback_center"
         )
     
-    def _get_golden_ratio_regions(self, width: int, height: int) -> List[BoundingBox]:
+    @staticmethod
+    def _get_golden_ratio_regions(width: int, height: int) -> List[BoundingBox]:
         """Get regions based on golden ratio positioning."""
         regions = []
         golden_ratio = 1.618
@@ -132,7 +139,8 @@ class FallbackDetector(BaseDetector):
         
         return regions
     
-    def _get_rule_of_thirds_regions(self, width: int, height: int) -> List[BoundingBox]:
+    @staticmethod
+    def _get_rule_of_thirds_regions(width: int, height: int) -> List[BoundingBox]:
         """Get regions based on rule of thirds."""
         regions = []
         
@@ -171,7 +179,8 @@ class FallbackDetector(BaseDetector):
         
         return regions
     
-    def _get_safe_area_regions(self, width: int, height: int) -> List[BoundingBox]:
+    @staticmethod
+    def _get_safe_area_regions(width: int, height: int) -> List[BoundingBox]:
         """Get regions in safe areas (avoiding edges)."""
         regions = []
         
@@ -219,7 +228,8 @@ class FallbackDetector(BaseDetector):
         
         return regions
     
-    def _get_aspect_ratio_regions(self, width: int, height: int) -> List[BoundingBox]:
+    @staticmethod
+    def _get_aspect_ratio_regions(width: int, height: int) -> List[BoundingBox]:
         """Get regions with common aspect ratios."""
         regions = []
         
@@ -260,7 +270,8 @@ class FallbackDetector(BaseDetector):
         
         return regions
     
-    def _remove_duplicate_regions(self, regions: List[BoundingBox]) -> List[BoundingBox]:
+    @staticmethod
+    def _remove_duplicate_regions(regions: List[BoundingBox]) -> List[BoundingBox]:
         """Remove duplicate or highly overlapping regions."""
         if not regions:
             return []
@@ -8,11 +8,16 @@ from typing import List, Tuple, Optional, Dict
 import logging
 import os
 
-from ..base import BaseDetector, BoundingBox
+from .._kernel_pool import map_kernels
+from ..base import BaseDetector, BoundingBox, ImageContext
 from ..config import OpenCVObjectDetectionConfig
 
 logger = logging.getLogger(__name__)
 
+# Neighbourhood a correlation peak must be the maximum of to count as a match;
+# the shifted copies around a peak would be suppressed by NMS anyway
+PEAK_KERNEL = np.ones((3, 3), np.uint8)
+
 
 class TemplateMatchingDetector(BaseDetector):
     """
@@ -25,13 +30,17 @@ class TemplateMatchingDetector(BaseDetector):
     def __init__(self, config: OpenCVObjectDetectionConfig):
         super().__init__(config)
         self.templates = self._load_or_generate_templates()
+        self.template_pyramids = {
+            name: self._build_pyramid(template) for name, template in self.templates.items()
+        }
     
-    def detect(self, image: np.ndarray) -> List[BoundingBox]:
+    def detect(self, image: np.ndarray, context: Optional[ImageContext] = None) -> List[BoundingBox]:
         """
         Detect regions using template matching.
         
         Args:
             image: OpenCV image (BGR format)
+            context: Shared conversions of image; created on demand if not given
             
         Returns:
             List of detected BoundingBox regions
@@ -40,13 +49,10 @@ class TemplateMatchingDetector(BaseDetector):
             logger.debug(f"{self.name}: Starting template matching detection")
             
             # Convert to grayscale for matching
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if len(image.shape) == 3 else image
+            gray = (context or ImageContext(image)).gray
             
             # Apply template matching at multiple scales
-            all_matches = []
-            for template_name, template in self.templates.items():
-                matches = self._match_template_multiscale(gray, template, template_name)
-                all_matches.extend(matches)
+            all_matches = self._match_templates(gray, self.template_pyramids)
             
             # Remove overlapping matches
             unique_matches = self._remove_overlapping_matches(all_matches)
@@ -177,6 +183,21 @@ class TemplateMatchingDetector(BaseDetector):
         
         return template.astype(np.uint8)
     
+    def _build_pyramid(self, template: np.ndarray) -> List[Tuple[float, np.ndarray]]:
+        """
+        Resize a template to every configured scale.
+        
+        Args:
+            template: Template at scale 1.0
+        
+        Returns:
+            List of (scale, scaled template) pairs
+        """
+        return [
+            (scale, cv2.resize(template, (int(template.shape[1] * scale), int(template.shape[0] * scale))))
+            for scale in self.config.template_scales
+        ]
+    
     def _match_template_multiscale(self, image: np.ndarray, template: np.ndarray, 
                                    template_name: str) -> List[Dict]:
         """
@@ -190,31 +211,46 @@ class TemplateMatchingDetector(BaseDetector):
         Returns:
             List of match dictionaries
         """
-        matches = []
+        return self._match_templates(image, {template_name: self._build_pyramid(template)})
+    
+    def _match_templates(self, image: np.ndarray,
+                         pyramids: Dict[str, List[Tuple[float, np.ndarray]]]) -> List[Dict]:
+        """
+        Match every template at every scale of its pyramid.
         
-        for scale in self.config.template_scales:
-            # Resize template
-            scaled_width = int(template.shape[1] * scale)
-            scaled_height = int(template.shape[0] * scale)
-            
-            if scaled_width > image.shape[1] or scaled_height > image.shape[0]:
-                continue
-            
-            scaled_template = cv2.resize(template, (scaled_width, scaled_height))
-            
-            # Apply template matching
-            result = cv2.matchTemplate(image, scaled_template, cv2.TM_CCOEFF_NORMED)
-            
-            # Find locations where match exceeds threshold
-            locations = np.where(result >= self.config.template_match_threshold)
+        All matchTemplate and peak finding calls are submitted to the shared
+        kernel pool at once; building the match dictionaries happens on this
+        thread.
+        
+        Args:
+            image: Grayscale image to search in
+            pyramids: Template name -> (scale, scaled template) pairs
             
-            for pt in zip(*locations[::-1]):
+        Returns:
+            List of match dictionaries, ordered by template then scale
+        """
+        jobs = [
+            (template_name, scale, scaled_template)
+            for template_name, pyramid in pyramids.items()
+            for scale, scaled_template in pyramid
+            if scaled_template.shape[1] <= image.shape[1] and scaled_template.shape[0] <= image.shape[0]
+        ]
+        
+        peaks = map_kernels(
+            self._match_peaks,
+            [(image, scaled_template, self.config.template_match_threshold) for _, _, scaled_template in jobs]
+        )
+        
+        matches = []
+        for (template_name, scale, scaled_template), (xs, ys, scores) in zip(jobs, peaks):
+            scaled_height, scaled_width = scaled_template.shape[:2]
+            for x, y, score in zip(xs.tolist(), ys.tolist(), scores):
                 match = {
-                    'x': pt[0],
-                    'y': pt[1],
+                    'x': x,
+                    'y': y,
                     'width': scaled_width,
                     'height': scaled_height,
-                    'confidence': result[pt[1], pt[0]],
+                    'confidence': score,
                     'template': template_name,
                     'scale': scale
                 }
@@ -222,6 +258,25 @@ class TemplateMatchingDetector(BaseDetector):
         
         return matches
     
+    @staticmethod
+    def _match_peaks(image: np.ndarray, template: np.ndarray,
+                     threshold: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Find the local maxima of the TM_CCOEFF_NORMED map that reach the threshold.
+        
+        Args:
+            image: Grayscale image to search in
+            template: Scaled template
+            threshold: Minimum correlation for a match
+        
+        Returns:
+            x coordinates, y coordinates and scores of the peaks, in row-major order
+        """
+        result = cv2.matchTemplate(image, template, cv2.TM_CCOEFF_NORMED)
+        peaks = (result >= threshold) & (result >= cv2.dilate(result, PEAK_KERNEL))
+        ys, xs = np.nonzero(peaks)
+        return xs, ys, result[ys, xs]
+    
     def _remove_overlapping_matches(self, matches: List[Dict]) -> List[Dict]:
         """
         Remove overlapping template matches using non-maximum suppression.
@@ -6,15 +6,20 @@ to find suitable regions for artwork placement in mockup templates.
 """
 
 import logging
+import os
 import time
 from typing import List, Dict, Optional, Any, Tuple
 from PIL import Image
+import cv2
 import numpy as np
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import threading
+from collections import defaultdict
 
 from .config import OpenCVObjectDetectionConfig
-from .base import BaseDetector, BoundingBox
+from ._fastmerge import VECTORIZED_MERGE_MIN_REGIONS, merge_groups
+from ._kernel_pool import set_max_workers
+from .base import BaseDetector, BoundingBox, BoundingBoxArray, ImageContext
 from .utils import pil_to_cv2, validate_image
 from .detectors import (
     EdgeBasedDetector,
@@ -27,6 +32,87 @@ from .performance_monitor import get_performance_monitor
 
 logger = logging.getLogger(__name__)
 
+# Distinct (shape, dtype) keys the scratch pool keeps buffers for; pipelines
+# mostly see a handful of template sizes, anything beyond that starts over
+SCRATCH_POOL_MAX_KEYS = 16
+
+# Region count from which scoring all regions as arrays is cheaper than
+# scoring each BoundingBox on its own
+VECTORIZED_RANK_MIN_REGIONS = 16
+
+# Aspect ratios regions are scored against: golden ratio, 3:2, 4:3, 1:1, 3:4, 2:3
+_IDEAL_ASPECT_RATIOS = (1.618, 1.5, 1.333, 1.0, 0.75, 0.667)
+
+# OpenCV 5 moved groupRectangles out of the main package along with the
+# cascade classifiers, so the native grouping merge depends on the build
+GROUP_RECTANGLES_AVAILABLE = hasattr(cv2, 'groupRectangles')
+
+# OpenCV's thread pool is shared by the whole process, so it is sized once
+_thread_policy_lock = threading.Lock()
+_thread_policy_applied = False
+
+def apply_thread_policy(detector_concurrency: int, cpu_budget: Optional[int] = None) -> bool:
+    """
+    Size OpenCV's internal thread pool for how the detectors are run.
+    
+    Only the first call in a process takes effect; later services share the
+    pool as it is, so constructing a service never resizes it under another
+    one that is mid-detection. When detectors run concurrently each one gets
+    an equal share of the cores, so OpenCV's pool does not oversubscribe the
+    machine. The template kernel pool is capped at the same share, so a
+    detector fanning its matches out over it stays within its cores too.
+    
+    Args:
+        detector_concurrency: Number of detectors that run at the same time
+        cpu_budget: Cores OpenCV may use in total (default: all of them)
+    
+    Returns:
+        True if this call applied the policy, False if it was already applied
+    """
+    global _thread_policy_applied
+    with _thread_policy_lock:
+        if _thread_policy_applied:
+            return False
+        _thread_policy_applied = True
+        
+        cpu_budget = cpu_budget or os.cpu_count() or 1
+        threads = max(1, cpu_budget // max(1, detector_concurrency))
+        cv2.setNumThreads(threads)
+        set_max_workers(threads)
+    logger.debug(f"OpenCV threads set to {cv2.getNumThreads()}")
+    return True
+
+class _ScratchPool:
+    """
+    Reusable arrays keyed by (shape, dtype).
+    
+    A detection pass takes image-sized buffers with get() and hands them back
+    with release() when it is finished, so repeated passes over images of the
+    same size reuse memory instead of allocating it every time.
+    """
+    
+    def __init__(self):
+        self._free: Dict[Tuple, List[np.ndarray]] = defaultdict(list)
+        self._lock = threading.Lock()
+        
+    def get(self, shape: Tuple[int, ...], dtype: Any) -> np.ndarray:
+        """Return a free buffer of this shape and dtype, allocating one if none is free."""
+        key = (tuple(shape), np.dtype(dtype))
+        with self._lock:
+            free = self._free.get(key)
+            if free:
+                return free.pop()
+        return np.empty(shape, dtype)
+        
+    def release(self, buffers: List[np.ndarray]) -> None:
+        """Make buffers available to later get() calls."""
+        with self._lock:
+            for buffer in buffers:
+                key = (buffer.shape, buffer.dtype)
+                if key not in self._free and len(self._free) >= SCRATCH_POOL_MAX_KEYS:
+                    self._free.clear()
+                self._free[key].append(buffer)
+
 class OpenCVObjectDetectionService:
     """
     Main service class that orchestrates multiple OpenCV detection algorithms
@@ -39,7 +125,18 @@ class OpenCVObjectDetectionService:
         self._detectors: Dict[str, BaseDetector] = {}
         self._lock = threading.Lock()
         self._executor = None
+        self._scratch = _ScratchPool()
+        self._merge_method = self.config.merge_method
+        if self._merge_method == 'group_rectangles' and not GROUP_RECTANGLES_AVAILABLE:
+            logger.warning("cv2.groupRectangles is not available in this OpenCV build, merging by IoU instead")
+            self._merge_method = 'iou'
         self._initialize_detectors()
+        # Kept apart from _detectors, which is never changed after construction
+        # because one service is shared by concurrent jobs
+        self._fallback_detector: Optional[BaseDetector] = None
+        if self.config.enable_fallback:
+            self._fallback_detector = self._detectors.get('fallback') or FallbackDetector(self.config)
+        apply_thread_policy(len(self._detectors) if self.config.parallel_processing else 1)
         
     def _initialize_detectors(self) -> None:
         """Initialize all detection algorithms based on configuration."""
@@ -58,7 +155,7 @@ class OpenCVObjectDetectionService:
                     logger.info(f"Initialized {name} detector")
                 except Exception as e:
                     logger.error(f"Failed to initialize {name} detector: {e}")
-                    
+    
     def detect_objects(self, image: Image.Image, job_id: Optional[str] = None) -> List[BoundingBox]:
         """
         Detect objects in the given image using all enabled detectors.
@@ -84,14 +181,21 @@ class OpenCVObjectDetectionService:
             # Convert image for OpenCV processing
             with monitor.measure_phase('preprocessing'):
                 cv_image = pil_to_cv2(image)
+                # Color conversions are made on first use and shared by all
+                # detectors, in buffers reused across calls
+                context = ImageContext(cv_image, self._scratch)
             
             # Run detectors in parallel if enabled
             all_detections = []
             
-            if self.config.parallel_processing and len(self._detectors) > 1:
-                all_detections = self._run_detectors_parallel(cv_image)
-            else:
-                all_detections = self._run_detectors_sequential(cv_image)
+            try:
+                if self.config.parallel_processing and len(self._detectors) > 1:
+                    all_detections = self._run_detectors_parallel(cv_image, context)
+                else:
+                    all_detections = self._run_detectors_sequential(cv_image, context)
+            finally:
+                # Every detector has returned, so nothing reads the buffers any more
+                context.release()
                 
             # Merge and rank detections
             with monitor.measure_phase('merging'):
@@ -108,7 +212,8 @@ class OpenCVObjectDetectionService:
             
             return final_detections
         
-    def _run_detectors_sequential(self, cv_image: np.ndarray) -> List[BoundingBox]:
+    def _run_detectors_sequential(self, cv_image: np.ndarray,
+                                   context: Optional[ImageContext] = None) -> List[BoundingBox]:
         """Run all detectors sequentially."""
         all_detections = []
         monitor = get_performance_monitor()
@@ -116,7 +221,7 @@ class OpenCVObjectDetectionService:
         for name, detector in self._detectors.items():
             try:
                 with monitor.measure_phase(f'{name}_detector'):
-                    detections = detector.detect(cv_image)
+                    detections = detector.detect(cv_image, context)
                 
                 logger.debug(f"{name} detector found {len(detections)} regions")
                 all_detections.extend(detections)
@@ -132,13 +237,14 @@ class OpenCVObjectDetectionService:
                 
         return all_detections
         
-    def _run_detectors_parallel(self, cv_image: np.ndarray) -> List[BoundingBox]:
+    def _run_detectors_parallel(self, cv_image: np.ndarray,
+                                 context: Optional[ImageContext] = None) -> List[BoundingBox]:
         """Run all detectors in parallel using ThreadPoolExecutor."""
         all_detections = []
         
         with ThreadPoolExecutor(max_workers=len(self._detectors)) as executor:
             future_to_detector = {
-                executor.submit(detector.detect, cv_image): name
+                executor.submit(detector.detect, cv_image, context): name
                 for name, detector in self._detectors.items()
             }
             
@@ -155,40 +261,117 @@ class OpenCVObjectDetectionService:
         
     def _merge_overlapping_regions(self, detections: List[BoundingBox]) -> List[BoundingBox]:
         """Merge overlapping detections based on IoU threshold."""
-        if not detections:
-            return []
+        # Nothing can merge, so skip building the arrays and the scan
+        if len(detections) < 2:
+            return list(detections)
             
-        # Sort by confidence (highest first)
-        sorted_detections = sorted(detections, key=lambda x: x.confidence, reverse=True)
-        merged = []
+        if self._merge_method == 'group_rectangles':
+            return self._group_rectangles(detections)
+        
+        threshold = self.config.merge_iou_threshold
+        if len(detections) < VECTORIZED_MERGE_MIN_REGIONS:
+            # Visit highest confidence first, keeping input order for ties;
+            # each detection's merged region is found by the scan below
+            order = sorted(range(len(detections)), key=lambda i: detections[i].confidence, reverse=True)
+            groups = None
+        else:
+            # Geometry for all detections as arrays, so the greedy scan
+            # never goes through BoundingBox attributes
+            boxes = BoundingBoxArray.from_list(detections)
+            visit_order = np.argsort(-boxes.confidences, kind='stable')
+            # Index of the merged region each detection joins, in visiting order
+            groups = merge_groups(boxes.xs, boxes.ys, boxes.widths, boxes.heights,
+                                  visit_order, threshold).tolist()
+            order = visit_order.tolist()
         
-        for detection in sorted_detections:
-            should_merge = False
+        merged = []
+        for k, i in enumerate(order):
+            detection = detections[i]
+            if groups is not None:
+                j = groups[k]
+            else:
+                j = next((m for m, existing in enumerate(merged)
+                          if self._calculate_iou(detection, existing) > threshold), len(merged))
             
-            for i, existing in enumerate(merged):
-                iou = self._calculate_iou(detection, existing)
-                if iou > self.config.merge_iou_threshold:
-                    # Merge with existing detection
-                    merged[i] = self._merge_boxes(existing, detection)
-                    should_merge = True
-                    break
-                    
-            if not should_merge:
+            if j == len(merged):
                 merged.append(detection)
+            else:
+                # Merge with the first existing detection it overlaps
+                merged[j] = self._merge_boxes(merged[j], detection)
                 
         return merged
         
+    def _group_rectangles(self, detections: List[BoundingBox]) -> List[BoundingBox]:
+        """
+        Merge overlapping detections with OpenCV's native rectangle grouping.
+        
+        Grouped regions are the average of their members rather than the
+        confidence-weighted merge, and small regions lying inside a larger
+        group are absorbed by it. Each region takes the confidence and label
+        of its most confident member.
+        
+        Args:
+            detections: Detections to merge
+        
+        Returns:
+            One bounding box per group
+        """
+        boxes = BoundingBoxArray.from_list(detections)
+        rects = np.rint(np.column_stack([boxes.xs, boxes.ys, boxes.widths, boxes.heights])).astype(np.int32)
+        # Every rectangle is listed twice so that groupThreshold=1 keeps
+        # regions that overlap nothing else
+        grouped, _ = cv2.groupRectangles(np.vstack([rects, rects]).tolist(), 1, self.config.merge_group_eps)
+        if len(grouped) == 0:
+            return []
+        
+        grouped = np.asarray(grouped, dtype=np.float64).reshape(-1, 4)
+        groups = BoundingBoxArray(
+            xs=grouped[:, 0],
+            ys=grouped[:, 1],
+            widths=grouped[:, 2],
+            heights=grouped[:, 3],
+            confidences=np.zeros(len(grouped)),
+            labels=[''] * len(grouped)
+        )
+        # groupRectangles doesn't report membership, so each detection
+        # belongs to the group it overlaps most
+        ious = boxes.pairwise_iou(groups)
+        owners = np.where(ious.max(axis=1) > 0, ious.argmax(axis=1), -1)
+        
+        merged = []
+        for g, (x, y, width, height) in enumerate(grouped.tolist()):
+            members = np.flatnonzero(owners == g)
+            if members.size == 0:
+                continue
+            best = members[np.argmax(boxes.confidences[members])]
+            merged.append(BoundingBox(
+                x=x,
+                y=y,
+                width=width,
+                height=height,
+                confidence=float(boxes.confidences[best]),
+                label=boxes.labels[best]
+            ))
+        
+        return merged
+    
     def _calculate_iou(self, box1: BoundingBox, box2: BoundingBox) -> float:
         """Calculate Intersection over Union for two bounding boxes."""
+        box1_x2 = box1.x + box1.width
+        box2_x2 = box2.x + box2.width
+        box1_y2 = box1.y + box1.height
+        box2_y2 = box2.y + box2.height
+        
+        # Most pairs from different detectors don't overlap on some axis
+        if box1_x2 <= box2.x or box2_x2 <= box1.x or box1_y2 <= box2.y or box2_y2 <= box1.y:
+            return 0.0
+            
         # Calculate intersection area
         x1 = max(box1.x, box2.x)
         y1 = max(box1.y, box2.y)
-        x2 = min(box1.x + box1.width, box2.x + box2.width)
-        y2 = min(box1.y + box1.height, box2.y + box2.height)
+        x2 = min(box1_x2, box2_x2)
+        y2 = min(box1_y2, box2_y2)
         
-        if x2 < x1 or y2 < y1:
-            return 0.0
-            
         intersection = (x2 - x1) * (y2 - y1)
         
         # Calculate union area
@@ -229,62 +412,105 @@ class OpenCVObjectDetectionService:
         if not detections:
             return []
             
+        if len(detections) < VECTORIZED_RANK_MIN_REGIONS:
+            scores = [self._score_region(detection, image_size) for detection in detections]
+            # Sort by score (highest first), keeping merge order for ties
+            order = sorted(range(len(detections)), key=scores.__getitem__, reverse=True)
+        else:
+            scores = self._score_regions(BoundingBoxArray.from_list(detections), image_size)
+            # Sort by score (highest first), keeping merge order for ties
+            order = np.argsort(-scores, kind='stable').tolist()
+        return [detections[i] for i in order]
+        
+    def _score_region(self, detection: BoundingBox, image_size: Tuple[int, int]) -> float:
+        """Placement score of one region, the weighted sum of its sub-scores."""
         image_width, image_height = image_size
         image_area = image_width * image_height
+        weights = self.config.scoring_weights
+        score = 0.0
         
-        scored_detections = []
+        # Confidence score (0-1)
+        score += detection.confidence * weights['confidence']
         
-        for detection in detections:
-            score = 0.0
-            
-            # Confidence score (0-1)
-            score += detection.confidence * self.config.scoring_weights['confidence']
-            
-            # Size score (prefer regions that are 10-50% of image area)
-            region_area = detection.width * detection.height
-            area_ratio = region_area / image_area
-            if 0.1 <= area_ratio <= 0.5:
-                size_score = 1.0
-            elif area_ratio < 0.1:
-                size_score = area_ratio / 0.1
-            else:
-                size_score = max(0, 1.0 - (area_ratio - 0.5) / 0.5)
-            score += size_score * self.config.scoring_weights['size']
-            
-            # Aspect ratio score (prefer ratios close to golden ratio or common photo ratios)
-            aspect_ratio = detection.width / detection.height if detection.height > 0 else 0
-            ideal_ratios = [1.618, 1.5, 1.333, 1.0, 0.75, 0.667]  # Golden ratio, 3:2, 4:3, 1:1, 3:4, 2:3
-            ratio_diffs = [abs(aspect_ratio - ideal) for ideal in ideal_ratios]
-            min_diff = min(ratio_diffs) if ratio_diffs else 1.0
-            aspect_score = max(0, 1.0 - min_diff / 2.0)
-            score += aspect_score * self.config.scoring_weights['aspect_ratio']
-            
-            # Position score (prefer centered regions)
-            center_x = detection.x + detection.width / 2
-            center_y = detection.y + detection.height / 2
-            x_offset = abs(center_x - image_width / 2) / (image_width / 2)
-            y_offset = abs(center_y - image_height / 2) / (image_height / 2)
-            position_score = 1.0 - (x_offset + y_offset) / 2
-            score += position_score * self.config.scoring_weights['position']
-            
-            # Edge distance score (prefer regions not touching edges)
-            edge_margin = min(
-                detection.x,
-                detection.y,
-                image_width - (detection.x + detection.width),
-                image_height - (detection.y + detection.height)
-            )
-            edge_score = min(1.0, edge_margin / (min(image_width, image_height) * 0.1))
-            score += edge_score * self.config.scoring_weights['edge_distance']
-            
-            # Store score for sorting
-            scored_detections.append((score, detection))
-            
-        # Sort by score (highest first)
-        scored_detections.sort(key=lambda x: x[0], reverse=True)
+        # Size score (prefer regions that are 10-50% of image area)
+        area_ratio = (detection.width * detection.height) / image_area
+        if 0.1 <= area_ratio <= 0.5:
+            size_score = 1.0
+        elif area_ratio < 0.1:
+            size_score = area_ratio / 0.1
+        else:
+            size_score = max(0, 1.0 - (area_ratio - 0.5) / 0.5)
+        score += size_score * weights['size']
+        
+        # Aspect ratio score (prefer ratios close to golden ratio or common photo ratios)
+        aspect_ratio = detection.width / detection.height if detection.height > 0 else 0
+        min_diff = min(abs(aspect_ratio - ideal) for ideal in _IDEAL_ASPECT_RATIOS)
+        aspect_score = max(0, 1.0 - min_diff / 2.0)
+        score += aspect_score * weights['aspect_ratio']
+        
+        # Position score (prefer centered regions)
+        x_offset = abs(detection.x + detection.width / 2 - image_width / 2) / (image_width / 2)
+        y_offset = abs(detection.y + detection.height / 2 - image_height / 2) / (image_height / 2)
+        position_score = 1.0 - (x_offset + y_offset) / 2
+        score += position_score * weights['position']
+        
+        # Edge distance score (prefer regions not touching edges)
+        edge_margin = min(
+            detection.x,
+            detection.y,
+            image_width - (detection.x + detection.width),
+            image_height - (detection.y + detection.height)
+        )
+        edge_score = min(1.0, edge_margin / (min(image_width, image_height) * 0.1))
+        score += edge_score * weights['edge_distance']
+        
+        return score
+        
+    def _score_regions(self, boxes: BoundingBoxArray, image_size: Tuple[int, int]) -> np.ndarray:
+        """
+        Placement scores of all regions at once.
+        
+        Every sub-score uses the same arithmetic per region as _score_region,
+        so both give identical scores and equally scored regions still tie.
+        """
+        image_width, image_height = image_size
+        image_area = image_width * image_height
+        weights = self.config.scoring_weights
+        
+        # Confidence score (0-1)
+        scores = boxes.confidences * weights['confidence']
+        
+        # Size score (prefer regions that are 10-50% of image area)
+        area_ratios = boxes.areas() / image_area
+        size_scores = np.where(
+            area_ratios < 0.1,
+            area_ratios / 0.1,
+            np.where(area_ratios <= 0.5, 1.0, np.maximum(0, 1.0 - (area_ratios - 0.5) / 0.5))
+        )
+        scores += size_scores * weights['size']
+        
+        # Aspect ratio score (prefer ratios close to golden ratio or common photo ratios)
+        min_diffs = np.abs(boxes.aspect_ratios()[:, None] - np.array(_IDEAL_ASPECT_RATIOS)).min(axis=1)
+        aspect_scores = np.maximum(0, 1.0 - min_diffs / 2.0)
+        scores += aspect_scores * weights['aspect_ratio']
+        
+        # Position score (prefer centered regions)
+        x_offsets = np.abs(boxes.xs + boxes.widths / 2 - image_width / 2) / (image_width / 2)
+        y_offsets = np.abs(boxes.ys + boxes.heights / 2 - image_height / 2) / (image_height / 2)
+        position_scores = 1.0 - (x_offsets + y_offsets) / 2
+        scores += position_scores * weights['position']
         
-        # Return sorted detections
-        return [detection for _, detection in scored_detections]
+        # Edge distance score (prefer regions not touching edges)
+        edge_margins = np.minimum.reduce([
+            boxes.xs,
+            boxes.ys,
+            image_width - (boxes.xs + boxes.widths),
+            image_height - (boxes.ys + boxes.heights)
+        ])
+        edge_scores = np.minimum(1.0, edge_margins / (min(image_width, image_height) * 0.1))
+        scores += edge_scores * weights['edge_distance']
+        
+        return scores
         
     def find_suitable_regions(self, image: Image.Image, job_id: Optional[str] = None) -> List[BoundingBox]:
         """
@@ -308,12 +534,9 @@ class OpenCVObjectDetectionService:
             
             if not detected_regions:
                 # Use fallback detector if enabled and no regions found
-                if self.config.enable_fallback:
-                    if 'fallback' not in self._detectors:
-                        self._detectors['fallback'] = FallbackDetector(self.config)
-                        
+                if self._fallback_detector is not None:
                     cv_image = pil_to_cv2(image)
-                    fallback_regions = self._detectors['fallback'].detect(cv_image)
+                    fallback_regions = self._fallback_detector.detect(cv_image)
                     
                     if not fallback_regions:
                         raise NoSuitableRegionsError("No suitable regions detected in the mockup template")
@@ -75,13 +75,13 @@ class PerformanceMonitor:
             image_size=image_size
         )
         
-        start_time = time.time()
+        start_time = time.perf_counter()
         try:
             yield self._current_metrics
             self._current_metrics.success = True
         except GeneratorExit:
             # Handle generator cleanup properly
-            self._current_metrics.total_time = time.time() - start_time
+            self._current_metrics.total_time = time.perf_counter() - start_time
             self._record_metrics(self._current_metrics)
             raise
         except Exception as e:
@@ -90,7 +90,7 @@ class PerformanceMonitor:
             raise
         finally:
             if self._current_metrics.total_time == 0:  # Not yet recorded
-                self._current_metrics.total_time = time.time() - start_time
+                self._current_metrics.total_time = time.perf_counter() - start_time
                 self._record_metrics(self._current_metrics)
             
     @contextmanager
@@ -105,11 +105,11 @@ class PerformanceMonitor:
             yield
             return
             
-        start_time = time.time()
+        start_time = time.perf_counter()
         try:
             yield
         finally:
-            elapsed = time.time() - start_time
+            elapsed = time.perf_counter() - start_time
             
             if phase_name in ['preprocessing', 'merging', 'ranking']:
                 setattr(self._current_metrics, f"{phase_name}_time", elapsed)
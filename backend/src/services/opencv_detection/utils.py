@@ -208,6 +208,50 @@ def resize_image_if_needed(image: np.ndarray,
     return resized, scale
 
 
+def downscale_image(image: np.ndarray, factor: int) -> Tuple[np.ndarray, float]:
+    """
+    Shrink an image by an integer factor for coarse region proposals.
+    
+    Args:
+        image: OpenCV image
+        factor: Divisor applied to both dimensions; 1 returns the image as is
+    
+    Returns:
+        Tuple of (downscaled_image, scale_factor)
+    """
+    if factor <= 1:
+        return image, 1.0
+    
+    scale = 1.0 / factor
+    resized = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    
+    return resized, scale
+
+
+def upscale_box(rect: Tuple[int, int, int, int], scale: float,
+                image_shape: Tuple[int, ...]) -> Tuple[float, float, float, float]:
+    """
+    Map a box found on a downscaled image back to original image coordinates.
+    
+    cv2.resize rounds odd sizes up, so a box touching the right or bottom edge
+    of the downscaled image can land just past the original edge; it is
+    clamped to the image.
+    
+    Args:
+        rect: (x, y, width, height) in downscaled image coordinates
+        scale: Scale factor returned by downscale_image
+        image_shape: Shape of the original image
+    
+    Returns:
+        Tuple of (x, y, width, height) in original image coordinates
+    """
+    height, width = image_shape[:2]
+    x, y, w, h = (value / scale for value in rect)
+    x, y = min(x, width), min(y, height)
+    
+    return x, y, min(w, width - x), min(h, height - y)
+
+
 def normalize_image(image: np.ndarray) -> np.ndarray:
     """
     Normalize image values to improve detection.
@@ -256,6 +300,27 @@ def apply_clahe(image: np.ndarray, clip_limit: float = 2.0,
         return cv2.cvtColor(enhanced_lab, cv2.COLOR_LAB2BGR)
 
 
+def local_mean_and_variance(channel: np.ndarray, kernel_size: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Mean and variance of every kernel_size x kernel_size window of a channel.
+    
+    Uses OpenCV's running-sum box filters, so each pixel costs the same
+    whatever the window size, unlike a convolution with a normalized kernel.
+    Borders are reflected the same way cv2.filter2D reflects them.
+    
+    Args:
+        channel: Single channel image
+        kernel_size: Window size
+        
+    Returns:
+        (mean, variance) float32 arrays with the shape of channel
+    """
+    window = (kernel_size, kernel_size)
+    mean = cv2.boxFilter(channel, cv2.CV_32F, window, borderType=cv2.BORDER_REFLECT_101)
+    mean_of_squares = cv2.sqrBoxFilter(channel, cv2.CV_32F, window, borderType=cv2.BORDER_REFLECT_101)
+    return mean, mean_of_squares - mean ** 2
+
+
 def safe_image_read(image_path: str) -> Optional[np.ndarray]:
     """
     Safely read an image file with error handling.
@@ -12,7 +12,7 @@ import numpy as np
 from PIL import Image
 import math
 
-from .object_detection import BoundingBox
+from .object_detection_types import BoundingBox
 
 logger = logging.getLogger(__name__)
 
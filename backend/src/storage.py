@@ -1,25 +1,121 @@
+import logging
 import os
+import socket
+import threading
 import uuid
+from io import BytesIO
+from typing import Dict, Optional
+import google.auth
+from google.auth.transport.requests import AuthorizedSession
 from google.cloud import storage
+from google.cloud.storage.retry import DEFAULT_RETRY
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
 
 load_dotenv()
 
-def upload_image_to_storage(image_data: bytes) -> str:
-    """Upload image data to Firebase Storage and return public URL"""
-    storage_client = storage.Client()
+logger = logging.getLogger(__name__)
+
+
+class _KeepAliveAdapter(HTTPAdapter):
+    """HTTPS adapter with TCP keepalive so pooled GCS connections stay usable between uploads"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs['socket_options'] = HTTPConnection.default_socket_options + [
+            (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        ]
+        super().init_poolmanager(*args, **kwargs)
+
+
+# Shared connection pool mounted on the storage client's session, so uploads
+# from any thread reuse open TLS connections instead of handshaking each time
+_HTTP_ADAPTER = _KeepAliveAdapter(pool_connections=32, pool_maxsize=64, pool_block=False)
+
+# Shared Cloud Storage client, created on first use so credential discovery
+# runs once per process
+_storage_client: Optional[storage.Client] = None
+_storage_client_lock = threading.Lock()
+
+# Uploads larger than this switch to a chunked resumable upload (must be a multiple of 256 KiB)
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+
+# Cacheable generations are stored under their content key instead of a random name
+CACHED_ART_PREFIX = "generated-art/by-hash"
+
+# Recently seen content key -> public URL, so repeat lookups skip the GCS round trip
+_CACHED_URL_LIMIT = 1024
+_cached_urls: Dict[str, str] = {}
+
+
+def _get_storage_client() -> storage.Client:
+    """Return the shared Cloud Storage client, whose session uses the shared connection pool"""
+    global _storage_client
+    if _storage_client is None:
+        with _storage_client_lock:
+            if _storage_client is None:
+                credentials, project = google.auth.default(scopes=storage.Client.SCOPE)
+                session = AuthorizedSession(credentials)
+                session.mount("https://", _HTTP_ADAPTER)
+                # Without a discovered project, let the client fall back to its own lookup
+                project_kwargs = {'project': project} if project else {}
+                _storage_client = storage.Client(credentials=credentials, _http=session, **project_kwargs)
+    return _storage_client
+
+
+def _get_bucket() -> storage.Bucket:
+    """Return the Firebase Storage bucket"""
+    storage_client = _get_storage_client()
     BUCKET_NAME = os.getenv("FIREBASE_STORAGE_BUCKET")
     
     if not BUCKET_NAME:
         raise ValueError("FIREBASE_STORAGE_BUCKET not found in .env file.")
     
-    bucket = storage_client.bucket(BUCKET_NAME)
-    image_name = f"generated-art/{uuid.uuid4()}.png"
-    blob = bucket.blob(image_name)
+    return storage_client.bucket(BUCKET_NAME)
+
+
+def _remember_url(cache_key: str, public_url: str) -> None:
+    if len(_cached_urls) >= _CACHED_URL_LIMIT:
+        _cached_urls.clear()
+    _cached_urls[cache_key] = public_url
+
+
+def find_cached_image(cache_key: str) -> Optional[str]:
+    """Return the public URL of a previously stored image for this content key, if any"""
+    if cache_key in _cached_urls:
+        return _cached_urls[cache_key]
+    
+    blob = _get_bucket().blob(f"{CACHED_ART_PREFIX}/{cache_key}.png")
+    if not blob.exists(retry=DEFAULT_RETRY):
+        return None
+    
+    _remember_url(cache_key, blob.public_url)
+    return blob.public_url
+
+
+def upload_image_to_storage(image_data: bytes, cache_key: Optional[str] = None) -> str:
+    """
+    Upload image data to Firebase Storage and return public URL.
+    
+    If cache_key is given the image is stored under that content key so later
+    identical generations can find it with find_cached_image.
+    """
+    bucket = _get_bucket()
+    if cache_key:
+        image_name = f"{CACHED_ART_PREFIX}/{cache_key}.png"
+    else:
+        image_name = f"generated-art/{uuid.uuid4().hex}.png"
+    blob = bucket.blob(image_name, chunk_size=UPLOAD_CHUNK_SIZE)
     
-    print(f"--- Uploading image to: {image_name}")
-    blob.upload_from_string(image_data, content_type='image/png')
-    blob.make_public()
+    logger.info(f"Uploading image to: {image_name}")
+    # Object names are unique per content, so retrying a transient 429/5xx upload is safe
+    blob.upload_from_file(
+        BytesIO(image_data), size=len(image_data), content_type='image/png', retry=DEFAULT_RETRY
+    )
+    # No per-object ACL call: read access comes from bucket-level IAM, and
+    # public_url is built locally from the bucket and object name
     
-    print(f"--- Upload complete. Public URL: {blob.public_url}")
+    logger.info(f"Upload complete. Public URL: {blob.public_url}")
+    if cache_key:
+        _remember_url(cache_key, blob.public_url)
     return blob.public_url
\ No newline at end of file
@@ -5,11 +5,12 @@ This workflow orchestrates the intelligent mockup generation process using
 object detection and perspective transformation for realistic artwork placement.
 """
 import asyncio
+import functools
 from datetime import timedelta
 from temporalio import workflow, activity
 from temporalio.common import RetryPolicy
 from dataclasses import dataclass
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, List, Optional, Set, Tuple
 import io
 
 @dataclass
@@ -20,6 +21,171 @@ class IntelligentMockupJob:
     mockup_template: str
     original_job_id: Optional[str] = None
 
+# Leading bytes of every PNG file
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# Firestore collections read and written by this workflow
+INTELLIGENT_MOCKUP_JOBS_COLLECTION = 'intelligent_mockup_jobs'
+MOCKUPS_COLLECTION = 'mockups'
+
+# Collections of every pipeline workflow; they must stay distinct so workflows never share documents
+_PIPELINE_COLLECTIONS = (
+    'jobs',                              # Simple workflow
+    'mockup_jobs',                       # Mockup generation workflow
+    INTELLIGENT_MOCKUP_JOBS_COLLECTION,  # Intelligent mockup workflow
+    MOCKUPS_COLLECTION,                  # Mockup templates
+    'drafts',                            # Draft entries
+)
+assert len(set(_PIPELINE_COLLECTIONS)) == len(_PIPELINE_COLLECTIONS), "duplicate Firestore collection name"
+
+# Shared HTTP session for image downloads, created on first use so repeated
+# activity runs reuse pooled keep-alive connections
+_http_session = None
+
+def _get_http_session():
+    """Return the shared requests session used for image downloads"""
+    global _http_session
+    if _http_session is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+        
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        _http_session = session
+    return _http_session
+
+# Shared Cloud Storage client, created on first use so uploads reuse its connections
+_storage_client = None
+
+def _get_storage_client():
+    """Return the shared Cloud Storage client used for mockup uploads"""
+    global _storage_client
+    if _storage_client is None:
+        from google.cloud import storage
+        
+        _storage_client = storage.Client()
+    return _storage_client
+
+# Shared Firestore client, created on first use so status updates and template
+# lookups reuse its channel instead of opening one per call
+_firestore_client = None
+
+def _get_firestore_client():
+    """Return the shared Firestore client used by the activities"""
+    global _firestore_client
+    if _firestore_client is None:
+        import google.cloud.firestore as firestore
+        
+        _firestore_client = firestore.Client()
+    return _firestore_client
+
+# Job status updates arriving within this window are committed in one Firestore batch
+STATUS_BATCH_WINDOW = 0.025
+
+# Commit early once this many jobs have pending updates
+STATUS_BATCH_LIMIT = 50
+
+class _StatusUpdateBatcher:
+    """
+    Merges intelligent mockup job updates from concurrent activity runs and
+    writes them with a single Firestore batch commit per window.
+    
+    Callers wait until their own job's update has been committed, so an
+    activity still only succeeds once its write is durable. If the batch
+    commit fails, each update is retried on its own so one bad document
+    doesn't fail every job that shared the window.
+    """
+    
+    def __init__(self, window: float, limit: int):
+        self._window = window
+        self._limit = limit
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._committed: Dict[str, asyncio.Future] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # Running commits, referenced so they aren't garbage collected mid-write
+        self._commits: Set[asyncio.Task] = set()
+    
+    async def update(self, job_id: str, fields: Dict[str, Any]) -> None:
+        """Queue fields for a job document and wait for them to be committed"""
+        loop = asyncio.get_running_loop()
+        if self._timer is None:
+            self._timer = loop.call_later(self._window, self._flush)
+        
+        # Later updates to the same job within a window win, like sequential writes would
+        self._pending.setdefault(job_id, {}).update(fields)
+        committed = self._committed.get(job_id)
+        if committed is None:
+            committed = self._committed[job_id] = loop.create_future()
+        if len(self._pending) >= self._limit:
+            self._flush()
+        
+        # Shield the job's future so one cancelled activity doesn't cancel the write for the others
+        await asyncio.shield(committed)
+    
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+        pending, committed = self._pending, self._committed
+        self._pending, self._committed, self._timer = {}, {}, None
+        task = asyncio.ensure_future(self._commit(pending, committed))
+        self._commits.add(task)
+        task.add_done_callback(self._commits.discard)
+    
+    async def _commit(self, pending: Dict[str, Dict[str, Any]], committed: Dict[str, asyncio.Future]) -> None:
+        loop = asyncio.get_running_loop()
+        
+        try:
+            db = _get_firestore_client()
+            collection = db.collection(INTELLIGENT_MOCKUP_JOBS_COLLECTION)
+            batch = db.batch()
+            for job_id, fields in pending.items():
+                batch.update(collection.document(job_id), fields)
+        except Exception as e:
+            for future in committed.values():
+                _resolve(future, e)
+            return
+        
+        try:
+            await loop.run_in_executor(None, batch.commit)
+        except Exception as e:
+            # A lone update has nothing to be isolated from, so its error is final
+            if len(pending) == 1:
+                for future in committed.values():
+                    _resolve(future, e)
+                return
+            activity.logger.warning(
+                f"Batch update of {len(pending)} intelligent mockup jobs failed, "
+                f"retrying them one by one: {str(e)}"
+            )
+        else:
+            for future in committed.values():
+                _resolve(future)
+            return
+        
+        async def update_one(job_id: str) -> None:
+            try:
+                document = collection.document(job_id)
+                await loop.run_in_executor(None, document.update, pending[job_id])
+            except Exception as e:
+                _resolve(committed[job_id], e)
+            else:
+                _resolve(committed[job_id])
+        
+        await asyncio.gather(*(update_one(job_id) for job_id in pending))
+
+def _resolve(future: asyncio.Future, error: Optional[BaseException] = None) -> None:
+    """Complete a caller's future with the outcome of its write, unless it already is"""
+    if future.done():
+        return
+    if error is None:
+        future.set_result(None)
+    else:
+        future.set_exception(error)
+
+_status_updates = _StatusUpdateBatcher(STATUS_BATCH_WINDOW, STATUS_BATCH_LIMIT)
+
 @activity.defn
 async def update_intelligent_job_status(job_id: str, updates: Dict[str, Any]) -> None:
     """
@@ -27,7 +193,6 @@ async def update_intelligent_job_status(job_id: str, updates: Dict[str, Any]) ->
     """
     import os
     from dotenv import load_dotenv
-    import google.cloud.firestore as firestore
     from google.cloud.firestore import SERVER_TIMESTAMP
     
     load_dotenv()
@@ -35,9 +200,6 @@ async def update_intelligent_job_status(job_id: str, updates: Dict[str, Any]) ->
     activity.logger.info(f"Updating intelligent mockup job {job_id} with: {updates}")
     
     try:
-        db = firestore.Client()
-        job_ref = db.collection('intelligent_mockup_jobs').document(job_id)
-        
         # Add timestamp for tracking
         updates_with_timestamp = {**updates, 'updated_at': SERVER_TIMESTAMP}
         
@@ -47,7 +209,7 @@ async def update_intelligent_job_status(job_id: str, updates: Dict[str, Any]) ->
         elif updates.get('status') in ['completed', 'failed'] and 'processing_completed_at' not in updates:
             updates_with_timestamp['processing_completed_at'] = SERVER_TIMESTAMP
         
-        job_ref.update(updates_with_timestamp)
+        await _status_updates.update(job_id, updates_with_timestamp)
         activity.logger.info(f"Successfully updated intelligent mockup job {job_id}")
         
     except Exception as e:
@@ -65,7 +227,6 @@ async def download_artwork_and_template(artwork_url: str, mockup_template: str)
     import os
     import sys
     from dotenv import load_dotenv
-    import requests
     import google.cloud.firestore as firestore
     
     load_dotenv()
@@ -78,17 +239,19 @@ async def download_artwork_and_template(artwork_url: str, mockup_template: str)
     activity.logger.info(f"Downloading artwork from: {artwork_url}")
     activity.logger.info(f"Looking up mockup template: {mockup_template}")
     
-    try:
-        # Download artwork
-        artwork_response = requests.get(artwork_url, timeout=30)
-        artwork_response.raise_for_status()
-        artwork_bytes = artwork_response.content
-        
-        activity.logger.info(f"Downloaded artwork: {len(artwork_bytes)} bytes")
-        
+    session = _get_http_session()
+    
+    loop = asyncio.get_running_loop()
+    
+    async def download(url: str) -> bytes:
+        response = await loop.run_in_executor(None, functools.partial(session.get, url, timeout=30))
+        response.raise_for_status()
+        return response.content
+    
+    def find_template_url() -> str:
         # Get mockup template URL from Firestore
-        db = firestore.Client()
-        mockups_collection = db.collection('mockups')
+        db = _get_firestore_client()
+        mockups_collection = db.collection(MOCKUPS_COLLECTION)
         
         # Try to find mockup by ID first, then by name
         mockup_doc = mockups_collection.document(mockup_template).get()
@@ -108,13 +271,21 @@ async def download_artwork_and_template(artwork_url: str, mockup_template: str)
         if not template_url:
             raise ValueError(f"No imageUrl found for mockup template '{mockup_template}'")
         
+        return template_url
+    
+    async def download_template() -> Tuple[bytes, str]:
+        template_url = await loop.run_in_executor(None, find_template_url)
         activity.logger.info(f"Found mockup template URL: {template_url}")
+        return await download(template_url), template_url
+    
+    try:
+        # The artwork download does not depend on the template lookup, so run them side by side
+        artwork_bytes, (template_bytes, template_url) = await asyncio.gather(
+            download(artwork_url),
+            download_template()
+        )
         
-        # Download mockup template
-        template_response = requests.get(template_url, timeout=30)
-        template_response.raise_for_status()
-        template_bytes = template_response.content
-        
+        activity.logger.info(f"Downloaded artwork: {len(artwork_bytes)} bytes")
         activity.logger.info(f"Downloaded template: {len(template_bytes)} bytes")
         
         return artwork_bytes, template_bytes, template_url
@@ -140,7 +311,7 @@ async def detect_suitable_regions(template_bytes: bytes, job_id: str) -> List[Di
     if backend_path not in sys.path:
         sys.path.insert(0, backend_path)
     
-    from src.services.object_detection import NoSuitableRegionsError
+    from src.services.object_detection_types import NoSuitableRegionsError
     from src.services.opencv_detection.compatibility_wrapper import create_object_detection_service
     
     activity.logger.info(f"Starting object detection for job {job_id}")
@@ -202,7 +373,7 @@ async def transform_artwork_to_region(
         sys.path.insert(0, backend_path)
     
     from src.services.perspective_transform import PerspectiveTransformService
-    from src.services.object_detection import BoundingBox
+    from src.services.object_detection_types import BoundingBox
     
     activity.logger.info(f"Starting perspective transformation for job {job_id}")
     
@@ -260,7 +431,6 @@ async def compose_and_store_final_mockup(
     import uuid
     from dotenv import load_dotenv
     from PIL import Image
-    from google.cloud import storage
     
     load_dotenv()
     
@@ -270,12 +440,10 @@ async def compose_and_store_final_mockup(
         sys.path.insert(0, backend_path)
     
     from src.services.perspective_transform import PerspectiveTransformService
-    from src.services.object_detection import BoundingBox
+    from src.services.object_detection_types import BoundingBox
     
     activity.logger.info(f"Composing and storing final mockup for job {job_id}")
     
-    cost_tracker = CostTracker()
-    
     try:
         # Convert bytes to PIL Images
         template_image = Image.open(io.BytesIO(template_bytes))
@@ -309,7 +477,7 @@ async def compose_and_store_final_mockup(
         activity.logger.info(f"Final mockup size: {len(composite_bytes)} bytes")
         
         # Store directly to Firebase Storage
-        storage_client = storage.Client()
+        storage_client = _get_storage_client()
         BUCKET_NAME = os.getenv("FIREBASE_STORAGE_BUCKET")
         
         if not BUCKET_NAME:
@@ -341,7 +509,6 @@ async def store_intelligent_mockup_result(mockup_bytes: bytes, job_id: str) -> s
     import sys
     import uuid
     from dotenv import load_dotenv
-    from google.cloud import storage
     
     load_dotenv()
     
@@ -350,14 +517,10 @@ async def store_intelligent_mockup_result(mockup_bytes: bytes, job_id: str) -> s
     if backend_path not in sys.path:
         sys.path.insert(0, backend_path)
     
-    from src.cost_tracker import CostTracker
-    
     activity.logger.info(f"Storing intelligent mockup result for job {job_id}")
     
-    cost_tracker = CostTracker()
-    
     try:
-        storage_client = storage.Client()
+        storage_client = _get_storage_client()
         BUCKET_NAME = os.getenv("FIREBASE_STORAGE_BUCKET")
         
         if not BUCKET_NAME:
@@ -367,6 +530,14 @@ async def store_intelligent_mockup_result(mockup_bytes: bytes, job_id: str) -> s
         image_name = f"intelligent-mockups/{job_id}_{uuid.uuid4()}.png"
         blob = bucket.blob(image_name)
         
+        # Results are normally PNG already, so only decode and re-encode anything else
+        if not mockup_bytes.startswith(PNG_SIGNATURE):
+            from PIL import Image
+            
+            img_bytes = io.BytesIO()
+            Image.open(io.BytesIO(mockup_bytes)).save(img_bytes, format='PNG')
+            mockup_bytes = img_bytes.getvalue()
+        
         activity.logger.info(f"Uploading intelligent mockup to: {image_name}")
         blob.upload_from_string(mockup_bytes, content_type='image/png')
         blob.make_public()
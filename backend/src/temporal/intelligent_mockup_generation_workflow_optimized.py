@@ -116,7 +116,7 @@ async def download_and_process_images(artwork_url: str, mockup_template: str, jo
     if backend_path not in sys.path:
         sys.path.insert(0, backend_path)
     
-    from src.services.object_detection import NoSuitableRegionsError
+    from src.services.object_detection_types import NoSuitableRegionsError
     
     activity.logger.info(f"Processing images for job {job_id}")
     
@@ -2,11 +2,14 @@
 Simple Temporal workflow that matches your current setup exactly
 """
 import asyncio
+import hashlib
+import json
+import traceback
 from datetime import timedelta
 from temporalio import workflow, activity
 from temporalio.common import RetryPolicy
 from dataclasses import dataclass
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 @dataclass
 class SimpleJob:
@@ -19,6 +22,31 @@ class SimpleJob:
     prompt_upsampling: bool = False
     safety_tolerance: int = 2
 
+# Maximum length of the traceback stored in a failed job's errorMessage
+MAX_ERROR_MESSAGE_LENGTH = 1500
+
+# Job document fields forwarded to generate_art_image, as (job field, kwarg, default)
+_BFL_PARAMS = (
+    ('aspectRatio', 'aspect_ratio', '16:9'),
+    ('steps', 'steps', 28),
+    ('guidance', 'guidance', 3.0),
+    ('seed', 'seed', 42),
+    ('promptUpsampling', 'prompt_upsampling', False),
+    ('safetyTolerance', 'safety_tolerance', 2),
+)
+
+def _generation_cache_key(prompt: str, bfl_params: Dict[str, Any]) -> Optional[str]:
+    """
+    Hash the prompt and BFL parameters into a content key for reusing stored images.
+    
+    Returns None when prompt upsampling is on, since BFL rewrites the prompt
+    and the output is no longer determined by these inputs.
+    """
+    if bfl_params.get('prompt_upsampling'):
+        return None
+    payload = json.dumps({'prompt': prompt, **bfl_params}, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
 @activity.defn
 async def generate_and_store_image(job_data: Dict[str, Any]) -> str:
     """
@@ -41,7 +69,7 @@ async def generate_and_store_image(job_data: Dict[str, Any]) -> str:
     
     # Import your existing services
     from src.services.bfl_api import generate_art_image
-    from src.storage import upload_image_to_storage
+    from src.storage import find_cached_image, upload_image_to_storage
     
     activity.logger.info(f"Generating image for job {job_data['job_id']}")
     
@@ -49,21 +77,22 @@ async def generate_and_store_image(job_data: Dict[str, Any]) -> str:
     
     try:
         # Use your existing BFL API function
-        steps = job_data.get('steps', 28)
-        activity.logger.info(f"Calling BFL API with {steps} steps")
+        bfl_params = {kwarg: job_data.get(field, default) for field, kwarg, default in _BFL_PARAMS}
+        
+        # Reuse the stored image if this exact prompt and parameters were generated before
+        cache_key = _generation_cache_key(job_data['prompt'], bfl_params)
+        if cache_key:
+            cached_url = find_cached_image(cache_key)
+            if cached_url:
+                activity.logger.info(f"Reusing previously generated image: {cached_url}")
+                return cached_url
+        
+        activity.logger.info(f"Calling BFL API with {bfl_params['steps']} steps")
         
-        image_data = generate_art_image(
-            prompt=job_data['prompt'],
-            aspect_ratio=job_data.get('aspectRatio', '16:9'),
-            steps=steps,
-            guidance=job_data.get('guidance', 3.0),
-            seed=job_data.get('seed', 42),
-            prompt_upsampling=job_data.get('promptUpsampling', False),
-            safety_tolerance=job_data.get('safetyTolerance', 2)
-        )
+        image_data = generate_art_image(prompt=job_data['prompt'], **bfl_params)
         
         # Use your existing upload function
-        public_url = upload_image_to_storage(image_data)
+        public_url = upload_image_to_storage(image_data, cache_key=cache_key)
         
         activity.logger.info(f"Image uploaded successfully: {public_url}")
         return public_url
@@ -157,15 +186,23 @@ class SimpleImageWorkflow:
             
             return image_url
             
-        except Exception as e:
-            # Update job with error
-            await workflow.execute_activity(
-                update_firestore_job,
-                args=[job_id, {
-                    'status': 'error',
-                    'errorMessage': str(e)
-                }],
-                start_to_close_timeout=timedelta(seconds=30),
-                retry_policy=RetryPolicy(maximum_attempts=1)  # Don't retry error updates
-            )
+        except Exception:
+            error_text = traceback.format_exc()
+            workflow.logger.error(f"Workflow failed for job {job_id}: {error_text}")
+            
+            # Update job with error; a failure here must not replace the original error
+            try:
+                await workflow.execute_activity(
+                    update_firestore_job,
+                    args=[job_id, {
+                        'status': 'error',
+                        # Keep the tail, which holds the exception message, within a bounded size
+                        'errorMessage': error_text[-MAX_ERROR_MESSAGE_LENGTH:]
+                    }],
+                    start_to_close_timeout=timedelta(seconds=30),
+                    retry_policy=RetryPolicy(maximum_attempts=1)  # Don't retry error updates
+                )
+            except Exception as update_error:
+                workflow.logger.error(f"Failed to record error for job {job_id}: {update_error}")
+            
             raise
\ No newline at end of file
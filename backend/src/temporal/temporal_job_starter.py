@@ -3,11 +3,18 @@ Temporal Job Starter - Replaces your current app.py
 Watches Firestore and starts Temporal workflows
 """
 import asyncio
+import functools
 import os
+import signal
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv
 import google.cloud.firestore as firestore
+from google.api_core import exceptions as gcp_exceptions
+from google.api_core.retry import Retry, if_exception_type
 from temporalio.client import Client
+from temporalio.exceptions import WorkflowAlreadyStartedError
 
 # Add backend directory to Python path
 backend_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
@@ -16,103 +23,255 @@ if backend_path not in sys.path:
 
 from src.temporal.simple_workflow import SimpleImageWorkflow
 from src.temporal.intelligent_mockup_generation_workflow_optimized import IntelligentMockupGenerationWorkflow
-from src.utils.logging_config import get_logger
+from src.utils.logging_config import configure_logging, get_logger
 
 # Load environment variables like your current worker
 load_dotenv()
 
+# Maximum number of jobs handled at once; further claimed jobs wait for a free slot
+MAX_CONCURRENT_JOBS = int(os.getenv('WORKER_CONCURRENCY', '16'))
+
+# Seconds between polls for pending jobs; doubles up to the maximum while nothing is pending
+JOB_POLL_INTERVAL = float(os.getenv('JOB_POLL_INTERVAL', '2'))
+JOB_POLL_MAX_INTERVAL = float(os.getenv('JOB_POLL_MAX_INTERVAL', '30'))
+
+# Maximum number of pending jobs claimed per poll
+JOB_POLL_LIMIT = 32
+
+# Seconds a claimed job may go without its workflow start being recorded before
+# another poll takes it over, e.g. after the claiming starter died
+JOB_CLAIM_LEASE = float(os.getenv('JOB_CLAIM_LEASE', '300'))
+
+# Firestore accepts at most 500 writes per batch commit
+FIRESTORE_BATCH_LIMIT = 500
+
+# Retry batch commits on contention and transient backend errors
+BATCH_COMMIT_RETRY = Retry(
+    predicate=if_exception_type(
+        gcp_exceptions.Aborted,
+        gcp_exceptions.DeadlineExceeded,
+        gcp_exceptions.ServiceUnavailable,
+    ),
+    initial=0.5,
+    maximum=8.0,
+    multiplier=2.0,
+    timeout=30.0,
+)
+
 # Get logger
 logger = get_logger('temporal_job_starter')
 
+@firestore.transactional
+def _claim_job(transaction, doc_ref, from_status, claimed_at=None):
+    """
+    Move a job to 'processing' inside a transaction and stamp its claim lease.
+    
+    A pending job is claimed while it still has from_status. An expired claim
+    is taken over by passing the claimed_at the poll saw; the job must still be
+    'processing' with that same lease, so only one starter wins; an expired
+    lease on a job that has moved on is just removed. Only the claim fields
+    are re-read, since the caller already holds the full document from the
+    query. Returns False if the job was not claimed.
+    """
+    snapshot = doc_ref.get(field_paths=['status', 'claimed_at'], transaction=transaction)
+    if not snapshot.exists:
+        return False
+    fields = snapshot.to_dict()
+    if claimed_at is not None and fields.get('claimed_at') != claimed_at:
+        return False
+    if fields.get('status') != from_status:
+        if claimed_at is not None:
+            # The workflow moved the job on; drop the lease so polls stop finding it
+            transaction.update(doc_ref, {'claimed_at': firestore.DELETE_FIELD})
+        return False
+    transaction.update(doc_ref, {'status': 'processing', 'claimed_at': datetime.now(timezone.utc)})
+    return True
+
 class TemporalJobStarter:
     def __init__(self):
         self.db = firestore.Client()
         self.temporal_client = None
+        self._stop_event = None
+        self._pollers = []
+        self._job_slots = None
+        # Runs blocking Firestore calls so they don't stall the event loop
+        self._executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_JOBS, thread_name_prefix='job-starter')
+    
+    def stop(self):
+        """Request a graceful shutdown of the job starter"""
+        if self._stop_event is not None:
+            self._stop_event.set()
         
     async def start(self):
-        print("🚀 Starting Temporal Job Starter...")
+        logger.info("🚀 Starting Temporal Job Starter...")
         
-        # Store the event loop for use in Firestore callbacks
+        # Store the event loop for running blocking Firestore calls
         self.loop = asyncio.get_event_loop()
         
+        # Wake the main coroutine only when asked to stop
+        self._stop_event = asyncio.Event()
+        self._job_slots = asyncio.Semaphore(MAX_CONCURRENT_JOBS)
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                self.loop.add_signal_handler(sig, self.stop)
+            except NotImplementedError:
+                # Signal handlers are not supported by Windows event loops
+                pass
+        
         # Connect to Temporal
         try:
             self.temporal_client = await Client.connect("localhost:7233")
-            print("✅ Connected to Temporal server")
+            logger.info("✅ Connected to Temporal server")
         except Exception as e:
-            print(f"❌ Failed to connect to Temporal: {e}")
-            print("💡 Make sure Temporal server is running!")
+            logger.error(f"❌ Failed to connect to Temporal: {e}")
+            logger.error("💡 Make sure Temporal server is running!")
             return
         
-        # Set up Firestore listeners
-        # Listen for jobs
-        jobs_collection_ref = self.db.collection('jobs')
-        jobs_query_ref = jobs_collection_ref.where(filter=firestore.FieldFilter('status', '==', 'pending_art_generation'))
-        jobs_query_ref.on_snapshot(self.handle_job_changes)
+        # Poll Firestore for pending jobs
+        self._pollers = [
+            asyncio.ensure_future(self._poll_jobs('jobs', 'pending_art_generation', self.process_job)),
+            asyncio.ensure_future(self._poll_jobs('intelligent_mockup_jobs', 'pending', self.process_intelligent_mockup_job)),
+        ]
         
-        # Listen for intelligent mockup jobs
-        intelligent_mockup_jobs_collection_ref = self.db.collection('intelligent_mockup_jobs')
-        intelligent_mockup_jobs_query_ref = intelligent_mockup_jobs_collection_ref.where(filter=firestore.FieldFilter('status', '==', 'pending'))
-        intelligent_mockup_jobs_query_ref.on_snapshot(self.handle_intelligent_mockup_changes)
+        logger.info("🔥 Polling Firestore for pending jobs...")
+        logger.info("📋 Watching for jobs with status: 'pending_art_generation'")
+        logger.info("🧠 Watching for intelligent_mockup_jobs with status: 'pending'")
+        logger.info("🌐 Temporal UI: http://localhost:8080")
+        logger.info("🛑 Press Ctrl+C to stop")
         
-        print("🔥 Listening for Firestore changes...")
-        print("📋 Watching for jobs with status: 'pending_art_generation'")
-        print("🧠 Watching for intelligent_mockup_jobs with status: 'pending'")
-        print("🌐 Temporal UI: http://localhost:8080")
-        print("🛑 Press Ctrl+C to stop")
-        
-        # Keep running
+        # Keep running until SIGINT/SIGTERM
         try:
-            while True:
-                await asyncio.sleep(1)
+            await self._stop_event.wait()
         except KeyboardInterrupt:
-            print("\n🛑 Shutting down...")
+            pass
+        finally:
+            logger.info("\n🛑 Shutting down...")
+            await asyncio.gather(*self._pollers, return_exceptions=True)
+            self._pollers.clear()
+            self._executor.shutdown(wait=True)
+    
+    def _claim_pending_jobs(self, collection_name, pending_status):
+        """
+        Query pending jobs and jobs with an expired claim, and claim each
+        one transactionally (blocking)
+        """
+        query = (
+            self.db.collection(collection_name)
+            .where(filter=firestore.FieldFilter('status', '==', pending_status))
+            .limit(JOB_POLL_LIMIT)
+        )
+        claimed = []
+        for doc in query.stream():
+            if _claim_job(self.db.transaction(), doc.reference, pending_status):
+                claimed.append(doc)
+        
+        # Claims whose workflow start was never recorded: the starter died
+        # or its batch commit failed. Single-field range, so no composite index.
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=JOB_CLAIM_LEASE)
+        expired = (
+            self.db.collection(collection_name)
+            .where(filter=firestore.FieldFilter('claimed_at', '<', cutoff))
+            .limit(JOB_POLL_LIMIT)
+        )
+        for doc in expired.stream():
+            if _claim_job(self.db.transaction(), doc.reference, 'processing', doc.get('claimed_at')):
+                logger.warning(f"⚠️ Taking over job {doc.id} whose claim expired")
+                claimed.append(doc)
+        return claimed
+    
+    async def _poll_jobs(self, collection_name, pending_status, process):
+        """Claim and process pending jobs until the starter is stopped"""
+        interval = JOB_POLL_INTERVAL
+        while not self._stop_event.is_set():
+            try:
+                documents = await self._run_blocking(self._claim_pending_jobs, collection_name, pending_status)
+            except Exception as e:
+                logger.error(f"❌ Failed to poll {collection_name}: {e}")
+                documents = []
+            
+            if documents:
+                await self._process_burst(process, documents)
+                interval = JOB_POLL_INTERVAL
+            else:
+                # Back off while the queue is empty
+                interval = min(interval * 2, JOB_POLL_MAX_INTERVAL)
+            
+            try:
+                await asyncio.wait_for(self._stop_event.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+    
+    async def _run_bounded(self, coro):
+        """Run a job coroutine once a concurrency slot is free"""
+        async with self._job_slots:
+            return await coro
     
-    def handle_job_changes(self, collection_snapshot, changes, read_time):
-        """Handle Firestore job changes"""
-        for change in changes:
-            if change.type.name == 'ADDED':
-                # Schedule the async task in the main event loop
-                asyncio.run_coroutine_threadsafe(
-                    self.process_job(change.document),
-                    self.loop
-                )
+    async def _process_burst(self, process, documents):
+        """
+        Process all documents claimed in one poll, then write the updates
+        that release their claims in as few batch commits as possible
+        """
+        results = await asyncio.gather(
+            *(self._run_bounded(process(document)) for document in documents),
+            return_exceptions=True
+        )
+        updates = []
+        for document, result in zip(documents, results):
+            if isinstance(result, Exception):
+                logger.error(f"❌ Failed to process job {document.id}: {result}")
+            elif result is not None:
+                updates.append(result)
+        if updates:
+            await self._commit_updates(updates)
     
-    def handle_intelligent_mockup_changes(self, collection_snapshot, changes, read_time):
-        """Handle Firestore intelligent mockup job changes"""
-        for change in changes:
-            if change.type.name == 'ADDED':
-                # Schedule the async task in the main event loop
-                asyncio.run_coroutine_threadsafe(
-                    self.process_intelligent_mockup_job(change.document),
-                    self.loop
-                )
+    async def _commit_updates(self, updates):
+        """Apply (document_ref, fields) updates using Firestore write batches"""
+        for start in range(0, len(updates), FIRESTORE_BATCH_LIMIT):
+            chunk = updates[start:start + FIRESTORE_BATCH_LIMIT]
+            try:
+                batch = self.db.batch()
+                for doc_ref, fields in chunk:
+                    batch.update(doc_ref, fields)
+                await self._run_blocking(batch.commit, retry=BATCH_COMMIT_RETRY)
+                logger.info(f"📝 Updated {len(chunk)} job(s): {', '.join(ref.id for ref, _ in chunk)}")
+            except Exception as update_error:
+                # The claims stay leased, so a later poll takes these jobs over
+                logger.error(f"❌ Failed to update job status, retrying after the claim lease: {update_error}")
+    
+    async def _run_blocking(self, func, *args, **kwargs):
+        """Run a blocking Firestore call on the job executor"""
+        return await self.loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
     
     async def process_job(self, doc_snapshot):
-        """Process a single job by starting a Temporal workflow"""
+        """
+        Process a single job by starting a Temporal workflow.
+        
+        Returns the (document_ref, fields) update that releases the job's
+        claim, with an error status if the workflow could not be started.
+        """
         job_id = doc_snapshot.id
         job_data = doc_snapshot.to_dict()
         job_data['job_id'] = job_id  # Add job_id to data
+        job_data.pop('claimed_at', None)
         
         # Debug logging with sanitization
         from src.utils import sanitize_log_data
-        print(f"DEBUG: job_id = {job_id}")
-        print(f"DEBUG: job_data keys before processing = {list(job_data.keys())}")
-        print(f"DEBUG: 'job_id' in job_data = {'job_id' in job_data}")
+        logger.debug(f"job_id = {job_id}")
+        logger.debug(f"job_data keys before processing = {list(job_data.keys())}")
+        logger.debug(f"'job_id' in job_data = {'job_id' in job_data}")
         
         # Convert Firestore timestamps to ISO strings for JSON serialization
-        if 'createdAt' in job_data and job_data['createdAt']:
-            job_data['createdAt'] = job_data['createdAt'].isoformat()
-        if 'updatedAt' in job_data and job_data['updatedAt']:
-            job_data['updatedAt'] = job_data['updatedAt'].isoformat()
+        for key, value in job_data.items():
+            if hasattr(value, 'isoformat'):
+                job_data[key] = value.isoformat()
         
-        print(f"\n🆕 New job detected: {job_id}")
+        logger.info(f"\n🆕 New job detected: {job_id}")
         sanitized_prompt = sanitize_log_data(job_data.get('prompt', 'No prompt'))
-        print(f"📝 Prompt: {sanitized_prompt}")
+        logger.info(f"📝 Prompt: {sanitized_prompt}")
         
         # Final debug check before workflow start
-        print(f"DEBUG: Final job_data keys = {list(job_data.keys())}")
-        print(f"DEBUG: Final 'job_id' in job_data = {'job_id' in job_data}")
+        logger.debug(f"Final job_data keys = {list(job_data.keys())}")
+        logger.debug(f"Final 'job_id' in job_data = {'job_id' in job_data}")
         
         try:
             # Start the workflow
@@ -123,25 +282,33 @@ class TemporalJobStarter:
                 task_queue="image-generation-queue",
             )
             
-            print(f"✅ Temporal workflow started: {handle.id}")
-            print(f"🔗 View progress: http://localhost:8080/namespaces/default/workflows/{handle.id}")
+            logger.info(f"✅ Temporal workflow started: {handle.id}")
+            logger.info(f"🔗 View progress: http://localhost:8080/namespaces/default/workflows/{handle.id}")
             
+        except WorkflowAlreadyStartedError:
+            # A previous claim started it before its lease expired
+            logger.info(f"✅ Temporal workflow already running for job {job_id}")
+        
         except Exception as e:
             logger.error(f"❌ Failed to start workflow for job {job_id}: {e}")
             
-            # Update job with error
-            try:
-                job_ref = self.db.collection('jobs').document(job_id)
-                job_ref.update({
-                    'status': 'error',
-                    'errorMessage': f"Failed to start workflow: {str(e)}"
-                })
-                print(f"📝 Updated job {job_id} with error status")
-            except Exception as update_error:
-                print(f"❌ Failed to update job error status: {update_error}")
+            # Return the error update so it is committed with the rest of the burst
+            job_ref = doc_snapshot.reference
+            return job_ref, {
+                'status': 'error',
+                'errorMessage': f"Failed to start workflow: {str(e)}",
+                'claimed_at': firestore.DELETE_FIELD
+            }
+        
+        return doc_snapshot.reference, {'claimed_at': firestore.DELETE_FIELD}
     
     async def process_intelligent_mockup_job(self, doc_snapshot):
-        """Process an intelligent mockup job by starting the AI-powered Temporal workflow"""
+        """
+        Process an intelligent mockup job by starting the AI-powered Temporal workflow.
+        
+        Returns the (document_ref, fields) update that releases the job's
+        claim, with a failed status if the workflow could not be started.
+        """
         intelligent_job_id = doc_snapshot.id
         intelligent_job_data = doc_snapshot.to_dict()
         
@@ -170,21 +337,26 @@ class TemporalJobStarter:
             logger.info(f"✅ Intelligent mockup workflow started: {handle.id}")
             logger.info(f"🔗 View progress: http://localhost:8080/namespaces/default/workflows/{handle.id}")
             
+        except WorkflowAlreadyStartedError:
+            # A previous claim started it before its lease expired
+            logger.info(f"✅ Intelligent mockup workflow already running for {intelligent_job_id}")
+        
         except Exception as e:
             logger.error(f"❌ Failed to start intelligent mockup workflow for {intelligent_job_id}: {e}")
             
-            # Update intelligent mockup job with error
-            try:
-                intelligent_job_ref = self.db.collection('intelligent_mockup_jobs').document(intelligent_job_id)
-                intelligent_job_ref.update({
-                    'status': 'failed',
-                    'error_message': f"Failed to start workflow: {str(e)}"
-                })
-                print(f"📝 Updated intelligent mockup job {intelligent_job_id} with error status")
-            except Exception as update_error:
-                print(f"❌ Failed to update intelligent mockup job error status: {update_error}")
+            # Return the error update so it is committed with the rest of the burst
+            intelligent_job_ref = doc_snapshot.reference
+            return intelligent_job_ref, {
+                'status': 'failed',
+                'error_message': f"Failed to start workflow: {str(e)}",
+                'claimed_at': firestore.DELETE_FIELD
+            }
+        
+        return doc_snapshot.reference, {'claimed_at': firestore.DELETE_FIELD}
 
 async def main():
+    # Log through the background queue listener so job handling never blocks on stdout
+    configure_logging()
     starter = TemporalJobStarter()
     await starter.start()
 
@@ -22,8 +22,12 @@ from src.temporal.intelligent_mockup_generation_workflow import (
     compose_and_store_final_mockup,
     store_intelligent_mockup_result
 )
+from src.utils.logging_config import configure_logging
 
 async def main():
+    # Log through the background queue listener so activities never block on stdout
+    configure_logging()
+    
     # Connect to Temporal server
     client = await Client.connect("localhost:7233")
     
@@ -21,8 +21,12 @@ from src.temporal.intelligent_mockup_generation_workflow_optimized import (
     create_intelligent_mockup,
     store_multiple_mockup_results
 )
+from src.utils.logging_config import configure_logging
 
 async def main():
+    # Log through the background queue listener so activities never block on stdout
+    configure_logging()
+    
     # Connect to Temporal server
     client = await Client.connect("localhost:7233")
     
@@ -7,12 +7,37 @@ sensitive information like API keys, URLs with tokens, and personal data.
 
 import re
 import os
-from typing import Any, Dict, List, Union, Set
+import threading
+from typing import Any, Dict, FrozenSet, List, Set, Tuple, Union
 from copy import deepcopy
 import logging
 
 logger = logging.getLogger(__name__)
 
+try:
+    # Third-party engine with atomic groups, which stop backtracking on hostile log content
+    import regex as _pattern_engine
+    _PATTERN_FLAGS = _pattern_engine.V1
+    _ATOMIC = '(?>{})'
+except ImportError:
+    _pattern_engine = re
+    _PATTERN_FLAGS = 0
+    _ATOMIC = '(?:{})'
+
+
+def _compile_pattern(pattern: str):
+    """Compile a sanitizer pattern with the best available regex engine."""
+    return _pattern_engine.compile(pattern, _PATTERN_FLAGS)
+
+
+# Splits keys into lowercase word tokens on separators and camelCase boundaries
+_KEY_TOKEN_PATTERN = re.compile(r'[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+')
+
+
+def _tokenize(key: str) -> List[str]:
+    """Split a field name into lowercase tokens (e.g. 'bflApiKey' -> ['bfl', 'api', 'key'])."""
+    return [token.lower() for token in _KEY_TOKEN_PATTERN.findall(key)]
+
 
 class LogSanitizer:
     """Sanitizes log data by removing or masking sensitive information."""
@@ -28,17 +53,23 @@ class LogSanitizer:
     # Patterns to detect sensitive data
     PATTERNS = {
         # API Keys and tokens (generic pattern for alphanumeric strings)
-        'api_key': re.compile(r'(?i)(api[_-]?key|token|bearer|auth)["\']?\s*[:=]\s*["\']?([a-zA-Z0-9\-_]{20,})["\']?'),
+        'api_key': _compile_pattern(
+            r'(?i)(api[_-]?key|token|bearer|auth)["\']?\s*[:=]\s*["\']?(' + _ATOMIC.format(r'[a-zA-Z0-9\-_]{20,}') + r')["\']?'
+        ),
         # URLs with potential tokens or keys
-        'url_with_token': re.compile(r'(https?://[^\s]+[?&])(token|key|auth|api_key)=([^&\s]+)'),
+        'url_with_token': _compile_pattern(
+            r'(https?://[^\s]+[?&])(token|key|auth|api_key)=(' + _ATOMIC.format(r'[^&\s]+') + r')'
+        ),
         # Email addresses
-        'email': re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'),
+        'email': _compile_pattern(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'),
         # Credit card numbers (basic pattern)
-        'credit_card': re.compile(r'\b(?:\d{4}[\s\-]?){3}\d{4}\b'),
+        'credit_card': _compile_pattern(r'\b(?:\d{4}[\s\-]?){3}\d{4}\b'),
         # Social Security Numbers
-        'ssn': re.compile(r'\b\d{3}-\d{2}-\d{4}\b'),
+        'ssn': _compile_pattern(r'\b\d{3}-\d{2}-\d{4}\b'),
         # Firebase/GCS URLs with specific paths
-        'storage_url': re.compile(r'(https?://[^/]+/[^?]+)(\?[^\s]+)?'),
+        'storage_url': _compile_pattern(
+            r'(https?://' + _ATOMIC.format(r'[^/]+') + '/' + _ATOMIC.format(r'[^?]+') + r')(\?[^\s]+)?'
+        ),
     }
     
     def __init__(self, 
@@ -64,6 +95,69 @@ class LogSanitizer:
         # Add fields from environment
         env_fields = os.getenv('LOG_SENSITIVE_FIELDS', '').split(',')
         self.sensitive_fields.update(field.strip().lower() for field in env_fields if field.strip())
+        
+        # Hash-based lookup structures for key checks, kept in one tuple so a
+        # reconfigure() swaps the field set and its cache together
+        sensitive_set = frozenset(self.sensitive_fields)
+        max_field_tokens = max((len(_tokenize(field)) for field in sensitive_set), default=1)
+        self._key_lookup: Tuple[FrozenSet[str], int, Dict[str, bool]] = (sensitive_set, max_field_tokens, {})
+        self._reconfigure_lock = threading.Lock()
+    
+    def reconfigure(self, **kwargs) -> None:
+        """
+        Replace this sanitizer's settings while other threads may be using it.
+        
+        The new state is built on a separate instance first and then swapped in
+        under a lock, so a concurrent is_sensitive_key() sees either the old key
+        lookup or the new one, never a mix of the two.
+        
+        Args:
+            **kwargs: Arguments accepted by the LogSanitizer constructor
+        """
+        fresh = LogSanitizer(**kwargs)
+        state = {name: value for name, value in vars(fresh).items() if name != '_reconfigure_lock'}
+        with self._reconfigure_lock:
+            vars(self).update(state)
+    
+    def is_sensitive_key(self, key: Any) -> bool:
+        """
+        Check whether a field name indicates sensitive data.
+        
+        Runs of adjacent key tokens are joined with '_' and '' and probed against
+        the sensitive field set, so 'bflApiKey' and 'api-key' match 'api_key'.
+        Keys without a token hit fall back to a substring scan, and results are
+        cached per key since the same field names recur across log records.
+        
+        Args:
+            key: The field name to check
+            
+        Returns:
+            True if the key should have its value masked
+        """
+        key = str(key)
+        # One read, so a concurrent reconfigure() can't pair the old set with the new cache
+        sensitive_set, max_field_tokens, key_cache = self._key_lookup
+        cached = key_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        tokens = _tokenize(key)
+        candidates = set()
+        for start in range(len(tokens)):
+            for end in range(start + 1, min(start + max_field_tokens, len(tokens)) + 1):
+                run = tokens[start:end]
+                candidates.add('_'.join(run))
+                candidates.add(''.join(run))
+        
+        is_sensitive = bool(sensitive_set.intersection(candidates))
+        if not is_sensitive:
+            key_lower = key.lower()
+            is_sensitive = any(sensitive in key_lower for sensitive in sensitive_set)
+        
+        if len(key_cache) >= 4096:
+            key_cache.clear()
+        key_cache[key] = is_sensitive
+        return is_sensitive
     
     def mask_value(self, value: str, preserve_ends: bool = True) -> str:
         """
@@ -150,7 +244,7 @@ class LogSanitizer:
             max_depth: Maximum recursion depth
             
         Returns:
-            Sanitized dictionary
+            Sanitized dictionary, or the original dictionary if nothing needed masking
         """
         if depth > max_depth:
             return {"_error": "Max depth exceeded"}
@@ -158,27 +252,32 @@ class LogSanitizer:
         if not isinstance(data, dict):
             return data
         
-        # Create a copy to avoid modifying original
-        sanitized = {}
+        # Collect sanitized items first; only build a new dict if something changed
+        items = []
+        dirty = False
         
         for key, value in data.items():
             # Check if key indicates sensitive data
-            if any(sensitive in key.lower() for sensitive in self.sensitive_fields):
-                sanitized[key] = self.mask_value(str(value)) if value is not None else None
+            if self.is_sensitive_key(key):
+                new_value = self.mask_value(str(value)) if value is not None else None
             elif isinstance(value, dict):
                 # Recursively sanitize nested dictionaries
-                sanitized[key] = self.sanitize_dict(value, depth + 1, max_depth)
+                new_value = self.sanitize_dict(value, depth + 1, max_depth)
             elif isinstance(value, list):
                 # Sanitize lists
-                sanitized[key] = self.sanitize_list(value, depth + 1, max_depth)
+                new_value = self.sanitize_list(value, depth + 1, max_depth)
             elif isinstance(value, str):
                 # Sanitize string values
-                sanitized[key] = self.sanitize_string(value)
+                new_value = self.sanitize_string(value)
             else:
                 # Keep other types as-is
-                sanitized[key] = value
+                new_value = value
+            
+            dirty = dirty or new_value is not value
+            items.append((key, new_value))
         
-        return sanitized
+        # Clean dictionaries are returned as-is to avoid reallocating them
+        return dict(items) if dirty else data
     
     def sanitize_list(self, data: List[Any], depth: int = 0, max_depth: int = 10) -> List[Any]:
         """
@@ -190,23 +289,28 @@ class LogSanitizer:
             max_depth: Maximum recursion depth
             
         Returns:
-            Sanitized list
+            Sanitized list, or the original list if nothing needed masking
         """
         if depth > max_depth:
             return ["_error: Max depth exceeded"]
         
         sanitized = []
+        dirty = False
+        
         for item in data:
             if isinstance(item, dict):
-                sanitized.append(self.sanitize_dict(item, depth + 1, max_depth))
+                new_item = self.sanitize_dict(item, depth + 1, max_depth)
             elif isinstance(item, list):
-                sanitized.append(self.sanitize_list(item, depth + 1, max_depth))
+                new_item = self.sanitize_list(item, depth + 1, max_depth)
             elif isinstance(item, str):
-                sanitized.append(self.sanitize_string(item))
+                new_item = self.sanitize_string(item)
             else:
-                sanitized.append(item)
+                new_item = item
+            
+            dirty = dirty or new_item is not item
+            sanitized.append(new_item)
         
-        return sanitized
+        return sanitized if dirty else data
     
     def sanitize(self, data: Any) -> Any:
         """
@@ -228,41 +332,30 @@ class LogSanitizer:
             return data
 
 
-# Global instance for convenience
-_default_sanitizer = None
+# Global instance for convenience, created at import so lookups stay cheap
+_default_sanitizer = LogSanitizer()
+
+# Sanitize data using the default sanitizer; bound directly to skip a wrapper call per record
+sanitize_log_data = _default_sanitizer.sanitize
 
 
 def get_sanitizer() -> LogSanitizer:
     """Get the default log sanitizer instance."""
-    global _default_sanitizer
-    if _default_sanitizer is None:
-        _default_sanitizer = LogSanitizer()
     return _default_sanitizer
 
 
-def sanitize_log_data(data: Any) -> Any:
-    """
-    Convenience function to sanitize log data using the default sanitizer.
-    
-    Args:
-        data: Data to sanitize
-        
-    Returns:
-        Sanitized data
-    """
-    return get_sanitizer().sanitize(data)
-
-
 def configure_sanitizer(**kwargs) -> LogSanitizer:
     """
     Configure and return the global sanitizer instance.
     
+    The instance is reconfigured in place so that references to
+    sanitize_log_data imported elsewhere pick up the new configuration.
+    
     Args:
         **kwargs: Arguments to pass to LogSanitizer constructor
         
     Returns:
         Configured LogSanitizer instance
     """
-    global _default_sanitizer
-    _default_sanitizer = LogSanitizer(**kwargs)
-    return _default_sanitizer
\ No newline at end of file
+    _default_sanitizer.reconfigure(**kwargs)
+    return _default_sanitizer
@@ -4,12 +4,25 @@ Logging configuration for the backend services.
 This module provides centralized logging configuration with sanitization support.
 """
 
+import atexit
+import copy
 import logging
+import logging.handlers
 import os
+import queue
 import sys
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 from .log_sanitizer import sanitize_log_data
 
+# Argument types that can carry sensitive data and need sanitizing
+_SANITIZABLE_TYPES = (str, dict, list)
+
+# Mutable argument types copied when a record is queued
+_CONTAINER_TYPES = (dict, list)
+
+# Background listener that formats and writes queued log records
+_queue_listener: Optional[logging.handlers.QueueListener] = None
+
 
 class SanitizingFormatter(logging.Formatter):
     """Custom formatter that sanitizes log records before formatting."""
@@ -25,16 +38,65 @@ class SanitizingFormatter(logging.Formatter):
             if isinstance(record.args, dict):
                 record.args = sanitize_log_data(record.args)
             elif isinstance(record.args, tuple):
-                record.args = tuple(sanitize_log_data(arg) for arg in record.args)
+                # Only rebuild the tuple when an arg can actually carry sensitive data
+                for arg in record.args:
+                    if isinstance(arg, _SANITIZABLE_TYPES):
+                        record.args = tuple(
+                            sanitize_log_data(a) if isinstance(a, _SANITIZABLE_TYPES) else a
+                            for a in record.args
+                        )
+                        break
         
         # Format the record
         return super().format(record)
 
 
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue handler that leaves message formatting to the listener thread.
+    
+    The stock QueueHandler merges args into the message before enqueueing,
+    which would run formatting on the caller's thread and hide dict args from
+    key-based sanitization. Records are only copied here; formatting and
+    sanitization happen in the QueueListener's handlers. Dict and list
+    arguments get a shallow copy, so a caller rebinding their keys or items
+    after the log call doesn't change what gets logged; nested containers are
+    still shared and must not be mutated after logging.
+    """
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Return a copy of the record for the queue with container arguments snapshotted."""
+        record = copy.copy(record)
+        if isinstance(record.msg, _CONTAINER_TYPES):
+            record.msg = _snapshot(record.msg)
+        if isinstance(record.args, dict):
+            record.args = _snapshot(record.args)
+        elif record.args and any(isinstance(arg, _CONTAINER_TYPES) for arg in record.args):
+            record.args = tuple(
+                _snapshot(arg) if isinstance(arg, _CONTAINER_TYPES) else arg
+                for arg in record.args
+            )
+        return record
+
+
+def _snapshot(value: Any) -> Any:
+    """Shallow-copy a logged dict or list."""
+    return dict(value) if isinstance(value, dict) else list(value)
+
+
+def _stop_queue_listener() -> None:
+    """Flush and stop the background logging listener, if running."""
+    global _queue_listener
+    if _queue_listener is not None:
+        _queue_listener.stop()
+        _queue_listener = None
+
+
 def configure_logging(
     level: str = None,
     format_string: str = None,
-    enable_sanitization: bool = True
+    enable_sanitization: bool = True,
+    use_queue: bool = True
 ) -> None:
     """
     Configure logging for the application.
@@ -43,6 +105,8 @@ def configure_logging(
         level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
         format_string: Log format string
         enable_sanitization: Whether to enable log sanitization
+        use_queue: If True, sanitize, format and write records on a background
+            QueueListener thread so logging callers only enqueue the record
     """
     # Get configuration from environment or use defaults
     log_level = level or os.getenv('LOG_LEVEL', 'INFO')
@@ -62,6 +126,16 @@ def configure_logging(
     
     handler.setFormatter(formatter)
     
+    # Replace any listener from a previous configuration
+    _stop_queue_listener()
+    
+    if use_queue:
+        global _queue_listener
+        log_queue = queue.Queue(-1)
+        _queue_listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+        _queue_listener.start()
+        handler = DeferredQueueHandler(log_queue)
+    
     # Configure root logger
     root_logger = logging.getLogger()
     root_logger.setLevel(getattr(logging, log_level.upper()))
@@ -84,6 +158,9 @@ def configure_logging(
         logger.propagate = True
 
 
+atexit.register(_stop_queue_listener)
+
+
 def get_logger(name: str) -> logging.Logger:
     """
     Get a logger with the given name.
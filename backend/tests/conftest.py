@@ -0,0 +1,113 @@
+"""
+Shared pytest fixtures.
+
+Images here are created once per session and handed to every test that asks
+for them, so tests must treat them as read-only.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+from PIL import Image
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _opencv_threads():
+    """
+    Configure OpenCV once per session.
+    
+    OpenCV's pool gets half the cores, since xdist runs several workers side
+    by side. The detection services' thread policy only applies once per
+    process, so setting it here keeps services built by tests from resizing
+    the pool.
+    """
+    try:
+        import cv2
+        from src.services.opencv_detection.opencv_detection_service import apply_thread_policy
+    except ImportError:
+        return
+    apply_thread_policy(1, cpu_budget=max(1, (os.cpu_count() or 2) // 2))
+    cv2.setUseOptimized(True)
+
+
+@pytest.fixture(autouse=True)
+def _reset_storage_client():
+    """Drop the shared Cloud Storage client after each test, so a client built from mocks doesn't leak."""
+    yield
+    storage_module = sys.modules.get('src.storage')
+    if storage_module is not None:
+        storage_module._storage_client = None
+
+
+@pytest.fixture(scope="session")
+def white_image_800x600():
+    """White 800x600 RGB template image."""
+    return Image.new('RGB', (800, 600), color='white')
+
+
+@pytest.fixture(scope="session")
+def blank_image_200x200():
+    """Black 200x200 BGR array in the shape OpenCV detectors receive."""
+    image = np.zeros((200, 200, 3), dtype=np.uint8)
+    image.flags.writeable = False
+    return image
+
+
+@pytest.fixture(scope="session")
+def noise_image_200x200():
+    """200x200 RGB image of uniform noise from a fixed seed, so detections are reproducible."""
+    rng = np.random.default_rng(seed=42)
+    return Image.fromarray(rng.integers(0, 256, (200, 200, 3), dtype=np.uint8))
+
+
+@pytest.fixture(scope="session")
+def torch():
+    """The torch module, imported on first use; tests needing it skip when it is missing."""
+    return pytest.importorskip("torch")
+
+
+@pytest.fixture
+def mocked_detr_service(torch):
+    """
+    ObjectDetectionService with its processor and model replaced by mocks.
+    
+    Returns (service, processor, model). The processor post-processes to a
+    picture frame (0.85) and a laptop (0.75); tests override what they need.
+    """
+    from unittest.mock import Mock
+    from src.services.object_detection import ObjectDetectionService, ObjectDetectionConfig
+    
+    service = ObjectDetectionService(ObjectDetectionConfig(confidence_threshold=0.5))
+    processor, model = Mock(), Mock()
+    service._processor, service._model = processor, model
+    
+    model.config.id2label = {0: "picture frame", 1: "laptop"}
+    inputs = Mock()
+    inputs.to.return_value = inputs
+    processor.return_value = {"pixel_values": inputs}
+    processor.post_process_object_detection.return_value = [{
+        "scores": torch.tensor([0.85, 0.75]),
+        "labels": torch.tensor([0, 1]),
+        "boxes": torch.tensor([[400, 300, 200, 150], [600, 200, 150, 100]])  # center_x, center_y, width, height
+    }]
+    return service, processor, model
+
+
+@pytest.fixture(scope="session")
+def detr_service(torch):
+    """
+    Real ObjectDetectionService with the DETR model loaded once per session.
+    
+    Loading downloads and initializes the weights, so only tests marked slow
+    should ask for it; they skip when the model cannot be loaded.
+    """
+    from src.services.object_detection import ObjectDetectionService
+    
+    service = ObjectDetectionService()
+    try:
+        service._load_model()
+    except Exception:
+        pytest.skip("DETR models not available")
+    return service
@@ -0,0 +1,156 @@
+"""
+Tests for reusing stored images of identical generations
+"""
+
+import sys
+from types import ModuleType
+from unittest.mock import Mock, patch
+
+import pytest
+from temporalio.testing import ActivityEnvironment
+
+from src import storage
+from src.temporal.simple_workflow import _BFL_PARAMS, _generation_cache_key, generate_and_store_image
+
+
+def _bfl_params(job_data):
+    """BFL parameters the activity derives from a job document."""
+    return {kwarg: job_data.get(field, default) for field, kwarg, default in _BFL_PARAMS}
+
+
+@pytest.fixture
+def bucket():
+    """Mocked storage bucket, with the in-process key cache emptied around each test."""
+    bucket = Mock()
+    bucket.blob.side_effect = lambda name, **kwargs: Mock(public_url=f"https://storage.example.com/{name}")
+    storage._cached_urls.clear()
+    with patch.object(storage, '_get_bucket', return_value=bucket):
+        yield bucket
+    storage._cached_urls.clear()
+
+
+class TestStorageClient:
+    """Test cases for the shared Cloud Storage client."""
+    
+    def test_client_built_once_with_pooled_session(self):
+        """Test credential discovery runs once and the client's session uses the shared adapter."""
+        with patch('src.storage.google.auth.default', return_value=(Mock(), 'test-project')) as auth_default, \
+                patch('src.storage.storage.Client') as client_class:
+            first = storage._get_storage_client()
+            second = storage._get_storage_client()
+        
+        assert first is second
+        auth_default.assert_called_once()
+        client_class.assert_called_once()
+        session = client_class.call_args.kwargs['_http']
+        assert session.get_adapter('https://storage.googleapis.com') is storage._HTTP_ADAPTER
+        assert client_class.call_args.kwargs['project'] == 'test-project'
+
+
+class TestGenerationCacheKey:
+    """Test cases for the content key of a generation."""
+    
+    def test_key_independent_of_field_order(self):
+        """Test the same job fields in a different order hash to the same key."""
+        job = {'aspectRatio': '1:1', 'steps': 30, 'guidance': 2.5, 'seed': 7}
+        reordered = dict(reversed(list(job.items())))
+        
+        key = _generation_cache_key('a red fox', _bfl_params(job))
+        
+        assert key == _generation_cache_key('a red fox', _bfl_params(reordered))
+        assert key == _generation_cache_key('a red fox', dict(reversed(list(_bfl_params(job).items()))))
+        assert len(key) == 64
+    
+    @pytest.mark.parametrize("prompt,changes", [
+        ('a red fox ', {}),
+        ('a red fox', {'seed': 8}),
+        ('a red fox', {'steps': 31}),
+        ('a red fox', {'aspectRatio': '16:9'}),
+        ('a red fox', {'safetyTolerance': 3}),
+    ], ids=['prompt', 'seed', 'steps', 'aspect_ratio', 'safety_tolerance'])
+    def test_key_changes_with_any_input(self, prompt, changes):
+        """Test every input that affects the image also changes the key."""
+        job = {'aspectRatio': '1:1', 'steps': 30, 'seed': 7}
+        
+        assert _generation_cache_key(prompt, _bfl_params({**job, **changes})) != \
+            _generation_cache_key('a red fox', _bfl_params(job))
+    
+    def test_no_key_with_prompt_upsampling(self):
+        """Test jobs with prompt upsampling are never cached."""
+        assert _generation_cache_key('a red fox', _bfl_params({'promptUpsampling': True})) is None
+
+
+class TestFindCachedImage:
+    """Test cases for looking up stored images by content key."""
+    
+    def test_miss_then_hit(self, bucket):
+        """Test a key misses until an image is uploaded under it, then hits without a GCS lookup."""
+        bucket.blob.side_effect = None
+        blob = bucket.blob.return_value
+        blob.public_url = 'https://storage.example.com/generated-art/by-hash/abc.png'
+        blob.exists.return_value = False
+        
+        assert storage.find_cached_image('abc') is None
+        url = storage.upload_image_to_storage(b'png', cache_key='abc')
+        blob.exists.reset_mock()
+        
+        assert storage.find_cached_image('abc') == url
+        blob.exists.assert_not_called()
+        assert [call.args[0] for call in bucket.blob.call_args_list] == \
+            ['generated-art/by-hash/abc.png', 'generated-art/by-hash/abc.png']
+    
+    def test_hit_from_bucket(self, bucket):
+        """Test an image stored by another process is found under the by-hash prefix."""
+        bucket.blob.side_effect = None
+        bucket.blob.return_value.exists.return_value = True
+        bucket.blob.return_value.public_url = 'https://storage.example.com/generated-art/by-hash/abc.png'
+        
+        assert storage.find_cached_image('abc') == 'https://storage.example.com/generated-art/by-hash/abc.png'
+        bucket.blob.assert_called_once_with('generated-art/by-hash/abc.png')
+    
+    def test_uncached_upload_uses_random_name(self, bucket):
+        """Test uploads without a key keep unique names outside the by-hash prefix."""
+        first = storage.upload_image_to_storage(b'png')
+        second = storage.upload_image_to_storage(b'png')
+        
+        assert first != second
+        assert '/by-hash/' not in first
+        assert not storage._cached_urls
+
+
+class TestGenerateAndStoreImage:
+    """Test cases for the generation activity's reuse of stored images."""
+    
+    @pytest.fixture
+    def bfl_api(self):
+        """Stand-in for the BFL client module, which needs an API key to import."""
+        module = ModuleType('src.services.bfl_api')
+        module.generate_art_image = Mock(return_value=b'png')
+        with patch.dict(sys.modules, {'src.services.bfl_api': module}):
+            yield module
+    
+    async def test_second_identical_job_reuses_image(self, bucket, bfl_api):
+        """Test an identical job reuses the first job's image without calling BFL."""
+        bucket.blob.side_effect = None
+        blob = bucket.blob.return_value
+        blob.exists.return_value = False
+        blob.public_url = 'https://storage.example.com/generated-art/by-hash/key.png'
+        job = {'prompt': 'a red fox', 'seed': 7}
+        
+        first = await ActivityEnvironment().run(generate_and_store_image, {**job, 'job_id': 'job-1'})
+        second = await ActivityEnvironment().run(generate_and_store_image, {**job, 'job_id': 'job-2'})
+        
+        assert first == second
+        bfl_api.generate_art_image.assert_called_once()
+        key = _generation_cache_key('a red fox', _bfl_params(job))
+        assert bucket.blob.call_args_list[0].args[0] == f'generated-art/by-hash/{key}.png'
+    
+    async def test_upsampled_job_always_generates(self, bucket, bfl_api):
+        """Test jobs with prompt upsampling skip the lookup and generate every time."""
+        job = {'prompt': 'a red fox', 'promptUpsampling': True}
+        
+        await ActivityEnvironment().run(generate_and_store_image, {**job, 'job_id': 'job-1'})
+        await ActivityEnvironment().run(generate_and_store_image, {**job, 'job_id': 'job-2'})
+        
+        assert bfl_api.generate_art_image.call_count == 2
+        assert all('/by-hash/' not in call.args[0] for call in bucket.blob.call_args_list)
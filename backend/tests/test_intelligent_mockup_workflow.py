@@ -2,16 +2,26 @@
 Integration tests for the Intelligent Mockup Generation Workflow.
 """
 
-import pytest
 import asyncio
+import importlib
+import pytest
+import sys
+import threading
 import uuid
-from unittest.mock import Mock, patch, MagicMock, AsyncMock
+from contextlib import contextmanager
+from types import MappingProxyType, SimpleNamespace
+from unittest.mock import Mock, patch, MagicMock, AsyncMock, create_autospec
+from typing import Tuple
+import numpy as np
+import requests
 from PIL import Image
 import io
+import google.cloud
 
 # Configure pytest to handle async tests
 pytest_plugins = ('pytest_asyncio',)
 
+from src.temporal import intelligent_mockup_generation_workflow as workflow_module
 from src.temporal.intelligent_mockup_generation_workflow import (
     IntelligentMockupGenerationWorkflow,
     update_intelligent_job_status,
@@ -51,99 +61,250 @@ class TestIntelligentMockupJob:
         assert job.job_id == "test_job_123"
         assert job.original_job_id is None
 
+def _image_to_bytes(image: Image.Image) -> bytes:
+    """Convert PIL Image to bytes."""
+    # BMP skips PNG's deflate step; the activities still decode it with Image.open
+    img_bytes = io.BytesIO()
+    image.save(img_bytes, format='BMP')
+    return img_bytes.getvalue()
+
+TEMPLATE_URL = "https://example.com/template.png"
+
+# Shared read-only test data; take dict(...) of these where a test needs to mutate
+REGION_DATA = MappingProxyType({
+    'x': 100,
+    'y': 100,
+    'width': 200,
+    'height': 150,
+    'confidence': 0.9,
+    'label': 'picture frame'
+})
+
+JOB_DATA = MappingProxyType({
+    'job_id': 'test_job_123',
+    'artwork_url': 'https://example.com/artwork.png',
+    'mockup_template': 'picture_frame_01'
+})
+
+def _solid_image(size: Tuple[int, int], rgb: Tuple[int, int, int]) -> Image.Image:
+    """Build a solid-colour PIL image from a numpy pixel buffer (PIL copies RGB data into its own storage)."""
+    width, height = size
+    pixels = np.full((height, width, 3), rgb, dtype=np.uint8)
+    return Image.frombuffer('RGB', size, pixels, 'raw', 'RGB', 0, 1)
+
+# Images are built once at import and shared by every test
+ARTWORK_IMAGE = _solid_image((300, 200), (0, 0, 255))
+TEMPLATE_IMAGE = _solid_image((800, 600), (255, 255, 255))
+TRANSFORMED_ARTWORK_IMAGE = _solid_image((200, 150), (255, 0, 0))
+COMPOSITE_IMAGE = _solid_image((800, 600), (0, 128, 0))
+
+# Encoded once at import; every test reuses the same immutable bytes
+TRANSFORMED_ARTWORK_BYTES = _image_to_bytes(TRANSFORMED_ARTWORK_IMAGE)
+
+@contextmanager
+def _stub_google_cloud_module(name: str):
+    """Install a MagicMock in place of a google.cloud submodule without importing it."""
+    stub = MagicMock()
+    with patch.dict(sys.modules, {f'google.cloud.{name}': stub}), \
+            patch.object(google.cloud, name, stub, create=True):
+        yield stub
+
+@pytest.fixture
+def mock_firestore():
+    """Stubbed google.cloud.firestore module, so the client library is never loaded."""
+    # Drop any cached client so the activities build theirs from the stub
+    with _stub_google_cloud_module('firestore') as stub, \
+            patch.object(workflow_module, '_firestore_client', None):
+        yield stub
+
+@pytest.fixture
+def mock_storage():
+    """Stubbed google.cloud.storage module, so the client library is never loaded."""
+    # Drop any cached client so the activities build theirs from the stub
+    with _stub_google_cloud_module('storage') as stub, \
+            patch.object(workflow_module, '_storage_client', None):
+        yield stub
+
+# Minimal specs of the client classes the activities touch. They stand in for the real
+# google.cloud classes, which are deliberately never imported, so mocks reject typos.
+class _DocumentSnapshotSpec:
+    exists = False
+    def to_dict(self): ...
+
+class _DocumentReferenceSpec:
+    def get(self): ...
+    def update(self, field_updates): ...
+
+class _CollectionReferenceSpec:
+    def document(self, document_id): ...
+    def where(self, filter): ...
+
+class _WriteBatchSpec:
+    def update(self, reference, field_updates): ...
+    def commit(self): ...
+
+class _FirestoreClientSpec:
+    def collection(self, collection_path): ...
+    def batch(self): ...
+
+class _BlobSpec:
+    public_url = ''
+    def upload_from_string(self, data, content_type=None): ...
+    def make_public(self): ...
+
+class _BucketSpec:
+    def blob(self, blob_name): ...
+
+class _StorageClientSpec:
+    def bucket(self, bucket_name): ...
+
+def _autospec(spec):
+    return create_autospec(spec, spec_set=True, instance=True)
+
+@pytest.fixture
+def firestore_db(mock_firestore):
+    """Firestore client from the stubbed module, with a mockup template document."""
+    template_doc = _autospec(_DocumentSnapshotSpec)
+    template_doc.exists = True
+    template_doc.to_dict.return_value = {'imageUrl': TEMPLATE_URL}
+    
+    document = _autospec(_DocumentReferenceSpec)
+    document.get.return_value = template_doc
+    collection = _autospec(_CollectionReferenceSpec)
+    collection.document.return_value = document
+    db = _autospec(_FirestoreClientSpec)
+    db.collection.return_value = collection
+    db.batch.return_value = _autospec(_WriteBatchSpec)
+    
+    mock_firestore.Client.return_value = db
+    return db
+
+@pytest.fixture
+def storage_blob(mock_storage):
+    """Blob returned by every bucket of the stubbed storage client."""
+    blob = _autospec(_BlobSpec)
+    blob.public_url = "https://storage.googleapis.com/test-bucket/intelligent-mockups/test.png"
+    bucket = _autospec(_BucketSpec)
+    bucket.blob.return_value = blob
+    client = _autospec(_StorageClientSpec)
+    client.bucket.return_value = bucket
+    
+    mock_storage.Client.return_value = client
+    return blob
+
 class TestIntelligentMockupActivities:
     """Tests for individual workflow activities."""
     
+    @classmethod
+    def setup_class(cls):
+        """Create and encode the test images once for the whole class."""
+        cls.test_artwork = ARTWORK_IMAGE
+        cls.test_template = TEMPLATE_IMAGE
+        
+        cls.artwork_bytes = _image_to_bytes(cls.test_artwork)
+        cls.template_bytes = _image_to_bytes(cls.test_template)
+    
     def setup_method(self):
         """Set up test fixtures."""
         self.test_job_id = "test_job_123"
         self.test_artwork_url = "https://example.com/artwork.png"
         self.test_mockup_template = "picture_frame_01"
-        self.test_template_url = "https://example.com/template.png"
-        
-        # Create test images
-        self.test_artwork = Image.new('RGB', (300, 200), color='blue')
-        self.test_template = Image.new('RGB', (800, 600), color='white')
-        
-        # Convert to bytes
-        self.artwork_bytes = self._image_to_bytes(self.test_artwork)
-        self.template_bytes = self._image_to_bytes(self.test_template)
-        
-        # Mock region data
-        self.mock_region_data = {
-            'x': 100,
-            'y': 100,
-            'width': 200,
-            'height': 150,
-            'confidence': 0.9,
-            'label': 'picture frame'
-        }
+        self.test_template_url = TEMPLATE_URL
     
-    def _image_to_bytes(self, image: Image.Image) -> bytes:
-        """Convert PIL Image to bytes."""
-        img_bytes = io.BytesIO()
-        image.save(img_bytes, format='PNG')
-        return img_bytes.getvalue()
-    
-    @patch('google.cloud.firestore')
-    def test_update_intelligent_job_status(self, mock_firestore):
+    async def test_update_intelligent_job_status(self, firestore_db, mock_firestore):
         """Test updating job status in Firestore."""
-        # Mock Firestore client and operations
-        mock_db = Mock()
-        mock_collection = Mock()
-        mock_doc = Mock()
-        
-        mock_firestore.Client.return_value = mock_db
-        mock_db.collection.return_value = mock_collection
-        mock_collection.document.return_value = mock_doc
+        mock_collection = firestore_db.collection.return_value
+        mock_doc = mock_collection.document.return_value
         
         # Test the activity
-        asyncio.run(update_intelligent_job_status(
+        await update_intelligent_job_status(
             self.test_job_id, 
             {'status': 'processing'}
-        ))
+        )
         
         # Verify Firestore operations
-        mock_db.collection.assert_called_with('intelligent_mockup_jobs')
+        mock_batch = firestore_db.batch.return_value
+        firestore_db.collection.assert_called_with('intelligent_mockup_jobs')
         mock_collection.document.assert_called_with(self.test_job_id)
-        mock_doc.update.assert_called_once()
+        mock_batch.update.assert_called_once()
+        mock_batch.commit.assert_called_once()
         
         # Check that updates include timestamp
-        call_args = mock_doc.update.call_args[0][0]
+        doc_ref, call_args = mock_batch.update.call_args[0]
+        assert doc_ref is mock_doc
         assert call_args['status'] == 'processing'
-        assert 'updated_at' in call_args
+        
+        # Timestamps are server-side sentinels, not client clock reads
+        assert call_args['updated_at'] is mock_firestore.SERVER_TIMESTAMP
+        assert call_args['processing_started_at'] is mock_firestore.SERVER_TIMESTAMP
+    
+    async def test_update_intelligent_job_status_batches_concurrent_updates(self, firestore_db):
+        """Test that updates arriving together are written with one batch commit."""
+        await asyncio.gather(
+            update_intelligent_job_status('job_a', {'status': 'processing'}),
+            update_intelligent_job_status('job_b', {'status': 'processing'}),
+            update_intelligent_job_status('job_a', {'status': 'completed', 'result_url': 'https://example.com/a.png'})
+        )
+        
+        mock_batch = firestore_db.batch.return_value
+        mock_batch.commit.assert_called_once()
+        
+        # The two job_a updates are merged, the later status winning
+        assert mock_batch.update.call_count == 2
+        merged = mock_batch.update.call_args_list[0][0][1]
+        assert merged['status'] == 'completed'
+        assert merged['result_url'] == 'https://example.com/a.png'
+    
+    async def test_update_intelligent_job_status_batch_failure_isolated(self, firestore_db):
+        """Test a failed batch commit is retried per job, so only the bad job's update fails."""
+        documents = {job_id: _autospec(_DocumentReferenceSpec) for job_id in ('job_a', 'job_b')}
+        documents['job_b'].update.side_effect = RuntimeError('No document to update: job_b')
+        firestore_db.collection.return_value.document.side_effect = documents.__getitem__
+        firestore_db.batch.return_value.commit.side_effect = RuntimeError('No document to update: job_b')
+        
+        results = await asyncio.gather(
+            update_intelligent_job_status('job_a', {'status': 'completed'}),
+            update_intelligent_job_status('job_b', {'status': 'completed'}),
+            return_exceptions=True
+        )
+        
+        assert results[0] is None
+        assert isinstance(results[1], RuntimeError)
+        assert documents['job_a'].update.call_args[0][0]['status'] == 'completed'
     
-    @patch('requests.get')
-    @patch('google.cloud.firestore')
-    def test_download_artwork_and_template(self, mock_firestore, mock_requests):
+    async def test_update_intelligent_job_status_reuses_client(self, firestore_db, mock_firestore):
+        """Test successive status updates share one Firestore client and keep no finished commits."""
+        await update_intelligent_job_status('job_a', {'status': 'processing'})
+        await update_intelligent_job_status('job_a', {'status': 'completed'})
+        
+        mock_firestore.Client.assert_called_once()
+        assert firestore_db.batch.return_value.commit.call_count == 2
+        await asyncio.sleep(0)
+        assert not workflow_module._status_updates._commits
+    
+    @patch.object(workflow_module, '_http_session', spec_set=requests.Session)
+    async def test_download_artwork_and_template(self, mock_session, firestore_db):
         """Test downloading artwork and template images."""
         # Mock HTTP requests
-        mock_artwork_response = Mock()
-        mock_artwork_response.content = self.artwork_bytes
-        mock_artwork_response.raise_for_status.return_value = None
-        
-        mock_template_response = Mock()
-        mock_template_response.content = self.template_bytes
-        mock_template_response.raise_for_status.return_value = None
+        mock_artwork_response = SimpleNamespace(content=self.artwork_bytes, raise_for_status=lambda: None)
+        mock_template_response = SimpleNamespace(content=self.template_bytes, raise_for_status=lambda: None)
         
-        mock_requests.side_effect = [mock_artwork_response, mock_template_response]
+        # Both downloads must be in flight at once to get past the barrier
+        in_flight = threading.Barrier(2, timeout=5)
         
-        # Mock Firestore for mockup template lookup
-        mock_db = Mock()
-        mock_collection = Mock()
-        mock_doc = Mock()
-        mock_doc.exists = True
-        mock_doc.to_dict.return_value = {'imageUrl': self.test_template_url}
+        def fake_get(url, **kwargs):
+            in_flight.wait()
+            if url == self.test_artwork_url:
+                return mock_artwork_response
+            return mock_template_response
         
-        mock_firestore.Client.return_value = mock_db
-        mock_db.collection.return_value = mock_collection
-        mock_collection.document.return_value = mock_doc
+        mock_session.get.side_effect = fake_get
         
         # Test the activity
-        result = asyncio.run(download_artwork_and_template(
+        result = await download_artwork_and_template(
             self.test_artwork_url, 
             self.test_mockup_template
-        ))
+        )
         
         # Verify results
         artwork_bytes, template_bytes, template_url = result
@@ -151,13 +312,14 @@ class TestIntelligentMockupActivities:
         assert template_bytes == self.template_bytes
         assert template_url == self.test_template_url
         
-        # Verify calls
-        assert mock_requests.call_count == 2
-        mock_requests.assert_any_call(self.test_artwork_url, timeout=30)
-        mock_requests.assert_any_call(self.test_template_url, timeout=30)
+        # Verify both downloads went through the one shared session
+        assert workflow_module._get_http_session() is mock_session
+        assert mock_session.get.call_count == 2
+        mock_session.get.assert_any_call(self.test_artwork_url, timeout=30)
+        mock_session.get.assert_any_call(self.test_template_url, timeout=30)
     
     @patch('src.services.object_detection.ObjectDetectionService')
-    def test_detect_suitable_regions(self, mock_detection_service_class):
+    async def test_detect_suitable_regions(self, mock_detection_service_class):
         """Test detecting suitable regions in template."""
         # Mock object detection service
         mock_detection_service = Mock()
@@ -169,7 +331,7 @@ class TestIntelligentMockupActivities:
         mock_detection_service.find_suitable_regions.return_value = [mock_region]
         
         # Test the activity
-        result = asyncio.run(detect_suitable_regions(self.template_bytes, self.test_job_id))
+        result = await detect_suitable_regions(self.template_bytes, self.test_job_id)
         
         # Verify results
         assert len(result) == 1
@@ -184,7 +346,7 @@ class TestIntelligentMockupActivities:
         mock_detection_service.find_suitable_regions.assert_called_once()
     
     @patch('src.services.perspective_transform.PerspectiveTransformService')
-    def test_transform_artwork_to_region(self, mock_transform_service_class):
+    async def test_transform_artwork_to_region(self, mock_transform_service_class):
         """Test transforming artwork to fit region."""
         # Mock perspective transformation service
         mock_transform_service = Mock()
@@ -192,9 +354,8 @@ class TestIntelligentMockupActivities:
         
         # Mock transformation result
         from src.services.perspective_transform import TransformationResult
-        transformed_image = Image.new('RGB', (200, 150), color='red')
         mock_result = TransformationResult(
-            transformed_image=transformed_image,
+            transformed_image=TRANSFORMED_ARTWORK_IMAGE,
             transformation_matrix=None,
             source_corners=[],
             target_corners=[],
@@ -204,12 +365,12 @@ class TestIntelligentMockupActivities:
         mock_transform_service.transform_artwork_to_region.return_value = mock_result
         
         # Test the activity
-        result = asyncio.run(transform_artwork_to_region(
+        result = await transform_artwork_to_region(
             self.artwork_bytes,
-            self.mock_region_data,
+            REGION_DATA,
             (800, 600),
             self.test_job_id
-        ))
+        )
         
         # Verify result is bytes
         assert isinstance(result, bytes)
@@ -218,58 +379,47 @@ class TestIntelligentMockupActivities:
         # Verify service calls
         mock_transform_service.transform_artwork_to_region.assert_called_once()
     
+    @patch('os.getenv')
     @patch('src.services.perspective_transform.PerspectiveTransformService')
-    def test_compose_and_store_final_mockup(self, mock_transform_service_class):
-        """Test composing final mockup image."""
+    async def test_compose_and_store_final_mockup(self, mock_transform_service_class, mock_getenv, storage_blob):
+        """Test composing and storing the final mockup image."""
+        mock_getenv.return_value = "test-bucket"
+        
         # Mock perspective transformation service
         mock_transform_service = Mock()
         mock_transform_service_class.return_value = mock_transform_service
         
         # Mock composite result
-        composite_image = Image.new('RGB', (800, 600), color='green')
-        mock_transform_service.create_composite_image.return_value = composite_image
-        
-        # Create mock transformed artwork bytes
-        transformed_artwork = Image.new('RGB', (200, 150), color='red')
-        transformed_bytes = self._image_to_bytes(transformed_artwork)
+        mock_transform_service.create_composite_image.return_value = COMPOSITE_IMAGE
         
         # Test the activity
-        result = asyncio.run(compose_and_store_final_mockup(
+        result = await compose_and_store_final_mockup(
             self.template_bytes,
-            transformed_bytes,
-            self.mock_region_data,
+            TRANSFORMED_ARTWORK_BYTES,
+            REGION_DATA,
             self.test_job_id
-        ))
+        )
         
-        # Verify result is bytes
-        assert isinstance(result, bytes)
-        assert len(result) > 0
+        # Verify the composite was uploaded and its URL returned
+        assert result == storage_blob.public_url
+        storage_blob.upload_from_string.assert_called_once()
         
         # Verify service calls
         mock_transform_service.create_composite_image.assert_called_once()
     
-    @patch('google.cloud.storage')
     @patch('os.getenv')
-    def test_store_intelligent_mockup_result(self, mock_getenv, mock_storage):
+    async def test_store_intelligent_mockup_result(self, mock_getenv, mock_storage, storage_blob):
         """Test storing mockup result in Firebase Storage."""
         # Mock environment variable
         mock_getenv.return_value = "test-bucket"
-        
-        # Mock Google Cloud Storage
-        mock_storage_client = Mock()
-        mock_bucket = Mock()
-        mock_blob = Mock()
-        mock_blob.public_url = "https://storage.googleapis.com/test-bucket/intelligent-mockups/test.png"
-        
-        mock_storage.Client.return_value = mock_storage_client
-        mock_storage_client.bucket.return_value = mock_bucket
-        mock_bucket.blob.return_value = mock_blob
+        mock_storage_client = mock_storage.Client.return_value
+        mock_blob = storage_blob
         
         # Test the activity
-        result = asyncio.run(store_intelligent_mockup_result(
+        result = await store_intelligent_mockup_result(
             self.template_bytes,
             self.test_job_id
-        ))
+        )
         
         # Verify result
         assert result == mock_blob.public_url
@@ -278,34 +428,39 @@ class TestIntelligentMockupActivities:
         mock_storage_client.bucket.assert_called_with("test-bucket")
         mock_blob.upload_from_string.assert_called_once()
         mock_blob.make_public.assert_called_once()
+        
+        # The BMP fixture is converted so the stored object matches its .png name
+        uploaded = mock_blob.upload_from_string.call_args[0][0]
+        assert uploaded.startswith(workflow_module.PNG_SIGNATURE)
+        
+        # A second upload reuses the same client instead of constructing another
+        await store_intelligent_mockup_result(self.template_bytes, self.test_job_id)
+        assert mock_storage.Client.call_count == 1
+        assert mock_blob.upload_from_string.call_count == 2
+    
+    @patch('os.getenv')
+    @patch('PIL.Image.open')
+    async def test_store_intelligent_mockup_result_png_passthrough(self, mock_open, mock_getenv, storage_blob):
+        """Test that PNG results are uploaded as-is without a decode/encode round trip."""
+        mock_getenv.return_value = "test-bucket"
+        png_bytes = workflow_module.PNG_SIGNATURE + b'mockup'
+        
+        await store_intelligent_mockup_result(png_bytes, self.test_job_id)
+        
+        storage_blob.upload_from_string.assert_called_once_with(png_bytes, content_type='image/png')
+        mock_open.assert_not_called()
 
 class TestIntelligentMockupWorkflow:
     """Tests for the complete workflow."""
     
-    def setup_method(self):
-        """Set up test fixtures."""
-        self.test_job_data = {
-            'job_id': 'test_job_123',
-            'artwork_url': 'https://example.com/artwork.png',
-            'mockup_template': 'picture_frame_01'
-        }
-        
-        self.mock_region_data = {
-            'x': 100,
-            'y': 100,
-            'width': 200,
-            'height': 150,
-            'confidence': 0.9,
-            'label': 'picture frame'
-        }
-    
     def test_workflow_initialization(self):
         """Test workflow can be instantiated."""
         workflow = IntelligentMockupGenerationWorkflow()
         assert workflow is not None
     
     @pytest.mark.asyncio
-    async def test_workflow_success_flow(self):
+    @patch.object(workflow_module, 'workflow')
+    async def test_workflow_success_flow(self, mock_workflow):
         """Test successful workflow execution."""
         # Mock workflow execution context
         mock_workflow.logger = Mock()
@@ -318,12 +473,10 @@ class TestIntelligentMockupWorkflow:
             elif activity_func.__name__ == 'download_artwork_and_template':
                 return (b'artwork_data', b'template_data', 'https://template.url')
             elif activity_func.__name__ == 'detect_suitable_regions':
-                return [self.mock_region_data]
+                return [REGION_DATA]
             elif activity_func.__name__ == 'transform_artwork_to_region':
                 return b'transformed_artwork_data'
             elif activity_func.__name__ == 'compose_and_store_final_mockup':
-                return b'final_mockup_data'
-            elif activity_func.__name__ == 'store_intelligent_mockup_result':
                 return 'https://storage.url/result.png'
             else:
                 return None
@@ -334,22 +487,22 @@ class TestIntelligentMockupWorkflow:
         workflow_instance = IntelligentMockupGenerationWorkflow()
         
         # Mock the PIL Image import for template size
-        with patch('src.temporal.intelligent_mockup_generation_workflow.Image') as mock_image:
-            mock_pil_image = Mock()
-            mock_pil_image.size = (800, 600)
-            mock_image.open.return_value = mock_pil_image
+        with patch('PIL.Image.open') as mock_open:
+            mock_open.return_value = SimpleNamespace(size=(800, 600))
             
-            result = await workflow_instance.run(self.test_job_data)
+            result = await workflow_instance.run(JOB_DATA)
         
         # Verify result
         assert result['job_id'] == 'test_job_123'
         assert result['status'] == 'completed'
         assert result['result_url'] == 'https://storage.url/result.png'
         assert result['detected_regions'] == 1
-        assert result['best_region'] == self.mock_region_data
+        assert result['best_region'] == REGION_DATA
+        assert mock_workflow.execute_activity.call_count == 6
     
     @pytest.mark.asyncio
-    async def test_workflow_no_regions_found(self):
+    @patch.object(workflow_module, 'workflow')
+    async def test_workflow_no_regions_found(self, mock_workflow):
         """Test workflow when no suitable regions are detected."""
         # Mock workflow execution context
         mock_workflow.logger = Mock()
@@ -370,60 +523,39 @@ class TestIntelligentMockupWorkflow:
         
         # Create workflow instance and run
         workflow_instance = IntelligentMockupGenerationWorkflow()
-        result = await workflow_instance.run(self.test_job_data)
+        result = await workflow_instance.run(JOB_DATA)
         
         # Verify result shows failure due to no regions
         assert result['job_id'] == 'test_job_123'
         assert result['status'] == 'failed'
         assert result['error'] == 'No suitable regions detected'
         assert result['detected_regions'] == 0
+        assert mock_workflow.execute_activity.call_count == 4
 
+@pytest.mark.integration
 class TestWorkflowIntegration:
     """Integration tests for workflow compatibility."""
     
-    def test_workflow_import_compatibility(self):
-        """Test that importing the new workflow doesn't break existing imports."""
-        # Test importing all workflows together
-        try:
-            from src.temporal.simple_workflow import SimpleImageWorkflow
-            from src.temporal.mockup_generation_workflow import MockupGenerationWorkflow
-            from src.temporal.intelligent_mockup_generation_workflow import IntelligentMockupGenerationWorkflow
-            
-            assert SimpleImageWorkflow is not None
-            assert MockupGenerationWorkflow is not None
-            assert IntelligentMockupGenerationWorkflow is not None
-            
-        except ImportError as e:
-            pytest.fail(f"Import compatibility test failed: {e}")
-    
-    def test_activity_import_compatibility(self):
-        """Test that importing new activities doesn't conflict with existing ones."""
-        try:
-            # Import existing activities
-            from src.temporal.simple_workflow import generate_and_store_image, update_firestore_job
-            
-            # Import new activities
-            from src.temporal.intelligent_mockup_generation_workflow import (
-                update_intelligent_job_status,
-                download_artwork_and_template,
-                detect_suitable_regions,
-                transform_artwork_to_region,
-                compose_and_store_final_mockup,
-                store_intelligent_mockup_result
-            )
-            
-            # Verify all activities are callable
-            assert callable(generate_and_store_image)
-            assert callable(update_firestore_job)
-            assert callable(update_intelligent_job_status)
-            assert callable(download_artwork_and_template)
-            assert callable(detect_suitable_regions)
-            assert callable(transform_artwork_to_region)
-            assert callable(compose_and_store_final_mockup)
-            assert callable(store_intelligent_mockup_result)
-            
-        except ImportError as e:
-            pytest.fail(f"Activity import compatibility test failed: {e}")
+    @pytest.mark.parametrize("dotted", [
+        # Existing workflows and activities
+        "src.temporal.simple_workflow.SimpleImageWorkflow",
+        "src.temporal.simple_workflow.generate_and_store_image",
+        "src.temporal.simple_workflow.update_firestore_job",
+        "src.temporal.intelligent_mockup_generation_workflow_optimized.IntelligentMockupGenerationWorkflow",
+        # New workflow and activities
+        "src.temporal.intelligent_mockup_generation_workflow.IntelligentMockupGenerationWorkflow",
+        "src.temporal.intelligent_mockup_generation_workflow.update_intelligent_job_status",
+        "src.temporal.intelligent_mockup_generation_workflow.download_artwork_and_template",
+        "src.temporal.intelligent_mockup_generation_workflow.detect_suitable_regions",
+        "src.temporal.intelligent_mockup_generation_workflow.transform_artwork_to_region",
+        "src.temporal.intelligent_mockup_generation_workflow.compose_and_store_final_mockup",
+        "src.temporal.intelligent_mockup_generation_workflow.store_intelligent_mockup_result",
+    ])
+    def test_importable(self, dotted):
+        """Test that workflows and activities import side by side without conflicts."""
+        module_name, _, attr = dotted.rpartition('.')
+        target = getattr(importlib.import_module(module_name), attr)
+        assert callable(target)
     
     def test_service_integration_no_conflicts(self):
         """Test that service integrations don't conflict."""
@@ -443,23 +575,6 @@ class TestWorkflowIntegration:
             
         except ImportError as e:
             pytest.fail(f"Service integration test failed: {e}")
-    
-    def test_firestore_collection_isolation(self):
-        """Test that different collections don't interfere with each other."""
-        collections = [
-            'jobs',                      # Simple workflow
-            'mockup_jobs',              # Mockup generation workflow
-            'intelligent_mockup_jobs',  # Intelligent mockup workflow
-            'mockups',                  # Mockup templates
-            'drafts'                    # Draft entries
-        ]
-        
-        # Verify all collection names are unique
-        assert len(collections) == len(set(collections))
-        
-        # Verify naming conventions
-        assert all(isinstance(name, str) for name in collections)
-        assert all(len(name) > 0 for name in collections)
 
 class TestErrorHandling:
     """Tests for error handling and edge cases."""
@@ -0,0 +1,217 @@
+"""
+Tests for the log sanitizer
+"""
+
+import importlib.util
+import re
+import sys
+import threading
+
+import pytest
+
+from src.utils import log_sanitizer
+from src.utils.log_sanitizer import LogSanitizer, configure_sanitizer, sanitize_log_data
+
+
+# Strings exercising every pattern, used to compare regex engines
+PATTERN_SAMPLES = [
+    'api_key="abcdefghijklmnopqrstuvwxyz123456"',
+    'Authorization: bearer=ABCDEFGHIJKLMNOPQRSTUVWX',
+    'GET https://api.example.com/v1/image?id=7&token=s3cr3t-value&size=2',
+    'contact jane.doe@example.com for access',
+    'card 4111 1111 1111 1111 on file',
+    'ssn 123-45-6789',
+    'https://storage.googleapis.com/bucket/path/image.png?X-Goog-Signature=abc123',
+    'nothing to hide here',
+]
+
+
+@pytest.fixture(autouse=True)
+def _no_env_fields(monkeypatch):
+    """Keep LOG_SENSITIVE_FIELDS from the environment out of these tests."""
+    monkeypatch.delenv('LOG_SENSITIVE_FIELDS', raising=False)
+
+
+class TestSensitiveKeys:
+    """Test cases for key-based detection of sensitive fields."""
+    
+    @pytest.mark.parametrize("key", [
+        'password', 'API_KEY', 'apiKey', 'api-key', 'bflApiKey', 'X-Auth-Token',
+        'creditCardNumber', 'bankAccount', 'taxId', 'socialSecurity',
+        'privateKeyPem', 'ROUTING_NUMBER', 'refresh.token',
+    ])
+    def test_sensitive_keys(self, key):
+        """Test separator, camelCase and upper case spellings of sensitive fields match."""
+        assert LogSanitizer().is_sensitive_key(key)
+    
+    @pytest.mark.parametrize("key", [
+        'prompt', 'status', 'job_id', 'keyword', 'aspect_ratio', 'image_url',
+        'width', 'bank', 'account', 'credit', 'card_id', 'social', 42,
+    ])
+    def test_non_sensitive_keys(self, key):
+        """Test ordinary fields and single words of multi-word fields are not matched."""
+        assert not LogSanitizer().is_sensitive_key(key)
+    
+    def test_substring_fallback(self):
+        """Test keys without a token match are still caught by the substring scan."""
+        sanitizer = LogSanitizer()
+        
+        assert sanitizer.is_sensitive_key('userpassword')
+        assert sanitizer.is_sensitive_key('sessionid')
+    
+    def test_custom_fields(self, monkeypatch):
+        """Test fields passed in and from LOG_SENSITIVE_FIELDS are matched like the defaults."""
+        monkeypatch.setenv('LOG_SENSITIVE_FIELDS', 'etsy_shop_id')
+        sanitizer = LogSanitizer(sensitive_fields={'Client_Number'})
+        
+        assert sanitizer.is_sensitive_key('clientNumber')
+        assert sanitizer.is_sensitive_key('etsy-shop-id')
+        assert not sanitizer.is_sensitive_key('password')
+    
+    def test_results_cached_per_key(self):
+        """Test repeated lookups of a key reuse the cached decision."""
+        sanitizer = LogSanitizer()
+        sanitizer.is_sensitive_key('bflApiKey')
+        
+        sanitizer._key_lookup[2]['bflApiKey'] = False
+        
+        assert not sanitizer.is_sensitive_key('bflApiKey')
+
+
+class TestSanitize:
+    """Test cases for sanitizing dicts, lists and strings."""
+    
+    def test_masks_sensitive_values(self):
+        """Test values under sensitive keys are masked at any depth."""
+        data = {
+            'job_id': 'job-1',
+            'config': {'bflApiKey': 'sk-1234567890', 'width': 1024},
+            'history': [{'password': 'hunter22'}],
+        }
+        
+        sanitized = LogSanitizer().sanitize(data)
+        
+        assert sanitized['job_id'] == 'job-1'
+        assert sanitized['config'] == {'bflApiKey': 'sk********90', 'width': 1024}
+        assert sanitized['history'] == [{'password': 'hu********22'}]
+        assert data['config']['bflApiKey'] == 'sk-1234567890'
+    
+    def test_clean_data_returned_by_identity(self):
+        """Test containers with nothing to mask are returned without copying."""
+        clean = {'job_id': 'job-1', 'sizes': [1, 2], 'meta': {'status': 'done', 'tags': ['a']}}
+        sanitizer = LogSanitizer()
+        
+        assert sanitizer.sanitize(clean) is clean
+        assert sanitizer.sanitize(clean['sizes']) is clean['sizes']
+    
+    def test_only_dirty_branches_copied(self):
+        """Test a masked value copies its parents but shares untouched siblings."""
+        data = {'meta': {'status': 'done'}, 'auth': {'token': 'abcdef'}}
+        
+        sanitized = LogSanitizer().sanitize(data)
+        
+        assert sanitized is not data
+        assert sanitized['meta'] is data['meta']
+        assert sanitized['auth'] == "{'********'}"
+    
+    def test_max_depth(self):
+        """Test deeply nested data is cut off instead of recursing without bound."""
+        data = {}
+        node = data
+        for _ in range(15):
+            node['child'] = {}
+            node = node['child']
+        
+        sanitized = LogSanitizer().sanitize(data)
+        
+        for _ in range(11):
+            sanitized = sanitized['child']
+        assert sanitized == {'_error': 'Max depth exceeded'}
+
+
+class TestReconfigure:
+    """Test cases for changing a sanitizer's settings in place."""
+    
+    @pytest.fixture
+    def restore_default(self):
+        """Put the default sanitizer back to its default settings."""
+        yield
+        configure_sanitizer()
+    
+    def test_reconfigure(self):
+        """Test reconfigure replaces the fields, mask settings and cached decisions."""
+        sanitizer = LogSanitizer()
+        assert sanitizer.is_sensitive_key('password')
+        
+        sanitizer.reconfigure(sensitive_fields={'shop_id'}, mask_char='#', preserve_structure=False)
+        
+        assert not sanitizer.is_sensitive_key('password')
+        assert sanitizer.sanitize({'shopId': 'etsy-1234'}) == {'shopId': '########'}
+    
+    def test_configure_sanitizer_updates_bound_function(self, restore_default):
+        """Test sanitize_log_data imported before configuring uses the new settings."""
+        configure_sanitizer(sensitive_fields={'shop_id'})
+        
+        assert sanitize_log_data({'shop_id': 'etsy-1234', 'password': 'x'}) == \
+            {'shop_id': 'et********34', 'password': 'x'}
+    
+    def test_reconfigure_while_in_use(self):
+        """Test lookups racing a reconfigure never leave decisions from the old fields behind."""
+        sanitizer = LogSanitizer(sensitive_fields={'alpha_key'})
+        keys = [f'alphaKey{i}' for i in range(200)] + [f'betaKey{i}' for i in range(200)]
+        stop = threading.Event()
+        
+        def lookups():
+            while not stop.is_set():
+                for key in keys:
+                    sanitizer.is_sensitive_key(key)
+        
+        threads = [threading.Thread(target=lookups) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for i in range(50):
+            sanitizer.reconfigure(sensitive_fields={'beta_key' if i % 2 else 'alpha_key'})
+        stop.set()
+        for thread in threads:
+            thread.join()
+        
+        assert not any(sanitizer.is_sensitive_key(f'alphaKey{i}') for i in range(200))
+        assert all(sanitizer.is_sensitive_key(f'betaKey{i}') for i in range(200))
+
+
+class TestPatternEngines:
+    """Test cases for the regex engine selection."""
+    
+    @staticmethod
+    def _load_module_copy(monkeypatch, block_regex):
+        """Import a fresh copy of log_sanitizer, optionally with the regex module unavailable."""
+        if block_regex:
+            monkeypatch.setitem(sys.modules, 'regex', None)
+        spec = importlib.util.spec_from_file_location('_log_sanitizer_copy', log_sanitizer.__file__)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module
+    
+    def test_falls_back_to_re(self, monkeypatch):
+        """Test patterns compile with the standard library when regex is not installed."""
+        module = self._load_module_copy(monkeypatch, block_regex=True)
+        
+        assert module._pattern_engine is re
+        assert all(isinstance(p, re.Pattern) for p in module.LogSanitizer.PATTERNS.values())
+    
+    @pytest.mark.parametrize("text", PATTERN_SAMPLES)
+    def test_engines_agree(self, monkeypatch, text):
+        """Test the re fallback masks strings exactly like the default engine."""
+        fallback = self._load_module_copy(monkeypatch, block_regex=True).LogSanitizer()
+        
+        assert fallback.sanitize_string(text) == LogSanitizer().sanitize_string(text)
+    
+    def test_patterns_mask_samples(self):
+        """Test each sample with sensitive content is changed by the default engine."""
+        sanitizer = LogSanitizer()
+        
+        masked = [sanitizer.sanitize_string(text) for text in PATTERN_SAMPLES]
+        
+        assert all(m != t for m, t in zip(masked[:-1], PATTERN_SAMPLES[:-1]))
+        assert masked[-1] == PATTERN_SAMPLES[-1]
+        assert 's3cr3t-value' not in masked[2]
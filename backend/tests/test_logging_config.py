@@ -0,0 +1,144 @@
+"""
+Tests for the logging configuration and its background listener
+"""
+
+import importlib.util
+import logging
+import logging.handlers
+import queue
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from src.utils import logging_config
+from src.utils.logging_config import DeferredQueueHandler, configure_logging
+
+
+@pytest.fixture
+def restore_logging():
+    """Put the loggers and listener back the way the test found them."""
+    root = logging.getLogger()
+    handlers = root.handlers[:]
+    names = ['', 'temporal', 'src.temporal', 'src.services', 'src.utils', 'activity', 'workflow']
+    levels = {name: logging.getLogger(name).level for name in names}
+    yield
+    logging_config._stop_queue_listener()
+    root.handlers[:] = handlers
+    for name, level in levels.items():
+        logging.getLogger(name).setLevel(level)
+
+
+def _record(msg, args):
+    """Build a log record the way Logger.info would."""
+    return logging.LogRecord('test', logging.INFO, __file__, 1, msg, args, None)
+
+
+class TestDeferredQueueHandler:
+    """Test cases for the queue handler that defers formatting."""
+    
+    def test_prepare_defers_formatting(self):
+        """Test queued records keep msg and args apart for the listener to format."""
+        handler = DeferredQueueHandler(queue.Queue())
+        record = _record('job %s: %s', ('job-1', {'status': 'done'}))
+        
+        prepared = handler.prepare(record)
+        
+        assert prepared is not record
+        assert prepared.msg == 'job %s: %s'
+        assert prepared.args == ('job-1', {'status': 'done'})
+    
+    def test_prepare_snapshots_containers(self):
+        """Test changing dict and list args after the log call doesn't change the queued record."""
+        handler = DeferredQueueHandler(queue.Queue())
+        payload = {'status': 'processing'}
+        regions = [1]
+        
+        prepared = handler.prepare(_record('update %s %s (%d)', (payload, regions, 42)))
+        payload['status'] = 'failed'
+        regions.append(2)
+        
+        assert prepared.args == ({'status': 'processing'}, [1], 42)
+        assert prepared.getMessage() == "update {'status': 'processing'} [1] (42)"
+    
+    def test_prepare_snapshots_mapping_args(self):
+        """Test a single dict passed as the args mapping is copied too."""
+        handler = DeferredQueueHandler(queue.Queue())
+        payload = {'job_id': 'job-1'}
+        record = _record('%(job_id)s', (payload,))
+        
+        prepared = handler.prepare(record)
+        payload['job_id'] = 'job-2'
+        
+        assert prepared.getMessage() == 'job-1'
+    
+    def test_prepare_keeps_scalar_args(self):
+        """Test records without container args keep their args tuple."""
+        handler = DeferredQueueHandler(queue.Queue())
+        record = _record('%s of %d', ('one', 2))
+        
+        assert handler.prepare(record).args is record.args
+    
+    def test_prepare_copies_shallowly(self):
+        """Test containers are copied one level deep, sharing their values."""
+        handler = DeferredQueueHandler(queue.Queue())
+        lock = threading.Lock()
+        payload = {'lock': lock}
+        
+        prepared = handler.prepare(_record('%s %s', (payload, 'job-1')))
+        
+        assert prepared.args[0] is not payload
+        assert prepared.args[0]['lock'] is lock
+
+
+class TestConfigureLogging:
+    """Test cases for configure_logging."""
+    
+    def test_queue_listener_sanitizes_and_writes(self, restore_logging, capsys):
+        """Test queued records are sanitized and written by the listener thread."""
+        configure_logging(level='INFO', format_string='%(message)s', use_queue=True)
+        listener = logging_config._queue_listener
+        
+        assert listener is not None
+        assert isinstance(logging.getLogger().handlers[0], DeferredQueueHandler)
+        
+        payload = {'job_id': 'job-1', 'api_key': 'sk-1234567890'}
+        logging.getLogger('src.services.test').info('config %s', payload)
+        payload['job_id'] = 'job-2'
+        logging_config._stop_queue_listener()
+        
+        output = capsys.readouterr().out
+        assert "'job_id': 'job-1'" in output
+        assert 'sk-1234567890' not in output
+        assert logging_config._queue_listener is None
+    
+    def test_reconfigure_stops_previous_listener(self, restore_logging):
+        """Test configuring again replaces the running listener instead of leaking it."""
+        configure_logging(use_queue=True)
+        first = logging_config._queue_listener
+        
+        with patch.object(first, 'stop', wraps=first.stop) as stop:
+            configure_logging(use_queue=True)
+        
+        stop.assert_called_once()
+        assert logging_config._queue_listener is not first
+    
+    def test_without_queue(self, restore_logging):
+        """Test use_queue=False installs the sanitizing stream handler directly."""
+        configure_logging(use_queue=False)
+        
+        handler = logging.getLogger().handlers[0]
+        assert isinstance(handler, logging.StreamHandler)
+        assert isinstance(handler.formatter, logging_config.SanitizingFormatter)
+        assert logging_config._queue_listener is None
+    
+    def test_listener_stopped_at_exit(self):
+        """Test the module registers the listener shutdown to run at exit."""
+        spec = importlib.util.spec_from_file_location('_logging_config_copy', logging_config.__file__)
+        module = importlib.util.module_from_spec(spec)
+        module.__package__ = 'src.utils'
+        
+        with patch('atexit.register') as register:
+            spec.loader.exec_module(module)
+        
+        register.assert_called_once_with(module._stop_queue_listener)
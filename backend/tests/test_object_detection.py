@@ -3,12 +3,12 @@ Unit tests for the Object Detection Service.
 """
 
 import pytest
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import Mock, patch
 from PIL import Image
-import torch
-import numpy as np
 
 from src.services.object_detection import (
+    _compiled_select_detections,
+    _load_detr,
     ObjectDetectionService,
     ObjectDetectionConfig,
     BoundingBox,
@@ -61,6 +61,14 @@ class TestBoundingBox:
         )
         
         assert corners == expected
+    
+    def test_slots(self):
+        """Test bounding boxes are slotted and reject unknown attributes."""
+        bbox = BoundingBox(10, 20, 100, 150, 0.85, "picture frame")
+        
+        assert not hasattr(bbox, '__dict__')
+        with pytest.raises(AttributeError):
+            bbox.area = 15000
 
 class TestObjectDetectionConfig:
     """Tests for the ObjectDetectionConfig class."""
@@ -74,6 +82,7 @@ class TestObjectDetectionConfig:
         assert config.max_detections == 10
         assert "picture frame" in config.target_classes
         assert "tv" in config.target_classes
+        assert config.compile_postprocess is False
     
     def test_custom_config(self):
         """Test custom configuration values."""
@@ -89,14 +98,34 @@ class TestObjectDetectionConfig:
         assert config.model_name == "custom-model"
         assert config.target_classes == custom_classes
         assert config.max_detections == 5
+    
+    def test_target_set(self):
+        """Test target classes are also kept as a lower-cased frozenset."""
+        config = ObjectDetectionConfig(target_classes=["Laptop", "TV", "laptop"])
+        
+        assert config.target_classes == ["Laptop", "TV", "laptop"]
+        assert config._target_set == frozenset({"laptop", "tv"})
+    
+    def test_target_set_follows_reassignment(self):
+        """Test reassigning target classes rebuilds the lower-cased set."""
+        config = ObjectDetectionConfig(target_classes=["Laptop"])
+        
+        config.target_classes = ["Picture Frame", "tv"]
+        
+        assert config.target_classes == ["Picture Frame", "tv"]
+        assert config._target_set == frozenset({"picture frame", "tv"})
 
 class TestObjectDetectionService:
     """Tests for the ObjectDetectionService class."""
     
-    def setup_method(self):
+    @pytest.fixture(autouse=True)
+    def _setup(self, white_image_800x600):
         """Set up test fixtures."""
-        self.test_image = Image.new('RGB', (800, 600), color='white')
+        self.test_image = white_image_800x600
         self.config = ObjectDetectionConfig(confidence_threshold=0.5)
+        
+        # Models are cached per process; start every test from an empty cache
+        _load_detr.cache_clear()
     
     def test_initialization(self):
         """Test service initialization."""
@@ -128,13 +157,47 @@ class TestObjectDetectionService:
         
         # Verify model and processor were loaded
         mock_processor_class.from_pretrained.assert_called_once_with(self.config.model_name)
-        mock_model_class.from_pretrained.assert_called_once_with(self.config.model_name)
+        mock_model_class.from_pretrained.assert_called_once_with(
+            self.config.model_name, use_pretrained_backbone=False
+        )
         mock_model.to.assert_called_once()
         mock_model.eval.assert_called_once()
         
         assert service._processor == mock_processor
         assert service._model == mock_model
     
+    @patch('src.services.object_detection.DetrImageProcessor')
+    @patch('src.services.object_detection.DetrForObjectDetection')
+    def test_load_model_shared_across_instances(self, mock_model_class, mock_processor_class):
+        """Test that later services reuse the already loaded model."""
+        first = ObjectDetectionService(self.config)
+        second = ObjectDetectionService(self.config)
+        first._load_model()
+        second._load_model()
+        
+        mock_processor_class.from_pretrained.assert_called_once()
+        mock_model_class.from_pretrained.assert_called_once()
+        assert second._model is first._model
+        assert second._processor is first._processor
+    
+    @patch('src.services.object_detection.torch.compile')
+    @patch('src.services.object_detection.DetrImageProcessor')
+    @patch('src.services.object_detection.DetrForObjectDetection')
+    def test_load_model_compiles_on_gpu(self, mock_model_class, mock_processor_class, mock_compile, torch):
+        """Test that the model is compiled and warmed up on GPU but left eager on CPU."""
+        compiled_model = Mock()
+        mock_compile.return_value = compiled_model
+        mock_processor_class.from_pretrained.return_value.return_value = {"pixel_values": Mock()}
+        
+        processor, model = _load_detr(self.config.model_name, torch.device("cuda"))
+        
+        mock_compile.assert_called_once()
+        assert model is compiled_model
+        compiled_model.assert_called_once()  # warm-up pass
+        
+        _load_detr(self.config.model_name, torch.device("cpu"))
+        mock_compile.assert_called_once()
+    
     @patch('src.services.object_detection.DetrImageProcessor')
     @patch('src.services.object_detection.DetrForObjectDetection')
     def test_load_model_failure(self, mock_model_class, mock_processor_class):
@@ -146,40 +209,9 @@ class TestObjectDetectionService:
         with pytest.raises(Exception, match="Model not found"):
             service._load_model()
     
-    @patch('src.services.object_detection.torch')
-    def test_detect_objects_success(self, mock_torch):
+    def test_detect_objects_success(self, mocked_detr_service):
         """Test successful object detection."""
-        service = ObjectDetectionService(self.config)
-        
-        # Mock the model components
-        mock_processor = Mock()
-        mock_model = Mock()
-        service._processor = mock_processor
-        service._model = mock_model
-        
-        # Mock model config
-        mock_model.config.id2label = {0: "picture frame", 1: "laptop"}
-        
-        # Mock processor inputs and outputs  
-        mock_tensor = Mock()
-        mock_tensor.to.return_value = mock_tensor
-        mock_processor.return_value = {"input_ids": mock_tensor}
-        
-        # Mock model output
-        mock_outputs = Mock()
-        mock_model.return_value = mock_outputs
-        
-        # Mock post-processing results
-        mock_results = {
-            "scores": torch.tensor([0.85, 0.75]),
-            "labels": torch.tensor([0, 1]),
-            "boxes": torch.tensor([[400, 300, 200, 150], [600, 200, 150, 100]])  # center_x, center_y, width, height
-        }
-        mock_processor.post_process_object_detection.return_value = [mock_results]
-        
-        # Mock torch.tensor for target_sizes
-        mock_torch.tensor.return_value = torch.tensor([[600, 800]])  # height, width
-        mock_torch.device.return_value = "cpu"
+        service, mock_processor, mock_model = mocked_detr_service
         
         result = service.detect_objects(self.test_image)
         
@@ -188,80 +220,69 @@ class TestObjectDetectionService:
         assert abs(result[0].confidence - 0.85) < 1e-6
         assert result[1].label == "laptop"
         assert abs(result[1].confidence - 0.75) < 1e-6
+        mock_model.assert_called_once()
+        target_sizes = mock_processor.post_process_object_detection.call_args.kwargs["target_sizes"]
+        assert target_sizes.tolist() == [[600, 800]]  # height, width
     
-    @patch('src.services.object_detection.torch')
-    def test_detect_objects_with_target_classes_filter(self, mock_torch):
+    def test_detect_objects_with_target_classes_filter(self, mocked_detr_service):
         """Test object detection with target class filtering."""
-        config = ObjectDetectionConfig(target_classes=["picture frame"])
-        service = ObjectDetectionService(config)
-        
-        # Mock the model components
-        mock_processor = Mock()
-        mock_model = Mock()
-        service._processor = mock_processor
-        service._model = mock_model
-        
-        # Mock model config
+        service, mock_processor, mock_model = mocked_detr_service
+        service.config = ObjectDetectionConfig(target_classes=["picture frame"])
         mock_model.config.id2label = {0: "picture frame", 1: "car"}  # car should be filtered out
         
-        # Mock processor inputs and outputs  
-        mock_tensor = Mock()
-        mock_tensor.to.return_value = mock_tensor
-        mock_processor.return_value = {"input_ids": mock_tensor}
-        mock_model.return_value = Mock()
-        
-        # Mock post-processing results
-        mock_results = {
-            "scores": torch.tensor([0.85, 0.75]),
-            "labels": torch.tensor([0, 1]),
-            "boxes": torch.tensor([[400, 300, 200, 150], [600, 200, 150, 100]])
-        }
-        mock_processor.post_process_object_detection.return_value = [mock_results]
-        mock_torch.tensor.return_value = torch.tensor([[600, 800]])
-        mock_torch.device.return_value = "cpu"
-        
         result = service.detect_objects(self.test_image)
         
         # Only picture frame should be included
         assert len(result) == 1
         assert result[0].label == "picture frame"
     
-    @patch('src.services.object_detection.torch')
-    def test_detect_objects_max_detections_limit(self, mock_torch):
+    def test_detect_objects_max_detections_limit(self, mocked_detr_service):
         """Test max detections limit."""
-        config = ObjectDetectionConfig(max_detections=1)
-        service = ObjectDetectionService(config)
-        
-        # Mock the model components
-        mock_processor = Mock()
-        mock_model = Mock()
-        service._processor = mock_processor
-        service._model = mock_model
-        
-        # Mock model config
-        mock_model.config.id2label = {0: "picture frame", 1: "laptop"}
-        
-        # Mock processor inputs and outputs  
-        mock_tensor = Mock()
-        mock_tensor.to.return_value = mock_tensor
-        mock_processor.return_value = {"input_ids": mock_tensor}
-        mock_model.return_value = Mock()
-        
-        # Mock post-processing results with multiple detections
-        mock_results = {
-            "scores": torch.tensor([0.85, 0.75]),
-            "labels": torch.tensor([0, 1]),
-            "boxes": torch.tensor([[400, 300, 200, 150], [600, 200, 150, 100]])
-        }
-        mock_processor.post_process_object_detection.return_value = [mock_results]
-        mock_torch.tensor.return_value = torch.tensor([[600, 800]])
-        mock_torch.device.return_value = "cpu"
+        service, mock_processor, mock_model = mocked_detr_service
+        service.config = ObjectDetectionConfig(max_detections=1)
         
         result = service.detect_objects(self.test_image)
         
         # Only one detection should be returned due to limit
         assert len(result) == 1
     
+    def test_to_bounding_boxes_keeps_most_confident(self, torch):
+        """Test the detection limit keeps the highest scores and converts boxes."""
+        service = ObjectDetectionService(ObjectDetectionConfig(max_detections=2, target_classes=["frame", "tv"]))
+        service._model = Mock()
+        service._model.config.id2label = {0: "picture frame", 1: "tv", 2: "car"}
+        results = {
+            "scores": torch.tensor([0.6, 0.95, 0.8, 0.9]),
+            "labels": torch.tensor([0, 2, 1, 0]),
+            "boxes": torch.tensor([[50.0, 50.0, 20.0, 10.0]] * 4)
+        }
+        
+        boxes = service._to_bounding_boxes(results, service._allowed_label_ids())
+        
+        # The car is dropped by class, then the two most confident remain
+        assert [(box.label, round(box.confidence, 2)) for box in boxes] == [
+            ("picture frame", 0.9), ("tv", 0.8)
+        ]
+        assert (boxes[0].x, boxes[0].y, boxes[0].width, boxes[0].height) == (40.0, 45.0, 20.0, 10.0)
+    
+    def test_compile_postprocess(self, mocked_detr_service):
+        """Test the compiled post-processing helper is only used when enabled, and built once."""
+        service, mock_processor, mock_model = mocked_detr_service
+        _compiled_select_detections.cache_clear()
+        
+        # Stand in for torch.compile so the test doesn't pay for a real compile
+        with patch('src.services.object_detection.torch.compile', side_effect=lambda fn, **kwargs: Mock(wraps=fn)) as mock_compile:
+            eager = service.detect_objects(self.test_image)
+            mock_compile.assert_not_called()
+            
+            service.config.compile_postprocess = True
+            compiled = service.detect_objects(self.test_image)
+            service.detect_objects(self.test_image)
+        
+        _compiled_select_detections.cache_clear()
+        mock_compile.assert_called_once()
+        assert [box.to_dict() for box in compiled] == [box.to_dict() for box in eager]
+    
     def test_detect_objects_failure(self):
         """Test object detection failure."""
         service = ObjectDetectionService(self.config)
@@ -271,6 +292,51 @@ class TestObjectDetectionService:
             with pytest.raises(Exception):
                 service.detect_objects(self.test_image)
     
+    def test_detect_objects_batch_single_forward_pass(self, torch):
+        """Test a batch of images is preprocessed and run through the model once."""
+        service = ObjectDetectionService(self.config)
+        
+        mock_processor = Mock()
+        mock_model = Mock()
+        service._processor = mock_processor
+        service._model = mock_model
+        mock_model.config.id2label = {0: "picture frame", 1: "laptop"}
+        mock_processor.return_value = {
+            "pixel_values": torch.zeros(2, 3, 8, 8),
+            "pixel_mask": torch.ones(2, 8, 8, dtype=torch.long)
+        }
+        mock_processor.post_process_object_detection.return_value = [
+            {
+                "scores": torch.tensor([0.9]),
+                "labels": torch.tensor([0]),
+                "boxes": torch.tensor([[400, 300, 200, 150]])
+            },
+            {
+                "scores": torch.tensor([0.8, 0.75]),
+                "labels": torch.tensor([1, 0]),
+                "boxes": torch.tensor([[100, 100, 50, 50], [200, 200, 60, 60]])
+            }
+        ]
+        other_image = Image.new('RGB', (640, 480), color='white')
+        
+        result = service.detect_objects_batch([self.test_image, other_image])
+        
+        mock_processor.assert_called_once_with(images=[self.test_image, other_image], return_tensors="pt")
+        mock_model.assert_called_once()
+        target_sizes = mock_processor.post_process_object_detection.call_args.kwargs["target_sizes"]
+        assert target_sizes.tolist() == [[600, 800], [480, 640]]
+        assert [[box.label for box in boxes] for boxes in result] == [
+            ["picture frame"], ["laptop", "picture frame"]
+        ]
+    
+    def test_detect_objects_batch_empty(self):
+        """Test an empty batch returns no results without loading the model."""
+        service = ObjectDetectionService(self.config)
+        
+        with patch.object(service, '_load_model') as mock_load:
+            assert service.detect_objects_batch([]) == []
+        mock_load.assert_not_called()
+    
     def test_find_suitable_regions_success(self):
         """Test finding suitable regions successfully."""
         service = ObjectDetectionService(self.config)
@@ -330,6 +396,24 @@ class TestObjectDetectionService:
             assert result[1].confidence == 0.8
             assert result[2].confidence == 0.7
     
+    def test_find_suitable_regions_limited_to_max_detections(self):
+        """Test only the most confident regions up to max_detections are returned, without reordering the input."""
+        service = ObjectDetectionService(ObjectDetectionConfig(max_detections=2))
+        
+        mock_detections = [
+            BoundingBox(100, 100, 200, 200, 0.7, "frame 1"),
+            BoundingBox(300, 300, 200, 200, 0.9, "frame 2"),
+            BoundingBox(50, 50, 10, 10, 0.95, "small object"),
+            BoundingBox(500, 500, 200, 200, 0.8, "frame 3")
+        ]
+        original_order = list(mock_detections)
+        
+        with patch.object(service, 'detect_objects', return_value=mock_detections):
+            result = service.find_suitable_regions(self.test_image)
+        
+        assert [region.label for region in result] == ["frame 2", "frame 3"]
+        assert mock_detections == original_order
+    
     def test_find_suitable_regions_detection_error(self):
         """Test finding suitable regions when detection fails."""
         service = ObjectDetectionService(self.config)
@@ -341,9 +425,10 @@ class TestObjectDetectionService:
 class TestMockObjectDetectionService:
     """Tests for the MockObjectDetectionService class."""
     
-    def setup_method(self):
+    @pytest.fixture(autouse=True)
+    def _setup(self, white_image_800x600):
         """Set up test fixtures."""
-        self.test_image = Image.new('RGB', (800, 600), color='white')
+        self.test_image = white_image_800x600
         self.mock_service = MockObjectDetectionService()
     
     def test_mock_detect_objects(self):
@@ -403,6 +488,32 @@ class TestIntegration:
         except ImportError:
             pass  # bfl_api might not be importable, that's ok
     
+    def test_types_import_without_torch(self):
+        """Test the types module and mock service load without torch or transformers."""
+        import os
+        import subprocess
+        import sys
+        
+        backend_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+        code = (
+            "import sys\n"
+            "from src.services.object_detection_types import create_mock_detection_service\n"
+            "create_mock_detection_service()\n"
+            "print('torch' in sys.modules, 'transformers' in sys.modules)"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code], cwd=backend_path, capture_output=True, text=True, check=True
+        )
+        
+        assert result.stdout.split() == ["False", "False"]
+    
+    def test_types_reexported(self):
+        """Test the service module re-exports the same type objects."""
+        from src.services import object_detection, object_detection_types
+        
+        for name in ("BoundingBox", "ObjectDetectionConfig", "NoSuitableRegionsError", "MockObjectDetectionService"):
+            assert getattr(object_detection, name) is getattr(object_detection_types, name)
+    
     def test_memory_usage(self):
         """Test that service creation doesn't cause memory issues."""
         import psutil
@@ -0,0 +1,66 @@
+"""
+Unit tests for the TensorRT Object Detection Service.
+"""
+
+import pytest
+from unittest.mock import patch
+
+from src.services.object_detection import ObjectDetectionService, ObjectDetectionConfig
+from src.services import object_detection_trt
+from src.services.object_detection_trt import (
+    TensorRTObjectDetectionService,
+    create_detection_service,
+    tensorrt_available
+)
+
+class TestCreateDetectionService:
+    """Tests for choosing between the TensorRT and PyTorch services."""
+    
+    def test_falls_back_without_tensorrt(self, tmp_path):
+        """Test the PyTorch service is used when TensorRT is not installed."""
+        engine_path = tmp_path / "detr.engine"
+        engine_path.write_bytes(b"engine")
+        
+        with patch.object(object_detection_trt, 'TRT_AVAILABLE', False):
+            service = create_detection_service(engine_path=str(engine_path))
+        
+        assert type(service) is ObjectDetectionService
+    
+    def test_falls_back_without_engine_file(self, tmp_path):
+        """Test the PyTorch service is used when the engine has not been built."""
+        config = ObjectDetectionConfig(confidence_threshold=0.5)
+        
+        with patch.object(object_detection_trt, 'TRT_AVAILABLE', True), \
+             patch('torch.cuda.is_available', return_value=True):
+            service = create_detection_service(config, engine_path=str(tmp_path / "missing.engine"))
+        
+        assert type(service) is ObjectDetectionService
+        assert service.config is config
+    
+    def test_uses_tensorrt_when_engine_available(self, tmp_path):
+        """Test the TensorRT service is chosen when TensorRT, a GPU and the engine exist."""
+        engine_path = tmp_path / "detr.engine"
+        engine_path.write_bytes(b"engine")
+        
+        with patch.object(object_detection_trt, 'TRT_AVAILABLE', True), \
+             patch('torch.cuda.is_available', return_value=True):
+            assert tensorrt_available(str(engine_path))
+            service = create_detection_service(engine_path=str(engine_path))
+        
+        assert isinstance(service, TensorRTObjectDetectionService)
+        assert service.engine_path == str(engine_path)
+        # The engine is only deserialized on first detection
+        assert service._model is None
+
+class TestTensorRTEngine:
+    """Tests that need a real TensorRT installation."""
+    
+    def test_missing_engine_raises(self, tmp_path):
+        """Test loading a nonexistent engine surfaces the error."""
+        pytest.importorskip("tensorrt")
+        
+        service = TensorRTObjectDetectionService(engine_path=str(tmp_path / "missing.engine"))
+        with patch('src.services.object_detection_trt.DetrImageProcessor'), \
+             patch('src.services.object_detection_trt.DetrConfig'):
+            with pytest.raises(FileNotFoundError):
+                service._load_model()
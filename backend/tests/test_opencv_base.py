@@ -3,6 +3,8 @@ Unit tests for OpenCV object detection base classes
 """
 
 import pytest
+import cv2
+from unittest.mock import Mock
 import numpy as np
 import sys
 import os
@@ -12,8 +14,11 @@ backend_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 if backend_path not in sys.path:
     sys.path.insert(0, backend_path)
 
-from src.services.opencv_detection.base import BoundingBox, BaseDetector
+from src.services.opencv_detection import base
+from src.services.opencv_detection.base import BoundingBox, BoundingBoxArray, BaseDetector, ImageContext
 from src.services.opencv_detection.config import OpenCVObjectDetectionConfig
+from src.services.opencv_detection._fastfilter import filter_mask
+from src.services.opencv_detection._fastmerge import merge_groups
 
 
 class TestBoundingBox:
@@ -46,6 +51,15 @@ class TestBoundingBox:
         assert bbox_dict['confidence'] == 0.85
         assert bbox_dict['label'] == "test_region"
     
+    def test_bounding_box_slots(self):
+        """Test bounding boxes are slotted but still compare and pickle by value."""
+        import pickle
+        bbox = BoundingBox(x=10, y=20, width=100, height=50, 
+                          confidence=0.85, label="test_region")
+        
+        assert not hasattr(bbox, '__dict__')
+        assert pickle.loads(pickle.dumps(bbox)) == bbox
+    
     def test_get_corners(self):
         """Test getting corners of bounding box."""
         bbox = BoundingBox(x=10, y=20, width=100, height=50, 
@@ -128,10 +142,122 @@ class TestBoundingBox:
         assert iou11 == 1.0
 
 
+class TestBoundingBoxArray:
+    """Test cases for the vectorized BoundingBoxArray."""
+    
+    def setup_method(self):
+        """Set up a few overlapping and disjoint boxes."""
+        self.boxes = [
+            BoundingBox(x=0, y=0, width=100, height=100, confidence=0.9, label="a"),
+            BoundingBox(x=50, y=50, width=100, height=100, confidence=0.8, label="b"),
+            BoundingBox(x=200, y=200, width=100, height=0, confidence=0.7, label="c"),
+        ]
+        self.array = BoundingBoxArray.from_list(self.boxes)
+    
+    def test_round_trip(self):
+        """Test converting to arrays and back preserves every box."""
+        assert len(self.array) == 3
+        assert self.array.to_list() == self.boxes
+    
+    def test_geometry_matches_scalar_methods(self):
+        """Test corners, centers, areas and aspect ratios match the per-box methods."""
+        np.testing.assert_array_equal(self.array.corners(), [box.get_corners() for box in self.boxes])
+        np.testing.assert_array_equal(self.array.centers(), [box.get_center() for box in self.boxes])
+        np.testing.assert_array_equal(self.array.areas(), [box.get_area() for box in self.boxes])
+        np.testing.assert_array_equal(self.array.aspect_ratios(), [box.get_aspect_ratio() for box in self.boxes])
+    
+    def test_pixel_corners(self):
+        """Test pixel corners are rounded int32 corners usable by cv2.polylines."""
+        import cv2
+        boxes = BoundingBoxArray.from_list([
+            BoundingBox(x=10.4, y=20.6, width=30.2, height=40.5, confidence=0.9, label="a"),
+        ] + self.boxes)
+        
+        pixel_corners = boxes.pixel_corners()
+        
+        assert pixel_corners.dtype == np.int32
+        assert pixel_corners[0].tolist() == [[10, 21], [41, 21], [41, 61], [10, 61]]
+        np.testing.assert_array_equal(pixel_corners[1:], self.array.corners())
+        
+        canvas = np.zeros((400, 400), dtype=np.uint8)
+        cv2.polylines(canvas, pixel_corners, isClosed=True, color=255)
+        assert canvas[21, 10] == 255
+    
+    def test_aspect_ratios_without_divide_by_zero(self):
+        """Test zero and negative heights give 0 without dividing by them."""
+        boxes = [
+            BoundingBox(x=0, y=0, width=30, height=0, confidence=0.9, label="flat"),
+            BoundingBox(x=0, y=0, width=30, height=-5, confidence=0.9, label="inverted"),
+            BoundingBox(x=0, y=0, width=30, height=20, confidence=0.9, label="normal"),
+        ]
+        
+        with np.errstate(all='raise'):
+            ratios = BoundingBoxArray.from_list(boxes).aspect_ratios()
+        
+        np.testing.assert_array_equal(ratios, [box.get_aspect_ratio() for box in boxes])
+        np.testing.assert_array_equal(ratios, [0.0, 0.0, 1.5])
+    
+    def test_pairwise_iou_matches_scalar_iou(self):
+        """Test the IoU matrix matches intersection_over_union for every pair."""
+        iou = self.array.pairwise_iou()
+        
+        assert iou.shape == (3, 3)
+        for i, box_i in enumerate(self.boxes):
+            for j, box_j in enumerate(self.boxes):
+                assert iou[i, j] == pytest.approx(box_i.intersection_over_union(box_j))
+    
+    def test_empty(self):
+        """Test an empty list produces empty arrays."""
+        empty = BoundingBoxArray.from_list([])
+        
+        assert len(empty) == 0
+        assert empty.corners().shape == (0, 4, 2)
+        assert empty.pairwise_iou().shape == (0, 0)
+
+
+class TestImageContext:
+    """Test cases for the shared color conversions."""
+    
+    def test_conversions_match_cvtcolor(self, noise_image_200x200):
+        """Test each conversion matches a direct cvtColor call."""
+        bgr = np.asarray(noise_image_200x200)[:, :, ::-1].copy()
+        context = ImageContext(bgr)
+        
+        assert np.array_equal(context.gray, cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY))
+        assert np.array_equal(context.lab, cv2.cvtColor(bgr, cv2.COLOR_BGR2LAB))
+        assert np.array_equal(context.hsv, cv2.cvtColor(bgr, cv2.COLOR_BGR2HSV))
+    
+    def test_conversions_computed_once(self, noise_image_200x200):
+        """Test repeated reads return the same array instead of converting again."""
+        context = ImageContext(np.asarray(noise_image_200x200))
+        
+        assert context.gray is context.gray
+        assert context.lab is context.lab
+    
+    def test_release_returns_buffers_to_pool(self, noise_image_200x200):
+        """Test conversions and buffers come from the pool and go back on release."""
+        pool = Mock()
+        pool.get.side_effect = lambda shape, dtype: np.empty(shape, dtype)
+        context = ImageContext(np.asarray(noise_image_200x200), pool)
+        
+        gray = context.gray
+        edges = context.buffer((200, 200))
+        context.release()
+        
+        released = pool.release.call_args.args[0]
+        assert [id(b) for b in released] == [id(gray), id(edges)]
+    
+    def test_gray_image_used_as_is(self):
+        """Test a single channel image is its own grayscale conversion."""
+        gray = np.zeros((20, 30), dtype=np.uint8)
+        
+        assert ImageContext(gray).gray is gray
+
+
 class MockDetector(BaseDetector):
     """Mock detector for testing base class functionality."""
     
-    def detect(self, image: np.ndarray) -> list:
+    def detect(self, image: np.ndarray, context=None) -> list:
         """Simple mock detection that returns fixed regions."""
         height, width = image.shape[:2]
         return [
@@ -155,7 +281,7 @@ class TestBaseDetector:
         assert detector.config == config
         assert detector.name == "MockDetector"
     
-    def test_filter_regions_size_constraints(self):
+    def test_filter_regions_size_constraints(self, blank_image_200x200):
         """Test filtering regions by size constraints."""
         config = OpenCVObjectDetectionConfig(
             min_area_ratio=0.05,  # 5% of image
@@ -164,7 +290,7 @@ class TestBaseDetector:
         detector = MockDetector(config)
         
         # Create test image 200x200
-        image = np.zeros((200, 200, 3), dtype=np.uint8)
+        image = blank_image_200x200
         image_area = 200 * 200  # 40000
         
         regions = [
@@ -184,14 +310,14 @@ class TestBaseDetector:
         assert len(filtered) == 1
         assert filtered[0].label == "medium"
     
-    def test_filter_regions_aspect_ratio(self):
+    def test_filter_regions_aspect_ratio(self, blank_image_200x200):
         """Test filtering regions by aspect ratio."""
         config = OpenCVObjectDetectionConfig(
             aspect_ratio_range=(0.5, 2.0)
         )
         detector = MockDetector(config)
         
-        image = np.zeros((200, 200, 3), dtype=np.uint8)
+        image = blank_image_200x200
         
         regions = [
             # Too wide (aspect ratio 4.0)
@@ -210,14 +336,14 @@ class TestBaseDetector:
         assert len(filtered) == 1
         assert filtered[0].label == "good"
     
-    def test_filter_regions_confidence(self):
+    def test_filter_regions_confidence(self, blank_image_200x200):
         """Test filtering regions by confidence threshold."""
         config = OpenCVObjectDetectionConfig(
             confidence_threshold=0.7
         )
         detector = MockDetector(config)
         
-        image = np.zeros((200, 200, 3), dtype=np.uint8)
+        image = blank_image_200x200
         
         regions = [
             BoundingBox(x=0, y=0, width=50, height=50, 
@@ -233,12 +359,12 @@ class TestBaseDetector:
         assert len(filtered) == 2
         assert all(r.confidence >= 0.7 for r in filtered)
     
-    def test_filter_regions_out_of_bounds(self):
+    def test_filter_regions_out_of_bounds(self, blank_image_200x200):
         """Test filtering regions that are out of image bounds."""
         config = OpenCVObjectDetectionConfig()
         detector = MockDetector(config)
         
-        image = np.zeros((200, 200, 3), dtype=np.uint8)
+        image = blank_image_200x200
         
         regions = [
             # Negative coordinates
@@ -257,6 +383,30 @@ class TestBaseDetector:
         assert len(filtered) == 1
         assert filtered[0].label == "good"
     
+    def test_filter_mask(self):
+        """Test each constraint rejects its box, including a zero-height box."""
+        xs = np.array([10.0, -5.0, 150.0, 10.0, 10.0, 10.0, 10.0, 10.0])
+        ys = np.array([10.0, 10.0, 10.0, 10.0, 10.0, 10.0, 10.0, 10.0])
+        widths = np.array([50.0, 50.0, 100.0, 5.0, 190.0, 150.0, 50.0, 50.0])
+        heights = np.array([50.0, 50.0, 50.0, 5.0, 185.0, 30.0, 50.0, 0.0])
+        confidences = np.array([0.9, 0.9, 0.9, 0.9, 0.9, 0.9, 0.1, 0.9])
+        
+        keep = filter_mask(xs, ys, widths, heights, confidences, 200, 200, 0.01, 0.8, 0.5, 2.0, 0.5)
+        
+        np.testing.assert_array_equal(keep, [True] + [False] * 7)
+    
+    def test_merge_groups(self):
+        """Test the merge scan joins overlapping regions into the first merged region they overlap."""
+        xs = np.array([0.0, 10.0, 200.0, 5.0])
+        ys = np.array([0.0, 10.0, 200.0, 0.0])
+        widths = np.array([100.0, 100.0, 50.0, 100.0])
+        heights = np.array([100.0, 100.0, 50.0, 100.0])
+        order = np.array([0, 1, 2, 3])
+        
+        groups = merge_groups(xs, ys, widths, heights, order, 0.5)
+        
+        np.testing.assert_array_equal(groups, [0, 0, 1, 0])
+    
     def test_merge_overlapping_regions(self):
         """Test merging overlapping regions."""
         config = OpenCVObjectDetectionConfig()
@@ -283,6 +433,29 @@ class TestBaseDetector:
         assert merged_region.width == 150
         assert merged_region.height == 150
         assert merged_region.confidence == 0.9  # Takes highest confidence
+    
+    def test_merge_overlapping_regions_array_scan_matches_scalar(self, monkeypatch):
+        """Test the array scan used for many regions merges exactly like the per-pair scan."""
+        detector = MockDetector(OpenCVObjectDetectionConfig())
+        rng = np.random.default_rng(0)
+        centers = rng.uniform(100, 700, (10, 2))
+        regions = [
+            BoundingBox(x=float(cx), y=float(cy), width=float(w), height=float(h),
+                        confidence=float(round(conf, 1)), label=f"region{i}")
+            for i, ((cx, cy), (w, h), conf) in enumerate(zip(
+                centers[np.arange(40) % 10] + rng.normal(0, 10, (40, 2)),
+                rng.uniform(50, 200, (40, 2)),
+                rng.uniform(0, 1, 40)
+            ))
+        ]
+        
+        monkeypatch.setattr(base, 'VECTORIZED_MERGE_MIN_REGIONS', len(regions) + 1)
+        scalar = detector.merge_overlapping_regions(regions, iou_threshold=0.3)
+        monkeypatch.setattr(base, 'VECTORIZED_MERGE_MIN_REGIONS', 0)
+        vectorized = detector.merge_overlapping_regions(regions, iou_threshold=0.3)
+        
+        assert vectorized == scalar
+        assert len(regions) > len(scalar) > 1
 
 
 if __name__ == '__main__':
@@ -3,17 +3,15 @@ Unit tests for OpenCV object detection configuration
 """
 
 import pytest
-import sys
-import os
-
-# Add the backend directory to Python path
-backend_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-if backend_path not in sys.path:
-    sys.path.insert(0, backend_path)
 
 from src.services.opencv_detection.config import OpenCVObjectDetectionConfig
 
 
+def _fields(config, expected):
+    """Pick the fields named in expected off config, so one assert diffs them all."""
+    return {name: getattr(config, name) for name in expected}
+
+
 class TestOpenCVObjectDetectionConfig:
     """Test cases for OpenCV detection configuration."""
     
@@ -21,20 +19,21 @@ class TestOpenCVObjectDetectionConfig:
         """Test default configuration values."""
         config = OpenCVObjectDetectionConfig()
         
-        # Edge detection parameters
-        assert config.canny_low_threshold == 50
-        assert config.canny_high_threshold == 150
-        assert config.gaussian_blur_kernel == (5, 5)
-        
-        # Region filtering parameters
-        assert config.min_area_ratio == 0.01
-        assert config.max_area_ratio == 0.8
-        assert config.aspect_ratio_range == (0.3, 3.0)
-        
-        # General parameters
-        assert config.confidence_threshold == 0.5
-        assert config.max_detections == 10
-        assert config.enable_fallback is True
+        expected = {
+            # Edge detection parameters
+            'canny_low_threshold': 50,
+            'canny_high_threshold': 150,
+            'gaussian_blur_kernel': (5, 5),
+            # Region filtering parameters
+            'min_area_ratio': 0.01,
+            'max_area_ratio': 0.8,
+            'aspect_ratio_range': (0.3, 3.0),
+            # General parameters
+            'confidence_threshold': 0.5,
+            'max_detections': 10,
+            'enable_fallback': True,
+        }
+        assert _fields(config, expected) == expected
     
     def test_config_validation_valid(self):
         """Test validation with valid configuration."""
@@ -42,106 +41,73 @@ class TestOpenCVObjectDetectionConfig:
         # Should not raise any exception
         config.validate()
     
-    def test_config_validation_invalid_canny_thresholds(self):
-        """Test validation with invalid Canny thresholds."""
-        config = OpenCVObjectDetectionConfig(
-            canny_low_threshold=150,
-            canny_high_threshold=50
-        )
-        with pytest.raises(ValueError, match="Canny low threshold must be less than high threshold"):
-            config.validate()
-    
-    def test_config_validation_invalid_area_ratios(self):
-        """Test validation with invalid area ratios."""
-        config = OpenCVObjectDetectionConfig(
-            min_area_ratio=0.9,
-            max_area_ratio=0.1
-        )
-        with pytest.raises(ValueError, match="Min area ratio must be less than max area ratio"):
-            config.validate()
-    
-    def test_config_validation_invalid_aspect_ratios(self):
-        """Test validation with invalid aspect ratios."""
-        config = OpenCVObjectDetectionConfig(
-            aspect_ratio_range=(3.0, 0.3)
-        )
-        with pytest.raises(ValueError, match="Min aspect ratio must be less than max aspect ratio"):
-            config.validate()
-    
-    def test_config_validation_invalid_confidence_threshold(self):
-        """Test validation with invalid confidence threshold."""
-        config = OpenCVObjectDetectionConfig(
-            confidence_threshold=1.5
-        )
-        with pytest.raises(ValueError, match="Confidence threshold must be between 0 and 1"):
-            config.validate()
-    
-    def test_config_validation_invalid_max_detections(self):
-        """Test validation with invalid max detections."""
-        config = OpenCVObjectDetectionConfig(
-            max_detections=0
-        )
-        with pytest.raises(ValueError, match="Max detections must be at least 1"):
-            config.validate()
-    
-    def test_config_validation_invalid_weights(self):
-        """Test validation with invalid scoring weights."""
-        config = OpenCVObjectDetectionConfig(
-            scoring_weights={
-                'confidence': 0.5,
-                'size': 0.3,
-                'aspect_ratio': 0.2,
-                'position': 0.2,
-                'edge_distance': 0.1  # Sum = 1.3 > 1.0
-            }
-        )
-        with pytest.raises(ValueError, match="Scoring weights must sum to 1.0"):
+    @pytest.mark.parametrize("kwargs,message", [
+        (dict(canny_low_threshold=150, canny_high_threshold=50),
+         "Canny low threshold must be less than high threshold"),
+        (dict(min_area_ratio=0.9, max_area_ratio=0.1),
+         "Min area ratio must be less than max area ratio"),
+        (dict(aspect_ratio_range=(3.0, 0.3)),
+         "Min aspect ratio must be less than max aspect ratio"),
+        (dict(confidence_threshold=1.5),
+         "Confidence threshold must be between 0 and 1"),
+        (dict(max_detections=0),
+         "Max detections must be at least 1"),
+        (dict(scoring_weights={
+            'confidence': 0.5,
+            'size': 0.3,
+            'aspect_ratio': 0.2,
+            'position': 0.2,
+            'edge_distance': 0.1  # Sum = 1.3 > 1.0
+        }), "Scoring weights must sum to 1.0"),
+        (dict(merge_method='nms'),
+         "Invalid merge method"),
+        (dict(detection_downscale=0),
+         "Detection downscale must be at least 1"),
+    ], ids=['canny_thresholds', 'area_ratios', 'aspect_ratios', 'confidence_threshold', 'max_detections', 'weights',
+            'merge_method', 'detection_downscale'])
+    def test_config_validation_invalid(self, kwargs, message):
+        """Test validation rejects each invalid setting."""
+        config = OpenCVObjectDetectionConfig(**kwargs)
+        with pytest.raises(ValueError, match=message):
             config.validate()
     
-    def test_high_quality_preset(self):
-        """Test high quality configuration preset."""
-        config = OpenCVObjectDetectionConfig.for_high_quality()
-        
-        assert config.canny_low_threshold == 30
-        assert config.canny_high_threshold == 100
-        assert config.confidence_threshold == 0.7
-        assert config.min_area_ratio == 0.02
-        assert config.max_area_ratio == 0.7
-        assert config.enable_parallel_detection is True
-        
-        # Should be valid
-        config.validate()
-    
-    def test_fast_detection_preset(self):
-        """Test fast detection configuration preset."""
-        config = OpenCVObjectDetectionConfig.for_fast_detection()
-        
-        assert config.canny_low_threshold == 70
-        assert config.canny_high_threshold == 170
-        assert config.confidence_threshold == 0.4
-        assert len(config.template_scales) == 3
-        assert config.enable_parallel_detection is False
-        assert config.detection_timeout == 2.0
-        
-        # Should be valid
-        config.validate()
-    
-    def test_mockup_template_preset(self):
-        """Test mockup template configuration preset."""
-        config = OpenCVObjectDetectionConfig.for_mockup_templates()
-        
-        assert config.canny_low_threshold == 40
-        assert config.canny_high_threshold == 120
-        assert config.min_area_ratio == 0.05
-        assert config.max_area_ratio == 0.6
-        assert config.aspect_ratio_range == (0.5, 2.0)
-        assert config.confidence_threshold == 0.6
-        assert len(config.template_scales) == 5
+    @pytest.mark.parametrize("factory,expected,scale_count", [
+        (OpenCVObjectDetectionConfig.for_high_quality, {
+            'canny_low_threshold': 30,
+            'canny_high_threshold': 100,
+            'confidence_threshold': 0.7,
+            'min_area_ratio': 0.02,
+            'max_area_ratio': 0.7,
+            'enable_parallel_detection': True,
+        }, None),
+        (OpenCVObjectDetectionConfig.for_fast_detection, {
+            'canny_low_threshold': 70,
+            'canny_high_threshold': 170,
+            'confidence_threshold': 0.4,
+            'enable_parallel_detection': False,
+            'detection_timeout': 2.0,
+            'detection_downscale': 2,
+        }, 3),
+        (OpenCVObjectDetectionConfig.for_mockup_templates, {
+            'canny_low_threshold': 40,
+            'canny_high_threshold': 120,
+            'min_area_ratio': 0.05,
+            'max_area_ratio': 0.6,
+            'aspect_ratio_range': (0.5, 2.0),
+            'confidence_threshold': 0.6,
+            # Mockup-specific weights
+            'size_weight': 0.4,
+            'position_weight': 0.3,
+            'confidence_weight': 0.3,
+        }, 5),
+    ], ids=['high_quality', 'fast_detection', 'mockup_templates'])
+    def test_preset(self, factory, expected, scale_count):
+        """Test configuration presets."""
+        config = factory()
         
-        # Check mockup-specific weights
-        assert config.size_weight == 0.4
-        assert config.position_weight == 0.3
-        assert config.confidence_weight == 0.3
+        assert _fields(config, expected) == expected
+        if scale_count is not None:
+            assert len(config.template_scales) == scale_count
         
         # Should be valid
         config.validate()
@@ -168,7 +134,3 @@ class TestOpenCVObjectDetectionConfig:
         
         # Should be valid
         config.validate()
-
-
-if __name__ == '__main__':
-    pytest.main([__file__, '-v'])
\ No newline at end of file
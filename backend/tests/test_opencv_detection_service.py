@@ -13,9 +13,12 @@ from src.services.opencv_detection import (
     OpenCVObjectDetectionService,
     OpenCVObjectDetectionConfig,
     BoundingBox,
+    BoundingBoxArray,
     ObjectDetectionError,
     NoSuitableRegionsError
 )
+from src.services.opencv_detection import opencv_detection_service
+from src.services.opencv_detection.opencv_detection_service import GROUP_RECTANGLES_AVAILABLE, _ScratchPool
 from src.services.opencv_detection.detectors import (
     EdgeBasedDetector,
     ContourBasedDetector,
@@ -25,6 +28,20 @@ from src.services.opencv_detection.detectors import (
 )
 
 
+def _random_detections(n, seed=0):
+    """Detections clustered around a few frames, the way several detectors report the same areas."""
+    rng = np.random.default_rng(seed)
+    centers = rng.uniform(100, 700, (max(1, n // 4), 2))
+    return [
+        BoundingBox(float(cx), float(cy), float(w), float(h), float(round(conf, 1)), f"region{i}")
+        for i, ((cx, cy), (w, h), conf) in enumerate(zip(
+            centers[np.arange(n) % len(centers)] + rng.normal(0, 10, (n, 2)),
+            rng.uniform(50, 200, (n, 2)),
+            rng.uniform(0, 1, n)
+        ))
+    ]
+
+
 class TestOpenCVObjectDetectionService:
     """Test cases for OpenCVObjectDetectionService."""
     
@@ -96,6 +113,50 @@ class TestOpenCVObjectDetectionService:
         detections = service.detect_objects(image)
         assert len(detections) > 0
         
+    def test_detectors_share_color_conversions(self, monkeypatch):
+        """Test the grayscale conversion is made once for all detectors that use it."""
+        import cv2
+        cvt_color = Mock(wraps=cv2.cvtColor)
+        monkeypatch.setattr(cv2, 'cvtColor', cvt_color)
+        
+        config = OpenCVObjectDetectionConfig(
+            enabled_detectors=['edge', 'contour', 'template'],
+            parallel_processing=True
+        )
+        service = OpenCVObjectDetectionService(config)
+        
+        image = Image.new('RGB', (200, 200), 'white')
+        draw = ImageDraw.Draw(image)
+        draw.rectangle([40, 40, 160, 160], outline='black', width=3)
+        service.detect_objects(image)
+        
+        codes = [call.args[1] for call in cvt_color.call_args_list]
+        assert codes.count(cv2.COLOR_BGR2GRAY) == 1
+        
+    def test_scratch_buffers_reused_between_calls(self):
+        """Test detection passes hand their buffers back to the service's scratch pool."""
+        config = OpenCVObjectDetectionConfig(enabled_detectors=['edge', 'contour', 'color'])
+        service = OpenCVObjectDetectionService(config)
+        
+        image = Image.new('RGB', (200, 200), 'white')
+        draw = ImageDraw.Draw(image)
+        draw.rectangle([40, 40, 160, 160], outline='black', width=3)
+        
+        free_buffers = lambda: {id(b) for buffers in service._scratch._free.values() for b in buffers}
+        first = service.detect_objects(image)
+        after_first = free_buffers()
+        second = service.detect_objects(image)
+        
+        assert first == second
+        assert after_first and free_buffers() == after_first
+        
+    def test_scratch_pool_limits_shapes(self):
+        """Test the scratch pool starts over instead of keeping buffers for every shape."""
+        pool = _ScratchPool()
+        pool.release([np.empty((size, size), np.uint8) for size in range(1, 40)])
+        
+        assert len(pool._free) <= 16
+        
     def test_early_termination(self):
         """Test early termination when enough high-confidence detections found."""
         # Create image with multiple rectangles
@@ -118,7 +179,7 @@ class TestOpenCVObjectDetectionService:
         
         for name, detector in original_detectors.items():
             mock_detector = Mock(spec=detector)
-            mock_detector.detect.side_effect = lambda img, n=name: (
+            mock_detector.detect.side_effect = lambda img, context=None, n=name: (
                 call_order.append(n),
                 [BoundingBox(0, 0, 50, 50, 0.9, f"test_{n}")] * 2
             )[1]
@@ -145,6 +206,91 @@ class TestOpenCVObjectDetectionService:
         # Should merge first two, keep third separate
         assert len(merged) == 2
         
+    def test_merge_single_detection_skips_scan(self):
+        """Test a lone detection is returned without running the merge scan."""
+        service = OpenCVObjectDetectionService()
+        detection = BoundingBox(0, 0, 100, 100, 0.9, "only")
+        
+        with patch('src.services.opencv_detection.opencv_detection_service.merge_groups') as scan:
+            assert service._merge_overlapping_regions([detection]) == [detection]
+            assert service._merge_overlapping_regions([]) == []
+        scan.assert_not_called()
+        
+    @pytest.mark.skipif(not GROUP_RECTANGLES_AVAILABLE, reason="cv2.groupRectangles not in this OpenCV build")
+    def test_merge_group_rectangles(self):
+        """Test the OpenCV grouping merge averages groups and keeps their best member's label."""
+        config = OpenCVObjectDetectionConfig(merge_method='group_rectangles')
+        service = OpenCVObjectDetectionService(config)
+        
+        detections = [
+            BoundingBox(0, 0, 100, 100, 0.8, "test1"),
+            BoundingBox(4, 4, 100, 100, 0.9, "test2"),
+            BoundingBox(200, 200, 100, 100, 0.7, "test3")
+        ]
+        
+        merged = sorted(service._merge_overlapping_regions(detections), key=lambda b: b.x)
+        
+        assert [(b.x, b.y, b.width, b.height) for b in merged] == [(2, 2, 100, 100), (200, 200, 100, 100)]
+        assert [(b.confidence, b.label) for b in merged] == [(0.9, "test2"), (0.7, "test3")]
+    
+    def test_merge_group_rectangles_membership(self):
+        """Test detections join the group they overlap most, and groups without members are dropped."""
+        config = OpenCVObjectDetectionConfig(merge_method='group_rectangles', merge_group_eps=0.3)
+        with patch('src.services.opencv_detection.opencv_detection_service.GROUP_RECTANGLES_AVAILABLE', True):
+            service = OpenCVObjectDetectionService(config)
+        
+        detections = [
+            BoundingBox(0, 0, 100, 100, 0.8, "test1"),
+            BoundingBox(4.4, 4.6, 100, 100, 0.9, "test2"),
+            BoundingBox(20, 20, 30, 30, 0.95, "inside"),
+            BoundingBox(200, 200, 100, 100, 0.7, "test3")
+        ]
+        # Stand-in for OpenCV's grouping: two groups, plus one that no detection overlaps
+        grouped = [[2, 2, 100, 100], [200, 200, 100, 100], [600, 600, 50, 50]]
+        
+        with patch('cv2.groupRectangles', create=True, return_value=(grouped, [3, 2, 2])) as group:
+            merged = service._merge_overlapping_regions(detections)
+        
+        rects, threshold, eps = group.call_args.args
+        assert rects == [[0, 0, 100, 100], [4, 5, 100, 100], [20, 20, 30, 30], [200, 200, 100, 100]] * 2
+        assert (threshold, eps) == (1, 0.3)
+        assert [(b.x, b.y, b.width, b.height) for b in merged] == [(2, 2, 100, 100), (200, 200, 100, 100)]
+        assert [(b.confidence, b.label) for b in merged] == [(0.95, "inside"), (0.7, "test3")]
+        
+        with patch('cv2.groupRectangles', create=True, return_value=((), ())):
+            assert service._merge_overlapping_regions(detections) == []
+    
+    def test_merge_group_rectangles_falls_back_to_iou(self):
+        """Test the grouping merge falls back to the IoU merge when OpenCV lacks groupRectangles."""
+        config = OpenCVObjectDetectionConfig(merge_method='group_rectangles')
+        detections = [
+            BoundingBox(0, 0, 100, 100, 0.9, "test1"),
+            BoundingBox(10, 10, 100, 100, 0.8, "test2"),
+            BoundingBox(200, 200, 100, 100, 0.7, "test3")
+        ]
+        
+        with patch('src.services.opencv_detection.opencv_detection_service.GROUP_RECTANGLES_AVAILABLE', False):
+            service = OpenCVObjectDetectionService(config)
+        
+        assert service._merge_overlapping_regions(detections) == \
+            OpenCVObjectDetectionService()._merge_overlapping_regions(detections)
+    
+    def test_merge_overlapping_regions_grown_region(self):
+        """Test that a merged region absorbs detections it only overlaps after growing."""
+        service = OpenCVObjectDetectionService()
+        
+        detections = [
+            BoundingBox(0, 0, 190, 190, 0.7, "outer"),  # IoU 0.28 with each of the others
+            BoundingBox(0, 30, 100, 100, 0.8, "lower"),
+            BoundingBox(0, 0, 100, 100, 0.9, "upper")
+        ]
+        
+        merged = service._merge_overlapping_regions(detections)
+        
+        # upper absorbs lower first; the grown 100x130 region then overlaps outer by IoU 0.36
+        assert len(merged) == 1
+        assert (merged[0].width, merged[0].height, merged[0].label) == (190, 190, "upper")
+        
     def test_calculate_iou(self):
         """Test IoU calculation."""
         service = OpenCVObjectDetectionService()
@@ -169,6 +315,49 @@ class TestOpenCVObjectDetectionService:
         iou = service._calculate_iou(box1, box2)
         assert iou == 0.0
         
+    def test_calculate_iou_touching(self):
+        """Test IoU calculation for boxes that only share an edge."""
+        service = OpenCVObjectDetectionService()
+        
+        box1 = BoundingBox(0, 0, 100, 100, 0.9, "test1")
+        box2 = BoundingBox(100, 20, 100, 50, 0.8, "test2")
+        
+        assert service._calculate_iou(box1, box2) == 0.0
+        assert service._calculate_iou(box2, box1) == 0.0
+        
+    def test_merge_overlapping_regions_many(self):
+        """Test merging hundreds of detections pairs each region with its own duplicate, in input order."""
+        service = OpenCVObjectDetectionService()
+        
+        # 300 disjoint regions on a grid, each with a slightly shifted duplicate
+        originals = [
+            BoundingBox(col * 200, row * 200, 100, 100, 0.9, f"region{row}_{col}")
+            for row in range(15) for col in range(20)
+        ]
+        duplicates = [
+            BoundingBox(box.x + 5, box.y + 5, 100, 100, 0.5, "duplicate")
+            for box in originals
+        ]
+        
+        merged = service._merge_overlapping_regions(originals + duplicates)
+        
+        assert len(merged) == 300
+        assert [box.label for box in merged] == [box.label for box in originals]
+        assert all(box.width == 105 and box.height == 105 for box in merged)
+        
+    def test_merge_array_scan_matches_scalar(self, monkeypatch):
+        """Test the array scan used for many detections merges exactly like the per-pair scan."""
+        service = OpenCVObjectDetectionService()
+        detections = _random_detections(40)
+        
+        monkeypatch.setattr(opencv_detection_service, 'VECTORIZED_MERGE_MIN_REGIONS', len(detections) + 1)
+        scalar = service._merge_overlapping_regions(detections)
+        monkeypatch.setattr(opencv_detection_service, 'VECTORIZED_MERGE_MIN_REGIONS', 0)
+        vectorized = service._merge_overlapping_regions(detections)
+        
+        assert vectorized == scalar
+        assert len(detections) > len(scalar) > 1
+        
     def test_merge_boxes(self):
         """Test bounding box merging."""
         service = OpenCVObjectDetectionService()
@@ -202,7 +391,38 @@ class TestOpenCVObjectDetectionService:
         
         # Centered region should rank higher despite lower confidence
         assert ranked[0].label == "centered"
+    
+    def test_rank_regions_keeps_order_of_ties(self):
+        """Test equally scored regions keep their input order."""
+        service = OpenCVObjectDetectionService()
+        
+        detections = [
+            BoundingBox(100, 75, 200, 150, 0.7, "first"),
+            BoundingBox(10, 10, 50, 0, 0.9, "flat"),
+            BoundingBox(100, 75, 200, 150, 0.7, "second"),
+        ]
+        
+        ranked = service._rank_regions(detections, (400, 300))
         
+        assert [r.label for r in ranked] == ["first", "second", "flat"]
+        assert service._rank_regions([], (400, 300)) == []
+    
+    def test_rank_array_scores_match_scalar(self, monkeypatch):
+        """Test ranking many regions as arrays gives the same scores and order as one at a time."""
+        service = OpenCVObjectDetectionService()
+        detections = _random_detections(40) + [
+            BoundingBox(10, 10, 50, 0, 0.9, "flat"),
+            BoundingBox(-20, 500, 100, 150, 0.5, "out_of_frame"),
+        ]
+        
+        scores = service._score_regions(BoundingBoxArray.from_list(detections), (800, 600))
+        assert scores.tolist() == [service._score_region(d, (800, 600)) for d in detections]
+        
+        monkeypatch.setattr(opencv_detection_service, 'VECTORIZED_RANK_MIN_REGIONS', len(detections) + 1)
+        scalar = service._rank_regions(detections, (800, 600))
+        monkeypatch.setattr(opencv_detection_service, 'VECTORIZED_RANK_MIN_REGIONS', 0)
+        assert service._rank_regions(detections, (800, 600)) == scalar
+    
     def test_find_suitable_regions(self):
         """Test the main find_suitable_regions interface."""
         # Create test image with clear rectangle
@@ -227,6 +447,17 @@ class TestOpenCVObjectDetectionService:
         # Should use fallback detector
         assert len(regions) > 0
         
+    def test_fallback_does_not_change_enabled_detectors(self):
+        """Test the fallback run leaves the detector set of a shared service alone."""
+        image = Image.new('RGB', (100, 100), 'white')
+        config = OpenCVObjectDetectionConfig(enabled_detectors=['edge', 'contour'])
+        
+        service = OpenCVObjectDetectionService(config)
+        regions = service.find_suitable_regions(image)
+        
+        assert len(regions) > 0
+        assert set(service._detectors) == {'edge', 'contour'}
+        
     def test_find_suitable_regions_too_small(self):
         """Test filtering of regions that are too small."""
         # Create image with tiny rectangle
@@ -277,7 +508,7 @@ class TestOpenCVObjectDetectionService:
         # Mock edge detector to be slow
         original_edge = service._detectors['edge']
         service._detectors['edge'] = Mock(spec=EdgeBasedDetector)
-        service._detectors['edge'].detect.side_effect = lambda img: (
+        service._detectors['edge'].detect.side_effect = lambda img, context=None: (
             time.sleep(0.5),  # Sleep longer than timeout
             []
         )[1]
@@ -299,6 +530,81 @@ class TestOpenCVObjectDetectionService:
         service.cleanup()
         service._executor.shutdown.assert_called_once_with(wait=False)
         
+    def test_opencv_thread_policy(self, monkeypatch):
+        """Test OpenCV threads are shared between parallel detectors and only set once per process."""
+        import cv2
+        from src.services.opencv_detection import opencv_detection_service
+        monkeypatch.setattr(opencv_detection_service, '_thread_policy_applied', False)
+        monkeypatch.setattr('src.services.opencv_detection.opencv_detection_service.os.cpu_count', lambda: 8)
+        setter = Mock()
+        monkeypatch.setattr(cv2, 'setNumThreads', setter)
+        kernel_workers = Mock()
+        monkeypatch.setattr(opencv_detection_service, 'set_max_workers', kernel_workers)
+        
+        config = OpenCVObjectDetectionConfig(
+            enabled_detectors=['edge', 'contour', 'color', 'template'],
+            parallel_processing=True
+        )
+        service = OpenCVObjectDetectionService(config)
+        setter.assert_called_once_with(2)
+        kernel_workers.assert_called_once_with(2)
+        service.cleanup()
+        
+        # Later services, whatever their concurrency, leave the process-wide pool alone
+        service = OpenCVObjectDetectionService(OpenCVObjectDetectionConfig(parallel_processing=False))
+        service.cleanup()
+        setter.assert_called_once_with(2)
+    
+    def test_thread_policy_cpu_budget(self, monkeypatch):
+        """Test the policy splits an explicit core budget between concurrent detectors."""
+        import cv2
+        from src.services.opencv_detection import opencv_detection_service
+        monkeypatch.setattr(opencv_detection_service, '_thread_policy_applied', False)
+        setter = Mock()
+        monkeypatch.setattr(cv2, 'setNumThreads', setter)
+        monkeypatch.setattr(opencv_detection_service, 'set_max_workers', Mock())
+        
+        assert opencv_detection_service.apply_thread_policy(3, cpu_budget=4)
+        assert not opencv_detection_service.apply_thread_policy(1, cpu_budget=4)
+        setter.assert_called_once_with(1)
+        
+    def test_kernel_pool_capped(self, monkeypatch):
+        """Test template kernels run on at most the capped number of threads, and inline at one."""
+        from src.services.opencv_detection import _kernel_pool
+        monkeypatch.setattr(_kernel_pool, '_pool', None)
+        monkeypatch.setattr(_kernel_pool, '_max_workers', None)
+        running, peak = [0], [0]
+        lock = threading.Lock()
+        
+        def kernel(i):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.01)
+            with lock:
+                running[0] -= 1
+            return i
+        
+        _kernel_pool.set_max_workers(2)
+        assert _kernel_pool.map_kernels(kernel, [(i,) for i in range(8)]) == list(range(8))
+        assert 1 <= peak[0] <= 2
+        
+        _kernel_pool.set_max_workers(1)
+        assert _kernel_pool._pool is None
+        assert _kernel_pool.map_kernels(threading.get_ident, [(), ()]) == [threading.get_ident()] * 2
+    
+    def test_kernel_pool_taken_before_resize_still_runs(self, monkeypatch):
+        """Test a pool taken just before the cap changes still accepts kernels."""
+        from src.services.opencv_detection import _kernel_pool
+        monkeypatch.setattr(_kernel_pool, '_pool', None)
+        monkeypatch.setattr(_kernel_pool, '_max_workers', 2)
+        
+        pool = _kernel_pool._get_pool()
+        _kernel_pool.set_max_workers(3)
+        
+        assert list(pool.map(abs, [-1, -2])) == [1, 2]
+        assert _kernel_pool._get_pool() is not pool
+    
     def test_config_validation_in_service(self):
         """Test that service validates config on initialization."""
         # Invalid config with negative confidence
@@ -21,6 +21,7 @@ from src.services.opencv_detection.detectors import (
     TemplateMatchingDetector,
     FallbackDetector
 )
+from src.services.opencv_detection.detectors.fallback_detector import _fallback_layout
 
 
 def create_test_image_with_rectangle(size=300, rect_size=100):
@@ -59,13 +60,9 @@ def create_test_image_with_colored_regions(size=300):
 
 def create_test_image_with_gradient(size=300):
     """Create a test image with gradient (no clear regions)."""
-    image = np.zeros((size, size, 3), dtype=np.uint8)
-    
-    for i in range(size):
-        for j in range(size):
-            image[i, j] = [i * 255 // size, j * 255 // size, (i + j) * 255 // (2 * size)]
-    
-    return image
+    i, j = np.indices((size, size), dtype=np.int32)
+    channels = [i * 255 // size, j * 255 // size, (i + j) * 255 // (2 * size)]
+    return np.stack(channels, axis=-1).astype(np.uint8)
 
 
 class TestEdgeBasedDetector:
@@ -86,6 +83,20 @@ class TestEdgeBasedDetector:
         assert central_region is not None
         assert central_region.confidence > 0.5
     
+    def test_detect_rectangle_downscaled(self):
+        """Test regions found on a downscaled image are reported in original coordinates."""
+        config = OpenCVObjectDetectionConfig(detection_downscale=2)
+        detector = EdgeBasedDetector(config)
+        
+        image = create_test_image_with_rectangle(size=600, rect_size=200)
+        regions = detector.detect(image)
+        
+        central_region = next((r for r in regions if
+                              abs(r.x - 200) < 10 and abs(r.y - 200) < 10), None)
+        assert central_region is not None
+        assert abs(central_region.width - 200) < 10
+        assert abs(central_region.height - 200) < 10
+    
     def test_detect_no_edges(self):
         """Test with image that has no clear edges."""
         config = OpenCVObjectDetectionConfig()
@@ -125,6 +136,17 @@ class TestContourBasedDetector:
         # Check that detected regions are labeled as rectangles
         assert any(r.label == "contour_rectangle" for r in regions)
     
+    def test_detect_rectangles_downscaled(self):
+        """Test rectangles found on a downscaled image are reported in original coordinates."""
+        config = OpenCVObjectDetectionConfig(detection_downscale=2)
+        detector = ContourBasedDetector(config)
+        
+        image = create_test_image_with_rectangle(size=600, rect_size=200)
+        regions = detector.detect(image)
+        
+        assert any(abs(r.x - 200) < 10 and abs(r.y - 200) < 10 and abs(r.width - 200) < 10
+                   for r in regions)
+    
     def test_rectangle_score_calculation(self):
         """Test rectangle score calculation."""
         config = OpenCVObjectDetectionConfig()
@@ -238,6 +260,37 @@ class TestTemplateMatchingDetector:
         # Should find matches (may not find any if template doesn't match well)
         # Just verify the function runs without error
         assert isinstance(matches, list)
+    
+    def test_match_peaks_single_peak_per_match(self):
+        """Test peak finding reports a pasted template once, at its location."""
+        config = OpenCVObjectDetectionConfig()
+        detector = TemplateMatchingDetector(config)
+        template = detector.templates['frame']
+        
+        gray = np.full((300, 300), 128, dtype=np.uint8)
+        gray[60:60 + template.shape[0], 50:50 + template.shape[1]] = template
+        
+        xs, ys, scores = detector._match_peaks(gray, template, 0.9)
+        
+        assert list(zip(xs.tolist(), ys.tolist())) == [(50, 60)]
+        assert scores[0] == pytest.approx(1.0, abs=1e-4)
+    
+    def test_pooled_matching_matches_inline(self, monkeypatch):
+        """Test kernel pool matching gives the same matches, in order, as inline matching."""
+        config = OpenCVObjectDetectionConfig()
+        detector = TemplateMatchingDetector(config)
+        
+        image = np.ones((300, 300, 3), dtype=np.uint8) * 255
+        cv2.rectangle(image, (20, 20), (280, 280), (0, 0, 0), 15)
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        
+        monkeypatch.setattr(cv2, 'getNumberOfCPUs', lambda: 1)
+        inline = detector._match_templates(gray, detector.template_pyramids)
+        monkeypatch.setattr(cv2, 'getNumberOfCPUs', lambda: 4)
+        pooled = detector._match_templates(gray, detector.template_pyramids)
+        
+        assert len(inline) > 0
+        assert pooled == inline
 
 
 class TestFallbackDetector:
@@ -298,6 +351,21 @@ class TestFallbackDetector:
             # Should be close to one of the standard ratios
             standard_ratios = [1.0, 1.5, 1.33, 1.77, 1/1.5, 1/1.33, 1/1.77]
             assert any(abs(ratio - sr) < 0.1 for sr in standard_ratios)
+    
+    def test_layout_cached_per_size(self):
+        """Test the fallback layout is computed once per image size and returned as fresh boxes."""
+        config = OpenCVObjectDetectionConfig()
+        detector = FallbackDetector(config)
+        image = np.zeros((300, 400, 3), dtype=np.uint8)
+        
+        _fallback_layout.cache_clear()
+        first = detector.detect(image)
+        first[0].x += 10
+        second = detector.detect(image)
+        
+        assert _fallback_layout.cache_info().hits == 1
+        assert second[0] is not first[0]
+        assert second[0].x == first[0].x - 10
 
 
 if __name__ == '__main__':
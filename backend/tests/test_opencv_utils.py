@@ -17,7 +17,7 @@ if backend_path not in sys.path:
 from src.services.opencv_detection.utils import (
     pil_to_cv2, cv2_to_pil, bytes_to_cv2, cv2_to_bytes,
     validate_image, resize_image_if_needed, normalize_image,
-    apply_clahe
+    apply_clahe, local_mean_and_variance, downscale_image, upscale_box
 )
 
 
@@ -223,6 +223,27 @@ class TestImageProcessing:
         assert abs(resized.shape[0] / resized.shape[1] - 2/3) < 0.01  # Aspect ratio preserved
         assert abs(scale - 1/3) < 0.01
     
+    def test_downscale_image(self):
+        """Test downscaling by an integer factor."""
+        image = np.zeros((300, 400), dtype=np.uint8)
+        
+        unchanged, scale = downscale_image(image, 1)
+        assert unchanged is image
+        assert scale == 1.0
+        
+        resized, scale = downscale_image(image, 2)
+        assert resized.shape == (150, 200)
+        assert scale == 0.5
+    
+    def test_upscale_box_clamps_to_image(self):
+        """Test boxes on the rounded-up edge of an odd-sized image stay inside the original."""
+        image = np.zeros((603, 803), dtype=np.uint8)
+        resized, scale = downscale_image(image, 2)
+        assert resized.shape == (302, 402)
+        
+        assert upscale_box((10, 20, 30, 40), scale, image.shape) == (20.0, 40.0, 60.0, 80.0)
+        assert upscale_box((302, 251, 100, 100), scale, image.shape) == (604.0, 502.0, 199.0, 101.0)
+    
     def test_normalize_image_grayscale(self):
         """Test normalizing grayscale image."""
         # Create image with poor contrast
@@ -262,6 +283,18 @@ class TestImageProcessing:
         
         assert enhanced.shape == image.shape
         assert enhanced.dtype == image.dtype
+    
+    def test_local_mean_and_variance_matches_filter2d(self):
+        """Test window statistics match a normalized-kernel convolution."""
+        channel = np.random.default_rng(0).integers(0, 256, (60, 80)).astype(np.float32)
+        kernel = np.ones((15, 15), np.float32) / 225
+        
+        mean, variance = local_mean_and_variance(channel, 15)
+        
+        expected_mean = cv2.filter2D(channel, -1, kernel)
+        expected_variance = cv2.filter2D(channel ** 2, -1, kernel) - expected_mean ** 2
+        np.testing.assert_allclose(mean, expected_mean, rtol=1e-5)
+        np.testing.assert_allclose(variance, expected_variance, atol=0.5)
 
 
 if __name__ == '__main__':
@@ -54,6 +54,18 @@ class TestWorkflowIntegration:
             service = create_object_detection_service(job_id='test-job-456')
             assert service.use_opencv is False
             
+    def test_factory_shares_opencv_service(self):
+        """Test factory-made wrappers share one OpenCV service, and its detectors, per configuration."""
+        first = create_object_detection_service(use_opencv=True)
+        second = create_object_detection_service(use_opencv=True)
+        
+        assert first is not second
+        assert first._service is second._service
+        assert ObjectDetectionCompatibilityWrapper(use_opencv=True)._service is not first._service
+        
+        other = create_object_detection_service(ObjectDetectionConfig(max_detections=2), use_opencv=True)
+        assert other._service is not first._service
+    
     def test_bounding_box_compatibility(self):
         """Test that returned BoundingBox objects are compatible."""
         # Create test image
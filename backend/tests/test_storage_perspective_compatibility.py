@@ -245,7 +245,8 @@ class TestExistingStorageIntegration:
             # Test with mock data
             test_bytes = b"test image data"
             
-            with patch('src.storage.storage') as mock_storage_client:
+            with patch('src.storage.storage') as mock_storage_client, \
+                    patch('src.storage.google.auth.default', return_value=(Mock(), 'test-project')):
                 with patch('src.storage.os.getenv') as mock_getenv:
                     mock_getenv.return_value = "test-bucket"
                     
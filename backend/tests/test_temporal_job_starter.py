@@ -0,0 +1,191 @@
+"""
+Tests for claiming Firestore jobs and starting their workflows
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+from google.cloud import firestore
+from temporalio.exceptions import WorkflowAlreadyStartedError
+
+from src.temporal import temporal_job_starter
+from src.temporal.temporal_job_starter import TemporalJobStarter, _claim_job
+
+
+class FakeDocumentRef:
+    """Document reference over an in-memory field dict."""
+    
+    def __init__(self, doc_id, fields):
+        self.id = doc_id
+        self.fields = dict(fields)
+    
+    def get(self, field_paths=None, transaction=None):
+        fields = {name: self.fields[name] for name in field_paths if name in self.fields}
+        return SimpleNamespace(exists=True, to_dict=lambda: dict(fields), get=fields.__getitem__)
+    
+    def snapshot(self):
+        """Query result for the document as it is now."""
+        fields = dict(self.fields)
+        return SimpleNamespace(id=self.id, reference=self, to_dict=lambda: dict(fields), get=fields.__getitem__)
+
+
+class FakeTransaction:
+    """Transaction that applies updates straight to the fake documents."""
+    
+    def update(self, doc_ref, fields):
+        for name, value in fields.items():
+            if value is firestore.DELETE_FIELD:
+                doc_ref.fields.pop(name, None)
+            else:
+                doc_ref.fields[name] = value
+
+
+def claim(doc_ref, from_status, claimed_at=None):
+    """Run the claim transaction body against a fake document."""
+    return _claim_job.to_wrap(FakeTransaction(), doc_ref, from_status, claimed_at)
+
+
+@pytest.fixture
+def starter():
+    """Job starter with a mocked Firestore client and Temporal client."""
+    with patch.object(temporal_job_starter.firestore, 'Client'):
+        starter = TemporalJobStarter()
+    starter.temporal_client = Mock(start_workflow=AsyncMock(return_value=Mock(id='workflow-1')))
+    yield starter
+    starter._executor.shutdown(wait=False)
+
+
+class TestClaimJob:
+    """Test cases for the claim transaction."""
+    
+    def test_claim_pending_job(self):
+        """Test a pending job moves to processing with a claim lease."""
+        doc_ref = FakeDocumentRef('job-1', {'status': 'pending'})
+        
+        assert claim(doc_ref, 'pending')
+        assert doc_ref.fields['status'] == 'processing'
+        assert isinstance(doc_ref.fields['claimed_at'], datetime)
+    
+    def test_claim_race(self):
+        """Test two starters claiming the same job: only the first wins."""
+        doc_ref = FakeDocumentRef('job-1', {'status': 'pending'})
+        
+        assert claim(doc_ref, 'pending')
+        assert not claim(doc_ref, 'pending')
+    
+    def test_takeover_race(self):
+        """Test two starters taking over the same expired claim: only the first wins."""
+        expired = datetime.now(timezone.utc) - timedelta(hours=1)
+        doc_ref = FakeDocumentRef('job-1', {'status': 'processing', 'claimed_at': expired})
+        
+        assert claim(doc_ref, 'processing', expired)
+        assert not claim(doc_ref, 'processing', expired)
+        assert doc_ref.fields['claimed_at'] > expired
+    
+    def test_expired_claim_on_finished_job_released(self):
+        """Test an expired claim on a job the workflow already finished is removed, not taken over."""
+        expired = datetime.now(timezone.utc) - timedelta(hours=1)
+        doc_ref = FakeDocumentRef('job-1', {'status': 'completed', 'claimed_at': expired})
+        
+        assert not claim(doc_ref, 'processing', expired)
+        assert doc_ref.fields == {'status': 'completed'}
+
+
+class TestClaimPendingJobs:
+    """Test cases for the poll query."""
+    
+    def test_claims_pending_and_expired_jobs(self, starter):
+        """Test a poll claims pending jobs and takes over jobs whose claim expired."""
+        expired = datetime.now(timezone.utc) - timedelta(hours=1)
+        pending = FakeDocumentRef('job-1', {'status': 'pending'})
+        stranded = FakeDocumentRef('job-2', {'status': 'processing', 'claimed_at': expired})
+        query = starter.db.collection.return_value.where.return_value.limit.return_value
+        query.stream.side_effect = [iter([pending.snapshot()]), iter([stranded.snapshot()])]
+        
+        with patch.object(temporal_job_starter, '_claim_job', side_effect=lambda _, *args: claim(*args)):
+            claimed = starter._claim_pending_jobs('intelligent_mockup_jobs', 'pending')
+        
+        assert [doc.id for doc in claimed] == ['job-1', 'job-2']
+        assert stranded.fields['claimed_at'] > expired
+        
+        lease_filter = starter.db.collection.return_value.where.call_args_list[1].kwargs['filter']
+        assert lease_filter.field_path == 'claimed_at'
+        assert lease_filter.op_string == '<'
+
+
+class TestProcessJobs:
+    """Test cases for starting workflows and releasing claims."""
+    
+    async def test_started_job_releases_claim(self, starter):
+        """Test a started workflow returns the update that removes the claim lease."""
+        doc_ref = FakeDocumentRef('job-1', {'status': 'processing', 'claimed_at': datetime.now(timezone.utc)})
+        
+        update = await starter.process_intelligent_mockup_job(doc_ref.snapshot())
+        
+        assert update == (doc_ref, {'claimed_at': firestore.DELETE_FIELD})
+    
+    async def test_already_started_job_releases_claim(self, starter):
+        """Test a job whose workflow a previous claim started is treated as started."""
+        starter.temporal_client.start_workflow.side_effect = WorkflowAlreadyStartedError('image-gen-job-1', 'run')
+        doc_ref = FakeDocumentRef('job-1', {'status': 'processing', 'prompt': 'a cat'})
+        
+        update = await starter.process_job(doc_ref.snapshot())
+        
+        assert update == (doc_ref, {'claimed_at': firestore.DELETE_FIELD})
+    
+    async def test_start_failure_sets_error_status(self, starter):
+        """Test a failed workflow start returns an error update that also releases the claim."""
+        starter.temporal_client.start_workflow.side_effect = RuntimeError('temporal unavailable')
+        doc_ref = FakeDocumentRef('job-1', {'status': 'processing', 'prompt': 'a cat'})
+        
+        doc, fields = await starter.process_job(doc_ref.snapshot())
+        
+        assert doc is doc_ref
+        assert fields['status'] == 'error'
+        assert 'temporal unavailable' in fields['errorMessage']
+        assert fields['claimed_at'] is firestore.DELETE_FIELD
+    
+    async def test_claim_lease_not_passed_to_workflow(self, starter):
+        """Test the claim field stays out of the workflow input."""
+        doc_ref = FakeDocumentRef('job-1', {'status': 'processing', 'claimed_at': datetime.now(timezone.utc)})
+        
+        await starter.process_job(doc_ref.snapshot())
+        
+        job_data = starter.temporal_client.start_workflow.call_args.args[1]
+        assert 'claimed_at' not in job_data
+        assert job_data['job_id'] == 'job-1'
+
+
+class TestCommitUpdates:
+    """Test cases for the batched status writes."""
+    
+    async def test_burst_updates_committed_in_one_batch(self, starter):
+        """Test the claim releases and error updates of a burst share one batch commit."""
+        starter.loop = asyncio.get_running_loop()
+        starter._job_slots = asyncio.Semaphore(4)
+        starter.temporal_client.start_workflow.side_effect = [Mock(id='workflow-1'), RuntimeError('boom')]
+        docs = [FakeDocumentRef(f'job-{i}', {'status': 'processing'}) for i in range(2)]
+        batch = starter.db.batch.return_value
+        
+        await starter._process_burst(starter.process_intelligent_mockup_job, [d.snapshot() for d in docs])
+        
+        starter.db.batch.assert_called_once()
+        assert [call.args[0] for call in batch.update.call_args_list] == docs
+        assert batch.update.call_args_list[1].args[1]['status'] == 'failed'
+        batch.commit.assert_called_once()
+    
+    async def test_failed_commit_leaves_claims_for_takeover(self, starter):
+        """Test a failed batch commit is logged and leaves the claims to expire instead of raising."""
+        starter.loop = asyncio.get_running_loop()
+        batch = starter.db.batch.return_value
+        batch.commit.side_effect = RuntimeError('firestore unavailable')
+        doc_ref = FakeDocumentRef('job-1', {'status': 'processing', 'claimed_at': datetime.now(timezone.utc)})
+        
+        with patch.object(temporal_job_starter.logger, 'error') as log_error:
+            await starter._commit_updates([(doc_ref, {'claimed_at': firestore.DELETE_FIELD})])
+        
+        log_error.assert_called_once()
+        assert 'claimed_at' in doc_ref.fields